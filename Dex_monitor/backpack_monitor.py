@@ -1,18 +1,35 @@
 import websocket
-import requests
 import json
-import sqlite3
 import time
 import threading
 import os
+import concurrent.futures
+from functools import partial
 from datetime import datetime
 
+from quote_bus import attach_publisher
+from market_db import MarketDataWriter, quote_row
+from http_client import HttpClient
+import fast_json
+from order_book import OrderBook, to_ticks, price_scale, decimals_from_tick_size, DEFAULT_PRICE_DECIMALS
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ⚙️ КОНФІГУРАЦІЯ
 # ═══════════════════════════════════════════════════════════════════════════
 
 WS_URL = "wss://ws.backpack.exchange"
 REST_API_URL = "https://api.backpack.exchange/api/v1"
+HTTP_RATE_PER_SEC = 5  # REST-знімки стаканів при пропусках у послідовності
+http = HttpClient('Backpack', rate_per_sec=HTTP_RATE_PER_SEC)
+RESYNC_WORKERS = 4
+RESYNC_BUFFER_LIMIT = 1000  # Дельт на символ, поки чекаємо знімок (старіші відкидаються)
+
+# --- ШАРДИ WSS ---
+# Символи діляться між WS_SHARDS з'єднаннями (кожне — свій потік): підписка йде паралельно,
+# а обрив одного сокета зачіпає лише його символи. WS_SHARDS = 1 — старий режим одного з'єднання.
+WS_SHARDS = 4
+SUBSCRIBE_CHUNK = 10  # Стрімів в одному SUBSCRIBE (ліміт на з'єднання)
+SUBSCRIBE_PAUSE_SEC = 1.0  # Пауза між пакетами підписки в межах одного з'єднання
 
 # --- ШЛЯХИ ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -20,14 +37,32 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DB_FOLDER = os.path.join(PROJECT_ROOT, 'Database')
 DB_NAME = 'backpack_database.db'
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
+db_writer = MarketDataWriter(DB_PATH, with_vwap=True)  # Одне з'єднання на весь час роботи
 
 UPDATE_INTERVAL_FAST = 15
 
+# 🚌 Shared-memory шина котирувань (підключається з main.py); SQLite пишеться раз на UPDATE_INTERVAL_FAST
+quote_bus = None
+BUS_PUBLISH_INTERVAL = 1
+
 # --- ГЛОБАЛЬНЕ СХОВИЩЕ ---
-local_books = {}  # Стакани
-market_stats = {}  # Статистика
+# Стан символу змінює потік WSS його шарду (символи шардів не перетинаються) і, для REST-знімка,
+# потік пулу — обидва під shard.lock. Назовні — незмінні записи (copy-on-write): update_db_loop
+# копіює dict посилань (атомарно під GIL) і лока не бере.
+local_books = {}  # Стакани: {clean_symbol: OrderBook} (order_book.py) — тільки потік WSS шарду
+top_of_book = {}  # {clean_symbol: (best_bid, best_ask, bid_vwaps, ask_vwaps)} — OrderBook.top_record()
+price_decimals = {}  # {clean_symbol: знаки tickSize} — для переведення ціни у цілі тики
+market_stats = {}  # Статистика: {clean_symbol: dict} — кожне оновлення кладе новий dict
 symbols_map = []
-data_lock = threading.Lock()
+shards = []  # [Shard] — WSS-з'єднання, кожне зі своєю частиною symbols_map
+raw_symbols = {}  # {clean_symbol: raw_symbol} — для REST /depth
+
+# Послідовність depth по кожному символу. Стакан будується лише з REST-знімка: перша дельта символу
+# або дельта з U > u попередньої + 1 (пропуск) прибирає запис, дельти буферизуються, а знімок лише цього
+# символу тягне пул і застосовує одразу після отримання (під shard.lock). Глобального скидання немає.
+depth_seq = {}  # {clean_symbol: u останньої застосованої дельти}
+resync_buffers = {}  # {clean_symbol: [(U, u, bids, asks)]} — символи, що чекають знімок
+resync_pool = concurrent.futures.ThreadPoolExecutor(max_workers=RESYNC_WORKERS)
 
 
 class C:
@@ -64,100 +99,76 @@ def get_clean_symbol(raw_symbol):
 # ═══════════════════════════════════════════════════════════════════════════
 
 def init_db():
-    if not os.path.exists(DB_FOLDER):
-        try:
-            os.makedirs(DB_FOLDER)
-        except:
-            pass
-
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute('PRAGMA journal_mode=WAL;')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS market_data (
-            token TEXT PRIMARY KEY,
-            bid REAL,
-            ask REAL,
-            spread_pct REAL,
-            funding_pct REAL,
-            freq_hours INTEGER,
-            oi_usd REAL,
-            volume_24h REAL,
-            last_updated TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    db_writer.init_schema()
     print(f"{C.GREEN}✅ DB Connected: {DB_PATH}{C.END}")
 
 
-def update_db_loop():
-    time.sleep(2)
+def collect_rows():
+    """Рядки для шини/БД зі знімка незмінних записів — без локу, прийом кадрів не чекає."""
+    data_to_save = []
 
-    while True:
-        wait_for_next_cycle(UPDATE_INTERVAL_FAST)
+    # Знімок — копії dict посилань на незмінні записи; потік WSS тим часом працює далі
+    records = dict(top_of_book)
+    all_stats = dict(market_stats)
 
-        try:
-            data_to_save = []
+    for clean_token, record in records.items():
+        best_bid, best_ask, bid_vwaps, ask_vwaps = record
+        stats = all_stats.get(clean_token, {})
+
+        if best_bid == 0 or best_ask == 0: continue
 
-            with data_lock:
-                all_tokens = set(local_books.keys()) | set(market_stats.keys())
+        spread = ((best_ask - best_bid) / best_bid) * 100
 
-                for clean_token in all_tokens:
-                    book = local_books.get(clean_token)
-                    stats = market_stats.get(clean_token, {})
+        price_calc = stats.get('mark_price', 0)
+        if price_calc == 0: price_calc = (best_bid + best_ask) / 2
 
-                    if not book or not book.get('bids') or not book.get('asks'):
-                        continue
+        oi_usd = stats.get('oi_contracts', 0) * 2 * price_calc
 
-                    try:
-                        best_bid = max(book['bids'].keys())
-                        best_ask = min(book['asks'].keys())
-                    except ValueError:
-                        continue
+        data_to_save.append({
+            'Token': clean_token,
+            'Bid': best_bid,
+            'Ask': best_ask,
+            'Spread %': spread,
+            'Funding %': stats.get('funding', 0.0),
+            'Freq (h)': 1,
+            'OI ($)': oi_usd,
+            'Volume 24h ($)': stats.get('vol', 0.0),
+            'Bid VWAP': bid_vwaps,
+            'Ask VWAP': ask_vwaps
+        })
+    return data_to_save
 
-                    if best_bid == 0 or best_ask == 0: continue
 
-                    spread = ((best_ask - best_bid) / best_bid) * 100
+def update_db_loop():
+    time.sleep(2)
+    next_db_write = 0
+    last_counts, last_report = [0] * len(shards), time.time()
+
+    while True:
+        wait_for_next_cycle(BUS_PUBLISH_INTERVAL if quote_bus else UPDATE_INTERVAL_FAST)
 
-                    price_calc = stats.get('mark_price', 0)
-                    if price_calc == 0: price_calc = (best_bid + best_ask) / 2
+        try:
+            data_to_save = collect_rows()
 
-                    oi_usd = stats.get('oi_contracts', 0) * 2 * price_calc
+            if data_to_save and quote_bus:
+                quote_bus.publish([(r['Token'], r['Bid'], r['Ask'], r['Funding %'], r['Freq (h)'], r['OI ($)'],
+                                    r['Volume 24h ($)'], r['Bid VWAP'], r['Ask VWAP']) for r in data_to_save])
 
-                    data_to_save.append({
-                        'Token': clean_token,
-                        'Bid': best_bid,
-                        'Ask': best_ask,
-                        'Spread %': spread,
-                        'Funding %': stats.get('funding', 0.0),
-                        'Freq (h)': 1,
-                        'OI ($)': oi_usd,
-                        'Volume 24h ($)': stats.get('vol', 0.0)
-                    })
+            if time.time() < next_db_write: continue
+            next_db_write = (int(time.time()) // UPDATE_INTERVAL_FAST + 1) * UPDATE_INTERVAL_FAST
 
             if data_to_save:
-                conn = sqlite3.connect(DB_PATH, timeout=5)
-                cursor = conn.cursor()
                 ts = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                db_writer.write([quote_row(r, with_vwap=True) for r in data_to_save], ts=ts)
 
-                for row in data_to_save:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO market_data 
-                        (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        row['Token'], row['Bid'], row['Ask'], row['Spread %'],
-                        row['Funding %'], row['Freq (h)'], row['OI ($)'],
-                        row['Volume 24h ($)'], ts
-                    ))
+                # Темп кадрів по шардах з минулого запису
+                now = time.time()
+                counts = [shard.messages for shard in shards]
+                rates = ' '.join(f"{(c - p) / (now - last_report):.0f}" for c, p in zip(counts, last_counts))
+                last_counts, last_report = counts, now
 
-                conn.commit()
-                conn.execute('PRAGMA wal_checkpoint(PASSIVE);')
-                conn.close()
-
-                print(f"{C.CYAN}[{ts.split()[1]}] Backpack (WSS): оновив {len(data_to_save)} токенів.{C.END}")
+                print(f"{C.CYAN}[{ts.split()[1]}] Backpack (WSS): оновив {len(data_to_save)} токенів "
+                      f"(resync: {sum(shard.resyncs for shard in shards)}, msg/s по шардах: {rates}).{C.END}")
 
         except Exception as e:
             print(f"{C.RED}❌ DB Loop Error: {e}{C.END}")
@@ -170,141 +181,280 @@ def update_db_loop():
 
 def get_perp_symbols():
     try:
-        r = requests.get(f"{REST_API_URL}/markets", timeout=10)
-        data = r.json()
+        data = http.get_json(f"{REST_API_URL}/markets", timeout=10)
+        if not data: return []
         perps = [m['symbol'] for m in data if m.get('marketType') == 'PERP']
+        for m in data:
+            if m.get('marketType') != 'PERP': continue
+            raw_symbols[get_clean_symbol(m['symbol'])] = m['symbol']
+            tick_size = ((m.get('filters') or {}).get('price') or {}).get('tickSize')
+            price_decimals[get_clean_symbol(m['symbol'])] = decimals_from_tick_size(tick_size)
         return perps
     except:
         return []
 
 
-def on_message(ws, message):
+# ═══════════════════════════════════════════════════════════════════════════
+# 🔁 RESYNC СТАКАНІВ (REST-знімок на символ)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def fetch_depth_snapshot(shard, clean_symbol):
+    """Потік пулу: знімок стакану одного символу, застосовується одразу — тихий символ не чекає кадру."""
+    data = None
     try:
-        payload = json.loads(message)
-        data = payload.get('data')
-        if not data: return
+        data = http.get_json(f"{REST_API_URL}/depth", params={'symbol': raw_symbols[clean_symbol]}, timeout=10)
+    except:
+        pass
+    with shard.lock:
+        apply_snapshot(shard, clean_symbol, data)
+
+
+def start_resync(shard, clean_symbol, pending=()):
+    """Символ перестає публікуватись, доки знімок + буферизовані дельти не відновлять стакан (під shard.lock)."""
+    resync_buffers[clean_symbol] = list(pending)
+    top_of_book.pop(clean_symbol, None)
+    resync_pool.submit(fetch_depth_snapshot, shard, clean_symbol)
 
-        raw_symbol = data.get('s')
-        event_type = data.get('e')
 
-        if not raw_symbol or not event_type: return
+def apply_snapshot(shard, clean_symbol, data):
+    """Знімок -> новий стакан, поверх — дельти з буфера, новіші за lastUpdateId (під shard.lock)."""
+    buffered = resync_buffers.get(clean_symbol)
+    if buffered is None: return  # Resync скасовано (шард перепідключився)
 
+    if not data or data.get('lastUpdateId') is None:
+        # Знімка немає — наступна дельта почне resync заново (частоту обмежує http)
+        del resync_buffers[clean_symbol]
+        depth_seq.pop(clean_symbol, None)
+        local_books.pop(clean_symbol, None)
+        return
+
+    decimals = price_decimals.get(clean_symbol, DEFAULT_PRICE_DECIMALS)
+    scale = price_scale(decimals)
+    book = OrderBook(decimals)
+    book.apply_ticks([(to_ticks(float(p), scale), float(q)) for p, q in data.get('bids', [])],
+                     [(to_ticks(float(p), scale), float(q)) for p, q in data.get('asks', [])])
+    seq = int(data['lastUpdateId'])
+
+    for i, (first_id, last_id, bids, asks) in enumerate(buffered):
+        # Дельта без U/u не перевіряється — застосовуємо поверх знімка, як і в живому потоці
+        if last_id is not None and last_id <= seq: continue  # Вже враховано у знімку
+        if first_id is not None and first_id > seq + 1:
+            # Знімок старіший за буфер — беремо новий, буфер зберігаємо
+            start_resync(shard, clean_symbol, buffered[i:])
+            return
+        book.apply_ticks(bids, asks)
+        if last_id is not None: seq = last_id
+
+    del resync_buffers[clean_symbol]
+    local_books[clean_symbol] = book
+    depth_seq[clean_symbol] = seq
+    top_of_book[clean_symbol] = book.top_record()
+
+
+def reset_shard(shard):
+    """З'єднання шарду закрите: його символи не публікуються, стакани будуються заново зі знімків."""
+    with shard.lock:
+        for clean_symbol in shard.clean_symbols:
+            top_of_book.pop(clean_symbol, None)
+            local_books.pop(clean_symbol, None)
+            depth_seq.pop(clean_symbol, None)
+            resync_buffers.pop(clean_symbol, None)  # Знімок, що ще в дорозі, буде проігноровано
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🌐 ШАРДИ WSS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Shard:
+    """Одне WSS-з'єднання зі своєю частиною символів; перепідключається незалежно від інших."""
+
+    def __init__(self, index, symbols):
+        self.index = index
+        self.symbols = symbols
+        self.clean_symbols = [get_clean_symbol(sym) for sym in symbols]
+        self.lock = threading.Lock()  # Стакани шарду: потік WSS і застосування REST-знімків пулом
+        self.messages = 0  # Кадрів усього (темп — у update_db_loop)
+        self.resyncs = 0
+        self.subscribed_in = None  # Секунд від підключення до останнього SUBSCRIBE (None — ще підписується)
+        self.thread = None
+
+    @property
+    def name(self):
+        return f"#{self.index + 1}/{len(shards)}"
+
+    def run(self):
+        while True:
+            try:
+                ws = websocket.WebSocketApp(
+                    WS_URL,
+                    on_open=partial(on_open, self),
+                    on_message=partial(on_message, self),
+                    on_error=partial(on_error, self),
+                    on_close=partial(on_close, self)
+                )
+                # 🔥 ПОВЕРНУЛИ ПІНГ, АЛЕ М'ЯКИЙ
+                # Інтервал 25с (щоб NAT не вбивав), Таймаут 20с (щоб не панікувати)
+                ws.run_forever(ping_interval=25, ping_timeout=20)
+            except Exception:
+                time.sleep(5)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+
+def make_shards(symbols, n_shards=WS_SHARDS):
+    """Символи по колу між шардами — у кожному приблизно однаково стрімів."""
+    n_shards = max(1, min(n_shards, len(symbols)))
+    return [Shard(i, symbols[i::n_shards]) for i in range(n_shards)]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📨 ОБРОБКА КАДРІВ
+# ═══════════════════════════════════════════════════════════════════════════
+
+def on_message(shard, ws, message):
+    try:
+        shard.messages += 1
+
+        # fast_json: msgspec/orjson, якщо встановлені — числа приходять уже float
+        msg = fast_json.decode_backpack(message)
+        if msg is None: return
+
+        event_type, raw_symbol, values = msg
         clean_symbol = get_clean_symbol(raw_symbol)
 
-        with data_lock:
-            if clean_symbol not in market_stats: market_stats[clean_symbol] = {}
-            if clean_symbol not in local_books: local_books[clean_symbol] = {'bids': {}, 'asks': {}}
-
-            if event_type == 'depth':
-                for item in data.get('b', []):
-                    price = float(item[0])
-                    qty = float(item[1])
-                    if qty == 0:
-                        local_books[clean_symbol]['bids'].pop(price, None)
-                    else:
-                        local_books[clean_symbol]['bids'][price] = qty
-
-                for item in data.get('a', []):
-                    price = float(item[0])
-                    qty = float(item[1])
-                    if qty == 0:
-                        local_books[clean_symbol]['asks'].pop(price, None)
-                    else:
-                        local_books[clean_symbol]['asks'][price] = qty
-
-            elif event_type == 'ticker':
-                market_stats[clean_symbol]['vol'] = float(data.get('V', 0))
-
-            elif event_type == 'markPrice':
-                market_stats[clean_symbol]['mark_price'] = float(data.get('p', 0))
-                if 'f' in data:
-                    market_stats[clean_symbol]['funding'] = float(data['f']) * 100
-
-            elif event_type == 'openInterest':
-                market_stats[clean_symbol]['oi_contracts'] = float(data.get('o', 0))
+        if event_type == 'depth':
+            decimals = price_decimals.get(clean_symbol, DEFAULT_PRICE_DECIMALS)
+            scale = price_scale(decimals)
+            bids = [(to_ticks(price, scale), size) for price, size in values[0]]
+            asks = [(to_ticks(price, scale), size) for price, size in values[1]]
+            first_id, last_id = values[2], values[3]
+
+            with shard.lock:
+                buffered = resync_buffers.get(clean_symbol)
+                if buffered is not None:
+                    buffered.append((first_id, last_id, bids, asks))
+                    if len(buffered) > RESYNC_BUFFER_LIMIT: del buffered[0]
+                    return
+
+                book = local_books.get(clean_symbol)
+                if book is None:
+                    # Стакан лише зі знімка: з самих дельт він неповний (і без U/u це не перевірити)
+                    start_resync(shard, clean_symbol, [(first_id, last_id, bids, asks)])
+                    return
+                if first_id is not None and last_id is not None:
+                    last_seq = depth_seq.get(clean_symbol)
+                    if last_seq is not None and last_id <= last_seq: return  # Повтор або старіша дельта
+                    if last_seq is None or first_id > last_seq + 1:
+                        shard.resyncs += 1
+                        start_resync(shard, clean_symbol, [(first_id, last_id, bids, asks)])
+                        return
+                    depth_seq[clean_symbol] = last_id
+
+                book.apply_ticks(bids, asks)
+                # Публікація — заміна посилання на новий tuple (атомарно), читач ніколи не бачить півоновлення
+                top_of_book[clean_symbol] = book.top_record()
+            return
+
+        # Статистика — copy-on-write: новий dict замість зміни того, який може читати update_db_loop
+        stats = dict(market_stats.get(clean_symbol, ()))
+
+        if event_type == 'ticker':
+            stats['vol'] = values
+
+        elif event_type == 'markPrice':
+            stats['mark_price'] = values[0]
+            if values[1] is not None:
+                stats['funding'] = values[1] * 100
+
+        elif event_type == 'openInterest':
+            stats['oi_contracts'] = values
+
+        market_stats[clean_symbol] = stats
 
     except Exception as e:
         pass
 
 
-def on_error(ws, error):
+def on_error(shard, ws, error):
     if str(error):
-        print(f"\n{C.RED}⚠️ WSS Error: {error}{C.END}")
+        print(f"\n{C.RED}⚠️ WSS {shard.name} Error: {error}{C.END}")
 
 
-def on_close(ws, close_status_code, close_msg):
-    print(f"\n{C.YELLOW}🔌 WSS Closed. Reconnecting in 3s...{C.END}")
+def on_close(shard, ws, close_status_code, close_msg):
+    # Котирування шарду більше не оновлюються — прибираємо їх одразу, а не після реконекту;
+    # після перепідключення кожен символ відновиться через REST-знімок (on_message -> start_resync)
+    reset_shard(shard)
+    print(f"\n{C.YELLOW}🔌 WSS {shard.name} Closed ({len(shard.symbols)} symbols). Reconnecting in 3s...{C.END}")
     time.sleep(3)
-    with data_lock:
-        local_books.clear()
-        print(f"{C.YELLOW}🧹 Cleared orderbooks.{C.END}")
 
 
-def on_open(ws):
-    print(f"{C.GREEN}✅ WSS Connected! Subscribing...{C.END}")
+def on_open(shard, ws):
+    print(f"{C.GREEN}✅ WSS {shard.name} Connected! Subscribing {len(shard.symbols)} symbols...{C.END}")
+    shard.subscribed_in = None
+    reset_shard(shard)  # on_close міг не викликатись (виняток у run_forever)
 
     def subscribe_slowly():
+        started = time.time()
         streams = []
-        for sym in symbols_map:
+        for sym in shard.symbols:
             streams.append(f"depth.{sym}")
             streams.append(f"ticker.{sym}")
             streams.append(f"markPrice.{sym}")
             streams.append(f"openInterest.{sym}")
 
-            # 🔥 ЗМЕНШЕНИЙ ЧАНК: По 10 стрімів (дуже обережно)
-        chunk_size = 10
-        total_chunks = len(streams) // chunk_size + 1
-
-        for i in range(0, len(streams), chunk_size):
-            chunk = streams[i:i + chunk_size]
+        # 🔥 ЗМЕНШЕНИЙ ЧАНК: По SUBSCRIBE_CHUNK стрімів (дуже обережно) — шарди підписуються паралельно
+        for i in range(0, len(streams), SUBSCRIBE_CHUNK):
+            chunk = streams[i:i + SUBSCRIBE_CHUNK]
             if not chunk: continue
 
             payload = {"method": "SUBSCRIBE", "params": chunk}
             try:
                 ws.send(json.dumps(payload))
             except:
-                break
+                return
 
-            # 🔥 ЗБІЛЬШЕНА ПАУЗА: 1 секунда між пакетами
+            # 🔥 ПАУЗА між пакетами одного з'єднання
             # Це дає серверу час "переварити" підписку і не розірвати з'єднання
-            time.sleep(1.0)
+            if i + SUBSCRIBE_CHUNK < len(streams): time.sleep(SUBSCRIBE_PAUSE_SEC)
 
-            print(f"\r⏳ Subscribing... {i}/{len(streams)} streams sent", end="", flush=True)
+        shard.subscribed_in = time.time() - started
+        print(f"{C.GREEN}✅ WSS {shard.name}: {len(streams)} streams subscribed in {shard.subscribed_in:.1f}s.{C.END}")
 
-        print(f"\n{C.GREEN}✅ All subscriptions sent.{C.END}")
+        # Час до повної підписки всіх шардів (найповільніший шард)
+        if all(s.subscribed_in is not None for s in shards):
+            print(f"{C.GREEN}✅ All {len(shards)} shards subscribed: "
+                  f"{max(s.subscribed_in for s in shards):.1f}s to fully subscribed.{C.END}")
 
-    threading.Thread(target=subscribe_slowly).start()
+    threading.Thread(target=subscribe_slowly, daemon=True).start()
 
 
-def main():
-    global symbols_map
-    print(f"\n{C.CYAN}🚀 BACKPACK WSS MONITOR (SLOW START MODE){C.END}")
+def main(quote_bus_name=None, update_event=None):
+    global symbols_map, quote_bus, shards
+    print(f"\n{C.CYAN}🚀 BACKPACK WSS MONITOR (SHARDED, {WS_SHARDS} CONNECTIONS){C.END}")
 
     init_db()
+    quote_bus = attach_publisher(quote_bus_name, update_event)
     symbols_map = get_perp_symbols()
 
     if not symbols_map:
         print(f"{C.RED}❌ No PERP symbols found.{C.END}")
         return
 
+    shards = make_shards(symbols_map)
+    for shard in shards: shard.start()
+
     db_thread = threading.Thread(target=update_db_loop, daemon=True)
     db_thread.start()
 
-    while True:
-        try:
-            ws = websocket.WebSocketApp(
-                WS_URL,
-                on_open=on_open,
-                on_message=on_message,
-                on_error=on_error,
-                on_close=on_close
-            )
-            # 🔥 ПОВЕРНУЛИ ПІНГ, АЛЕ М'ЯКИЙ
-            # Інтервал 25с (щоб NAT не вбивав), Таймаут 20с (щоб не панікувати)
-            ws.run_forever(ping_interval=25, ping_timeout=20)
-        except Exception:
-            time.sleep(5)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print(f"\n{C.RED}🛑 Stopped{C.END}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
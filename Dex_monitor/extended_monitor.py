@@ -1,10 +1,12 @@
-import requests
 import pandas as pd
 import time
-import sqlite3
 import os
 from datetime import datetime
 
+from quote_bus import attach_publisher
+from market_db import MarketDataWriter, quote_row
+from http_client import HttpClient, NOT_MODIFIED
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ⚙️ КОНФІГУРАЦІЯ
 # ═══════════════════════════════════════════════════════════════════════════
@@ -17,15 +19,23 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DB_FOLDER = os.path.join(PROJECT_ROOT, 'Database')
 DB_NAME = 'extended_database.db'
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
+db_writer = MarketDataWriter(DB_PATH)  # Одне з'єднання на весь час роботи
 
 # --- ТАЙМЕРИ ---
 UPDATE_INTERVAL_FAST = 15  # Інтервал оновлення (секунди)
 UPDATE_INTERVAL_SLOW = 3600
 
+# 🚌 Shared-memory шина котирувань (підключається з main.py)
+quote_bus = None
+
+last_results = []  # Рядки останньої розпарсеної відповіді (для NOT_MODIFIED)
+
 HEADERS = {
     'Accept': 'application/json',
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
+HTTP_RATE_PER_SEC = 5
+http = HttpClient('Extended', headers=HEADERS, rate_per_sec=HTTP_RATE_PER_SEC)
 
 
 class C:
@@ -63,118 +73,51 @@ def wait_for_next_cycle(interval=15):
 # ═══════════════════════════════════════════════════════════════════════════
 
 def init_db():
-    if not os.path.exists(DB_FOLDER):
-        try:
-            os.makedirs(DB_FOLDER)
-        except:
-            pass
-
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute('PRAGMA journal_mode=WAL;')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS market_data (
-            token TEXT PRIMARY KEY,
-            bid REAL,
-            ask REAL,
-            spread_pct REAL,
-            funding_pct REAL,
-            freq_hours INTEGER,
-            oi_usd REAL,
-            volume_24h REAL,
-            last_updated TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    db_writer.init_schema()
     print(f"{C.GREEN}✅ DB Connected: {DB_PATH}{C.END}")
 
 
 def save_to_db(data_list, is_full_update):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
+    """
+    full — всі колонки; fast — без OI/Volume (їх оновлює повний цикл раз на UPDATE_INTERVAL_SLOW).
+    У fast-режимі пишуться лише змінені токени, решті — heartbeat last_updated. Повертає (записано, heartbeat).
+    """
     try:
-        for row in data_list:
-            if is_full_update:
-                cursor.execute('''
-                    UPDATE market_data 
-                    SET bid=?, ask=?, spread_pct=?, funding_pct=?, freq_hours=?, oi_usd=?, volume_24h=?, last_updated=?
-                    WHERE token=?
-                ''', (
-                    row['Bid'], row['Ask'], row['Spread %'],
-                    row['Funding %'], row['Freq (h)'], row['OI ($)'],
-                    row['Volume 24h ($)'], timestamp, row['Token']
-                ))
-
-                if cursor.rowcount == 0:
-                    cursor.execute('''
-                        INSERT INTO market_data 
-                        (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        row['Token'], row['Bid'], row['Ask'], row['Spread %'],
-                        row['Funding %'], row['Freq (h)'], row['OI ($)'],
-                        row['Volume 24h ($)'], timestamp
-                    ))
-
-            else:
-                cursor.execute('''
-                    UPDATE market_data 
-                    SET bid=?, ask=?, spread_pct=?, funding_pct=?, freq_hours=?, last_updated=?
-                    WHERE token=?
-                ''', (
-                    row['Bid'], row['Ask'], row['Spread %'],
-                    row['Funding %'], row['Freq (h)'], timestamp, row['Token']
-                ))
-
-                if cursor.rowcount == 0:
-                    cursor.execute('''
-                        INSERT INTO market_data 
-                        (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?, 0, 0, ?)
-                    ''', (
-                        row['Token'], row['Bid'], row['Ask'], row['Spread %'],
-                        row['Funding %'], row['Freq (h)'], timestamp
-                    ))
-
-        conn.commit()
+        return db_writer.write_changed([quote_row(row) for row in data_list], full=is_full_update)
     except Exception as e:
         print(f"{C.RED}❌ DB Error: {e}{C.END}")
-    finally:
-        conn.close()
+        return 0, 0
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 📡 API ФУНКЦІЇ
 # ═══════════════════════════════════════════════════════════════════════════
 
-def get_json(url, retries=3):
-    for i in range(retries):
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            if response.status_code != 200:
-                print(f"{C.RED}⚠️ API Status: {response.status_code}{C.END}")
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"{C.RED}❌ Req Error: {e}{C.END}")
-            if i == retries - 1: return None
-            time.sleep(2)
-    return None
+def get_json(url):
+    """
+    Умовний GET через спільний клієнт (keep-alive, token bucket, backoff з jitter на 429/5xx).
+    (json, розпарсених байт); (NOT_MODIFIED, 0) — відповідь та сама, що минулого циклу.
+    """
+    data, parsed_bytes = http.get_if_changed(url, timeout=15)
+    if data is None: print(f"{C.RED}❌ Req Error: {url}{C.END}")
+    return data, parsed_bytes
 
 
 def fetch_extended_data():
-    raw_response = get_json(API_URL)
+    """(рядки, розпарсених байт). Незмінена відповідь — рядки минулого циклу без парсингу."""
+    global last_results
+    raw_response, parsed_bytes = get_json(API_URL)
+
+    if raw_response is NOT_MODIFIED:
+        return last_results, 0
 
     if not raw_response:
-        return []
+        return [], 0
+    last_results = []  # Помилкову відповідь (навіть повторену) не підміняємо старими рядками
 
     if raw_response.get('status') != 'OK':
         print(f"{C.YELLOW}⚠️ API returned status: {raw_response.get('status')}{C.END}")
-        return []
+        return [], 0
 
     markets = raw_response.get('data', [])
     results = []
@@ -214,18 +157,21 @@ def fetch_extended_data():
         except Exception:
             continue
 
-    return results
+    last_results = results
+    return results, parsed_bytes
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 🚀 MAIN LOOP
 # ═══════════════════════════════════════════════════════════════════════════
 
-def main():
+def main(quote_bus_name=None, update_event=None):
+    global quote_bus
     print(f"\n{C.CYAN}🚀 EXTENDED EXCHANGE MONITOR (SYNCED){C.END}")
     print(f"{C.YELLOW}📂 DB Path: {DB_PATH}{C.END}")
 
     init_db()
+    quote_bus = attach_publisher(quote_bus_name, update_event)
 
     last_slow_update = 0
     first_run = True
@@ -242,14 +188,18 @@ def main():
                 print(f"{C.BOLD}🔄 Fetching Data...{C.END}")
 
             # 🔥 2. ОТРИМАННЯ ДАНИХ (Починається синхронно)
-            data_list = fetch_extended_data()
+            data_list, parsed_bytes = fetch_extended_data()
 
             if not data_list:
                 print(f"{C.RED}⚠️ No data fetched. Retrying next cycle...{C.END}")
                 continue
 
+            if quote_bus:
+                quote_bus.publish([(r['Token'], r['Bid'], r['Ask'], r['Funding %'], r['Freq (h)'], r['OI ($)'],
+                                    r['Volume 24h ($)']) for r in data_list])
+
             # 🔥 3. ЗБЕРЕЖЕННЯ
-            save_to_db(data_list, is_full_update)
+            written, touched = save_to_db(data_list, is_full_update)
 
             if is_full_update:
                 last_slow_update = time.time()
@@ -260,7 +210,9 @@ def main():
                 print(f"{C.GREEN}✅ Monitor Active. Pairs found: {len(data_list)}{C.END}\n")
                 first_run = False
             else:
-                print(f"{C.CYAN}[{ts}] Extended: оновив {len(data_list)} токенів.{C.END}")
+                print(f"{C.CYAN}[{ts}] Extended: оновив {len(data_list)} токенів "
+                      f"(записано {written}, heartbeat {touched}, розпарсено {parsed_bytes / 1024:.0f} KB).{C.END}")
+            http.report()
 
             # time.sleep більше не потрібен
 
@@ -0,0 +1,240 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚡ ДЕКОДУВАННЯ JSON (WSS-кадри та REST-відповіді)
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Бекенд обирається за наявністю: msgspec -> orjson -> stdlib json.
+#   loads(data)            — загальний JSON -> dict/list (REST-відповіді)
+#   decode_lighter(frame)  — None | ('market_stats', [(mid_str, funding, vol, oi)])
+#                                 | ('order_book', channel, [(price, size)], [(price, size)], seq, is_snapshot)
+#                                   seq = (begin_nonce, nonce, offset), будь-яке може бути None;
+#                                   is_snapshot — 'subscribed/order_book' (повний стакан після підписки)
+#   decode_backpack(frame) — None | ('depth', symbol, ([(price, size)], [(price, size)], U, u))
+#                                 | ('ticker', symbol, vol) | ('markPrice', symbol, (mark, funding | None))
+#                                 | ('openInterest', symbol, oi)
+#   decode_paradex(frame)  — None | ('bbo', market, (bid, ask)) | ('funding_data', market, funding_rate | None)
+#
+# Усі числа на виході — float. msgspec декодує кадр одразу в типізовані Struct (рядкові
+# ціни -> float без проміжних dict); кадр, що не влазить у схему, розбирається звичайним шляхом.
+
+PREFERRED_DECODERS = ('msgspec', 'orjson', 'json')
+# Битий JSON: json/orjson кидають ValueError, msgspec — власний DecodeError
+DECODE_ERRORS = (ValueError, msgspec.DecodeError) if msgspec is not None else (ValueError,)
+
+
+def _num(value):
+    return float(value or 0)
+
+
+def _int(value):
+    return int(value) if value is not None else None
+
+
+class JsonDecoder:
+    name = 'json'
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+    def lighter(self, frame):
+        data = self.loads(frame)
+        msg_type = data.get('type')
+        if msg_type == 'update/market_stats':
+            return 'market_stats', [(mid, _num(s.get('current_funding_rate')), _num(s.get('daily_quote_token_volume')),
+                                     _num(s.get('open_interest')))
+                                    for mid, s in (data.get('market_stats') or {}).items()]
+        if msg_type in ('update/order_book', 'subscribed/order_book'):
+            book = data.get('order_book') or {}
+            return ('order_book', data.get('channel', ''),
+                    [(float(b['price']), float(b['size'])) for b in book.get('bids', [])],
+                    [(float(a['price']), float(a['size'])) for a in book.get('asks', [])],
+                    (book.get('begin_nonce'), book.get('nonce'), book.get('offset', data.get('offset'))),
+                    msg_type == 'subscribed/order_book')
+        return None
+
+    def backpack(self, frame):
+        data = self.loads(frame).get('data')
+        if not data: return None
+        event, symbol = data.get('e'), data.get('s')
+        if not event or not symbol: return None
+        if event == 'depth':
+            return event, symbol, ([(float(p), float(s)) for p, s in data.get('b', [])],
+                                   [(float(p), float(s)) for p, s in data.get('a', [])],
+                                   _int(data.get('U')), _int(data.get('u')))
+        if event == 'ticker':
+            return event, symbol, float(data.get('V', 0))
+        if event == 'markPrice':
+            return event, symbol, (float(data.get('p', 0)), float(data['f']) if 'f' in data else None)
+        if event == 'openInterest':
+            return event, symbol, float(data.get('o', 0))
+        return None
+
+    def paradex(self, frame):
+        msg = self.loads(frame)
+        if msg.get('method') != 'subscription': return None
+        params = msg.get('params') or {}
+        channel = params.get('channel', '')
+        data = params.get('data') or {}
+        market = data.get('market')
+        if not market: return None
+        if channel.startswith('bbo.'):
+            return 'bbo', market, (_num(data.get('bid')), _num(data.get('ask')))
+        if channel.startswith('funding_data.'):
+            rate = data.get('funding_rate')
+            return 'funding_data', market, float(rate) if rate is not None else None
+        return None
+
+
+class OrjsonDecoder(JsonDecoder):
+    name = 'orjson'
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+if msgspec is not None:
+    from typing import Optional
+
+    # --- Lighter ---
+    class LighterLevel(msgspec.Struct, gc=False):
+        price: float
+        size: float
+
+    class LighterBook(msgspec.Struct, gc=False):
+        bids: list[LighterLevel] = []
+        asks: list[LighterLevel] = []
+        begin_nonce: Optional[int] = None
+        nonce: Optional[int] = None
+        offset: Optional[int] = None
+
+    class LighterStats(msgspec.Struct, gc=False):
+        current_funding_rate: Optional[float] = None
+        daily_quote_token_volume: Optional[float] = None
+        open_interest: Optional[float] = None
+
+    class LighterFrame(msgspec.Struct, gc=False):
+        type: str = ''
+        channel: str = ''
+        offset: Optional[int] = None
+        order_book: Optional[LighterBook] = None
+        market_stats: Optional[dict[str, LighterStats]] = None
+
+    # --- Backpack (одна схема на depth / ticker / markPrice / openInterest) ---
+    class BackpackData(msgspec.Struct, gc=False):
+        e: str = ''
+        s: str = ''
+        b: list[tuple[float, float]] = []
+        a: list[tuple[float, float]] = []
+        U: Optional[int] = None
+        u: Optional[int] = None
+        V: float = 0.0
+        p: float = 0.0
+        f: Optional[float] = None
+        o: float = 0.0
+
+    class BackpackFrame(msgspec.Struct, gc=False):
+        data: Optional[BackpackData] = None
+
+    # --- Paradex ---
+    class ParadexData(msgspec.Struct, gc=False):
+        market: str = ''
+        bid: Optional[float] = None
+        ask: Optional[float] = None
+        funding_rate: Optional[float] = None
+
+    class ParadexParams(msgspec.Struct, gc=False):
+        channel: str = ''
+        data: Optional[ParadexData] = None
+
+    class ParadexFrame(msgspec.Struct, gc=False):
+        method: str = ''
+        params: Optional[ParadexParams] = None
+
+
+class MsgspecDecoder(JsonDecoder):
+    name = 'msgspec'
+
+    def __init__(self):
+        # strict=False: рядкові числа ("123.45") декодуються одразу у float
+        self.generic = msgspec.json.Decoder()
+        self.lighter_decoder = msgspec.json.Decoder(LighterFrame, strict=False)
+        self.backpack_decoder = msgspec.json.Decoder(BackpackFrame, strict=False)
+        self.paradex_decoder = msgspec.json.Decoder(ParadexFrame, strict=False)
+
+    def loads(self, data):
+        return self.generic.decode(data)
+
+    def lighter(self, frame):
+        try:
+            msg = self.lighter_decoder.decode(frame)
+        except msgspec.ValidationError:
+            return super().lighter(frame)
+        if msg.type == 'update/market_stats':
+            return 'market_stats', [(mid, s.current_funding_rate or 0.0, s.daily_quote_token_volume or 0.0,
+                                     s.open_interest or 0.0) for mid, s in (msg.market_stats or {}).items()]
+        if msg.type in ('update/order_book', 'subscribed/order_book'):
+            book = msg.order_book or LighterBook()
+            return ('order_book', msg.channel, [(b.price, b.size) for b in book.bids],
+                    [(a.price, a.size) for a in book.asks],
+                    (book.begin_nonce, book.nonce, book.offset if book.offset is not None else msg.offset),
+                    msg.type == 'subscribed/order_book')
+        return None
+
+    def backpack(self, frame):
+        try:
+            msg = self.backpack_decoder.decode(frame)
+        except msgspec.ValidationError:
+            return super().backpack(frame)
+        data = msg.data
+        if data is None or not data.e or not data.s: return None
+        if data.e == 'depth': return data.e, data.s, (data.b, data.a, data.U, data.u)
+        if data.e == 'ticker': return data.e, data.s, data.V
+        if data.e == 'markPrice': return data.e, data.s, (data.p, data.f)
+        if data.e == 'openInterest': return data.e, data.s, data.o
+        return None
+
+    def paradex(self, frame):
+        try:
+            msg = self.paradex_decoder.decode(frame)
+        except msgspec.ValidationError:
+            return super().paradex(frame)
+        if msg.method != 'subscription' or msg.params is None or msg.params.data is None: return None
+        channel, data = msg.params.channel, msg.params.data
+        if not data.market: return None
+        if channel.startswith('bbo.'): return 'bbo', data.market, (data.bid or 0.0, data.ask or 0.0)
+        if channel.startswith('funding_data.'): return 'funding_data', data.market, data.funding_rate
+        return None
+
+
+DECODERS = {'json': JsonDecoder}
+if orjson is not None: DECODERS['orjson'] = OrjsonDecoder
+if msgspec is not None: DECODERS['msgspec'] = MsgspecDecoder
+
+decoder = None
+loads = decode_lighter = decode_backpack = decode_paradex = None
+
+
+def use(name=None):
+    """Перемикає бекенд (None — найшвидший з доступних). Повертає його назву."""
+    global decoder, loads, decode_lighter, decode_backpack, decode_paradex
+    if name is None: name = next(n for n in PREFERRED_DECODERS if n in DECODERS)
+    decoder = DECODERS[name]()
+    loads, decode_lighter = decoder.loads, decoder.lighter
+    decode_backpack, decode_paradex = decoder.backpack, decoder.paradex
+    return name
+
+
+use()
@@ -0,0 +1,385 @@
+import time
+import queue
+import random
+import hashlib
+import asyncio
+import threading
+from collections import deque
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+
+import fast_json
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # Без aiohttp AsyncHttpClient недоступний — монітори лишаються на потоках
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🌐 СПІЛЬНИЙ HTTP-КЛІЄНТ ДЛЯ REST-МОНІТОРІВ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# - requests.Session з пулом з'єднань (keep-alive): без нового TCP/TLS на кожен запит;
+# - token bucket на кожен host: запит чекає токен замість того, щоб ловити 429.
+#   Швидкість підлаштовується (AIMD): 429 / вичерпаний RateLimit-Remaining -> пауза
+#   до Retry-After/Reset і зменшення швидкості вдвічі; кожна успішна відповідь
+#   потроху повертає її до налаштованої;
+# - повтори з експоненційним backoff і "full jitter" (випадкова пауза 0..base*2^n),
+#   щоб 20 потоків не повторювали запит одночасно;
+# - лічильники на endpoint (host + path): запити, помилки, 429, p50/p95 затримки;
+# - get_if_changed(): ETag/If-None-Match або хеш тіла — незмінена відповідь не парситься.
+#
+# AsyncHttpClient — той самий бюджет і лічильники, але aiohttp на власному event loop
+# у фоновому потоці: сотні запитів одночасно (обмежено семафором) без пулу потоків,
+# результати віддаються пакетами в міру готовності (stream), а не після найповільнішого.
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 3
+BACKOFF_BASE_SEC = 0.5
+BACKOFF_MAX_SEC = 10
+MIN_RATE_FRACTION = 0.1  # Нижче цієї частки від rate_per_sec не падаємо
+RATE_RECOVERY_STEP = 0.02  # +2% від налаштованої швидкості на кожну успішну відповідь
+REPORT_INTERVAL_SEC = 300
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+_DONE = object()  # Кінець stream()
+NOT_MODIFIED = object()  # get_if_changed: відповідь та сама, що й минулого разу
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SEC, cap=BACKOFF_MAX_SEC):
+    """Full jitter: випадкова пауза в [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _header_seconds(value, now):
+    """Retry-After / *-Reset: секунди або epoch (секунди/мілісекунди) -> секунд до дозволу."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value > 1e12: value /= 1000  # epoch у мілісекундах
+    if value > 1e9: value -= now  # epoch у секундах
+    return max(0.0, value)
+
+
+class TokenBucket:
+    """Ліміт запитів на host. acquire() блокує, доки не з'явиться токен або не мине пауза."""
+
+    def __init__(self, rate_per_sec, burst):
+        self.max_rate = float(rate_per_sec)
+        self.rate = float(rate_per_sec)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Забирає токен і повертає 0, або повертає скільки секунд чекати (без блокування)."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if now >= self.paused_until and self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return max(self.paused_until - now, (1 - self.tokens) / self.rate)
+
+    def acquire(self):
+        while True:
+            wait = self.reserve()
+            if not wait: return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            wait = self.reserve()
+            if not wait: return
+            await asyncio.sleep(wait)
+
+    def throttle(self, pause_sec):
+        """Сервер сказав "забагато": пауза для всіх потоків і зменшення швидкості вдвічі."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + pause_sec)
+            self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+            self.tokens = 0.0
+
+    def pause(self, pause_sec):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + pause_sec)
+
+    def recover(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY_STEP)
+
+
+class EndpointStats:
+    __slots__ = ('requests', 'errors', 'throttled', 'latencies')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.latencies = deque(maxlen=1000)
+
+
+class HttpClient:
+    """
+    Один клієнт на монітор. get_json() повертає розпарсений JSON або None
+    (як старі get_json у моніторах). 4xx, крім 429, не повторюються.
+    """
+
+    def __init__(self, name, headers=None, rate_per_sec=10, burst=None, pool_size=10,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst or max(1, int(rate_per_sec))
+
+        self.session = requests.Session()
+        if headers: self.session.headers.update(headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.buckets = {}
+        self.stats = {}
+        self.validators = {}  # {(url, params): (ETag, хеш тіла)} — для get_if_changed
+        self.lock = threading.Lock()
+        self.last_report = time.time()
+
+    def _bucket(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate_per_sec, self.burst)
+            return self.buckets[host]
+
+    def _stats(self, endpoint):
+        with self.lock:
+            if endpoint not in self.stats: self.stats[endpoint] = EndpointStats()
+            return self.stats[endpoint]
+
+    def _apply_rate_headers(self, bucket, headers):
+        now = time.time()
+        remaining = headers.get('X-RateLimit-Remaining', headers.get('RateLimit-Remaining'))
+        reset = headers.get('X-RateLimit-Reset', headers.get('RateLimit-Reset'))
+        try:
+            if remaining is not None and float(remaining) <= 0:
+                pause = _header_seconds(reset, now)
+                if pause: bucket.pause(pause)
+        except (TypeError, ValueError):
+            pass
+
+    def _endpoint(self, url):
+        """(token bucket host-а, лічильники endpoint-а)."""
+        parsed = urlparse(url)
+        return self._bucket(parsed.netloc), self._stats(f"{parsed.netloc}{parsed.path}")
+
+    def _on_error(self, stats, attempt, retries):
+        """Мережева помилка -> пауза перед повтором (0 для останньої спроби)."""
+        with self.lock:
+            stats.requests += 1
+            stats.errors += 1
+        return backoff_delay(attempt) if attempt < retries - 1 else 0
+
+    def _on_response(self, bucket, stats, status, headers, latency, attempt, retries):
+        """
+        Спільна логіка sync/async шляхів. Повертає ('ok', 0), ('fail', 0) або ('retry', пауза);
+        оновлює лічильники і bucket (429 -> пауза на весь host і зменшення швидкості).
+        """
+        with self.lock:
+            stats.requests += 1
+            stats.latencies.append(latency)
+        self._apply_rate_headers(bucket, headers)
+
+        if status == 429:
+            with self.lock: stats.throttled += 1
+            retry_after = _header_seconds(headers.get('Retry-After'), time.time())
+            bucket.throttle(retry_after if retry_after is not None else backoff_delay(attempt))
+            return 'retry', 0  # Паузу витримує bucket.acquire()
+        if status in RETRY_STATUSES:
+            with self.lock: stats.errors += 1
+            return 'retry', backoff_delay(attempt) if attempt < retries - 1 else 0
+        if status >= 400:
+            with self.lock: stats.errors += 1
+            return 'fail', 0
+        bucket.recover()
+        return 'ok', 0
+
+    def _on_bad_json(self, stats):
+        with self.lock: stats.errors += 1
+
+    def _request(self, url, params=None, timeout=None, retries=None, headers=None):
+        """(response, лічильники endpoint-а); response = None, якщо всі спроби невдалі або 4xx."""
+        bucket, stats = self._endpoint(url)
+        retries = self.retries if retries is None else retries
+
+        for attempt in range(retries):
+            bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+            except requests.RequestException:
+                time.sleep(self._on_error(stats, attempt, retries))
+                continue
+
+            action, delay = self._on_response(bucket, stats, response.status_code, response.headers,
+                                              time.perf_counter() - start, attempt, retries)
+            if action == 'retry':
+                time.sleep(delay)
+                continue
+            if action == 'fail': return None, stats
+            return response, stats
+        return None, stats
+
+    def get_json(self, url, params=None, timeout=None, retries=None):
+        response, stats = self._request(url, params, timeout, retries)
+        if response is None: return None
+        try:
+            return fast_json.loads(response.content)
+        except fast_json.DECODE_ERRORS:
+            self._on_bad_json(stats)
+            return None
+
+    def get_if_changed(self, url, params=None, timeout=None, retries=None):
+        """
+        Умовний GET: (json, розпарсених байт), (NOT_MODIFIED, 0) або (None, 0).
+        Шле If-None-Match, якщо сервер дав ETag; інакше порівнює хеш тіла з минулим —
+        однакова відповідь не парситься.
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        etag, digest = self.validators.get(key, (None, None))
+        response, stats = self._request(url, params, timeout, retries,
+                                        headers={'If-None-Match': etag} if etag else None)
+        if response is None: return None, 0
+        if response.status_code == 304: return NOT_MODIFIED, 0
+
+        body = response.content
+        body_digest = hashlib.blake2b(body, digest_size=16).digest()
+        if body_digest == digest: return NOT_MODIFIED, 0
+        try:
+            data = fast_json.loads(body)
+        except fast_json.DECODE_ERRORS:
+            self._on_bad_json(stats)
+            return None, 0
+        self.validators[key] = (response.headers.get('ETag'), body_digest)
+        return data, len(body)
+
+    def snapshot(self):
+        """{endpoint: (запитів, помилок, 429, p50 ms, p95 ms)} — для моніторингу."""
+        with self.lock:
+            items = [(k, v.requests, v.errors, v.throttled, list(v.latencies)) for k, v in self.stats.items()]
+        result = {}
+        for endpoint, n, errors, throttled, latencies in items:
+            p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95]) if latencies else (0.0, 0.0)
+            result[endpoint] = (n, errors, throttled, p50, p95)
+        return result
+
+    def report(self, force=False):
+        """Раз на REPORT_INTERVAL_SEC друкує лічильники по endpoint."""
+        if not force and time.time() - self.last_report < REPORT_INTERVAL_SEC: return
+        for endpoint, (n, errors, throttled, p50, p95) in self.snapshot().items():
+            print(f"\n🌐 {self.name} {endpoint}: {n} req, {errors} err, {throttled}x429, "
+                  f"p50 {p50:.0f}ms, p95 {p95:.0f}ms")
+        self.last_report = time.time()
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpClient:
+    """
+    Асинхронний шлях поверх HttpClient (спільні token bucket та лічильники).
+    Event loop і aiohttp-сесія живуть між циклами; виклики — з будь-якого потоку через stream().
+    deadline — ліміт на одну спробу запиту (connect + відповідь).
+    """
+
+    def __init__(self, client, concurrency=50, deadline=DEFAULT_TIMEOUT):
+        if aiohttp is None: raise RuntimeError("aiohttp is not installed")
+        self.client = client
+        self.concurrency = concurrency
+        self.deadline = deadline
+        self.session = None
+        self.semaphore = None
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name=f"{client.name}-aio", daemon=True)
+        self.thread.start()
+
+    def _ensure_session(self):
+        # Створюється всередині loop: aiohttp прив'язує сесію до нього
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(headers=dict(self.client.session.headers), connector=connector,
+                                                 timeout=aiohttp.ClientTimeout(total=self.deadline))
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        return self.session
+
+    async def get_json(self, url, params=None, retries=None):
+        """Корутина з тією ж логікою повторів, що й HttpClient.get_json. None — не вдалося."""
+        client = self.client
+        session = self._ensure_session()
+        bucket, stats = client._endpoint(url)
+        retries = client.retries if retries is None else retries
+
+        for attempt in range(retries):
+            await bucket.acquire_async()
+            async with self.semaphore:
+                start = time.perf_counter()
+                try:
+                    async with session.get(url, params=params) as response:
+                        status, headers = response.status, response.headers
+                        body = await response.read()
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    await asyncio.sleep(client._on_error(stats, attempt, retries))
+                    continue
+
+            action, delay = client._on_response(bucket, stats, status, headers,
+                                                time.perf_counter() - start, attempt, retries)
+            if action == 'retry':
+                await asyncio.sleep(delay)
+                continue
+            if action == 'fail': return None
+            try:
+                return fast_json.loads(body)
+            except fast_json.DECODE_ERRORS:
+                client._on_bad_json(stats)
+                return None
+        return None
+
+    async def _run(self, func, items, out):
+        try:
+            tasks = [asyncio.ensure_future(func(self, item)) for item in items]
+            for task in asyncio.as_completed(tasks):
+                try:
+                    out.put(await task)
+                except Exception:
+                    out.put(None)
+        finally:
+            out.put(_DONE)
+
+    def stream(self, func, items, batch_size=50):
+        """
+        Запускає корутину func(client, item) для всіх items і віддає пакети результатів
+        (без None) у порядку завершення: перший пакет готовий, щойно відповіли batch_size запитів.
+        """
+        out = queue.Queue()
+        asyncio.run_coroutine_threadsafe(self._run(func, items, out), self.loop)
+        batch = []
+        while True:
+            result = out.get()
+            if result is _DONE: break
+            if result is not None: batch.append(result)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch: yield batch
+
+    def close(self):
+        async def shutdown():
+            if self.session is not None: await self.session.close()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
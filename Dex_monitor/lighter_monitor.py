@@ -1,37 +1,53 @@
 import websocket
-import requests
 import json
-import sqlite3
 import time
 import threading
 import os
 import sys
 from datetime import datetime
 
+from quote_bus import attach_publisher
+from market_db import MarketDataWriter
+from http_client import HttpClient
+import fast_json
+from order_book import OrderBook, to_ticks, price_scale, DEFAULT_PRICE_DECIMALS
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ⚙️ КОНФІГУРАЦІЯ
 # ═══════════════════════════════════════════════════════════════════════════
 
 WS_URL = "wss://mainnet.zklighter.elliot.ai/stream"
 REST_API_URL = "https://mainnet.zklighter.elliot.ai/api/v1/orderBookDetails?filter=perp"
+http = HttpClient('Lighter', headers={'accept': 'application/json'}, rate_per_sec=2)
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DB_FOLDER = os.path.join(PROJECT_ROOT, 'Database')
 DB_NAME = 'lighter_database.db'
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
+db_writer = MarketDataWriter(DB_PATH, with_vwap=True)  # Одне з'єднання на весь час роботи
 
 # Глобальні змінні
 id_to_symbol = {}
-local_books = {}  # Формат: {mid: {'bids': {'price_str': size}, 'asks': {'price_str': size}}}
-market_stats_cache = {}
-data_lock = threading.Lock()
-
-# Час останнього повного очищення (для профілактики)
-last_flush_time = time.time()
-FLUSH_INTERVAL = 1800  # Кожні 30 хвилин скидаємо кеш стаканів
+price_decimals = {}  # {mid: кількість знаків ціни} — для переведення ціни у цілі тики
+# Без спільного локу: стакани змінює лише потік WSS, а назовні публікує незмінні записи
+# (copy-on-write). update_db_loop копіює dict посилань (атомарно під GIL) і не гальмує прийом кадрів.
+local_books = {}  # Формат: {mid: OrderBook} (order_book.py) — тільки потік WSS
+top_of_book = {}  # {mid: (best_bid, best_ask, bid_vwaps, ask_vwaps)} — OrderBook.top_record()
+market_stats_cache = {}  # {mid: dict} — кожне оновлення кладе новий dict, старий не змінюється
+
+# Послідовність оновлень по кожному стакану (тільки потік WSS). Стакан будується зі знімка
+# 'subscribed/order_book'; дельта з begin_nonce != nonce попередньої = пропуск -> перепідписка
+# лише на цей ринок (новий знімок). Глобального періодичного очищення стаканів більше немає.
+book_seq = {}  # {mid: (nonce, offset)} останньої застосованої дельти/знімка
+awaiting_snapshot = set()  # mid, для яких чекаємо знімок — дельти до нього ігноруються
+resync_count = 0
 interval = 15
 
+# 🚌 Shared-memory шина котирувань (підключається з main.py); SQLite пишеться раз на interval
+quote_bus = None
+BUS_PUBLISH_INTERVAL = 1
+
 class C:
     CYAN = '\033[96m'
     GREEN = '\033[92m'
@@ -58,109 +74,72 @@ def wait_for_next_cycle(sleep_time):
 # ═══════════════════════════════════════════════════════════════════════════
 
 def init_db():
-    if not os.path.exists(DB_FOLDER):
-        try:
-            os.makedirs(DB_FOLDER)
-        except:
-            pass
-
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute('PRAGMA journal_mode=WAL;')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS market_data (
-            token TEXT PRIMARY KEY,
-            bid REAL,
-            ask REAL,
-            spread_pct REAL,
-            funding_pct REAL,
-            freq_hours INTEGER,
-            oi_usd REAL,
-            volume_24h REAL,
-            last_updated TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    db_writer.init_schema()
     print(f"{C.GREEN}✅ DB Connected: {DB_PATH}{C.END}")
 
 
-def update_db_loop():
-    global last_flush_time
-    time.sleep(2)
+def collect_rows():
+    """Рядки для шини/БД зі знімка незмінних записів — без локу, прийом кадрів не чекає."""
+    data_to_save = []
 
-    while True:
-        wait_for_next_cycle(interval)
-
-        # Профілактичне очищення кешу раз на 30 хв (щоб прибрати "сміття")
-        if time.time() - last_flush_time > FLUSH_INTERVAL:
-            with data_lock:
-                print(f"{C.YELLOW}🧹 Maintenance: Clearing local orderbooks...{C.END}")
-                local_books.clear()
-                last_flush_time = time.time()
-            # Даємо час на перезбір даних
-            time.sleep(5)
-            continue
+    # Знімок — копії dict посилань на незмінні записи; потік WSS тим часом працює далі
+    records = dict(top_of_book)
+    all_stats = dict(market_stats_cache)
 
-        try:
-            data_to_save = []
+    for mid, symbol in id_to_symbol.items():
+        record = records.get(mid)
+        if record is None: continue
+        best_bid, best_ask, bid_vwaps, ask_vwaps = record
 
-            with data_lock:
-                for mid, symbol in id_to_symbol.items():
-                    book = local_books.get(mid)
-                    if not book: continue
+        if best_bid == 0: continue
 
-                    # 🔥 ВИПРАВЛЕННЯ: Конвертуємо строкові ключі у float для пошуку MAX/MIN
-                    # keys() повертає ціни як рядки ("100.5"), тому треба float()
+        spread = 0.0
+        if best_ask > 0:
+            spread = ((best_ask - best_bid) / best_bid) * 100
 
-                    bids_prices = [float(p) for p in book['bids'].keys()]
-                    asks_prices = [float(p) for p in book['asks'].keys()]
+        stats = all_stats.get(mid, {})
+        funding = stats.get('funding', 0.0)
+        vol_usd = stats.get('vol', 0.0)
+        oi_usd = stats.get('oi', 0.0) * 2.0
 
-                    best_bid = max(bids_prices) if bids_prices else 0.0
-                    best_ask = min(asks_prices) if asks_prices else 0.0
+        data_to_save.append({
+            'token': symbol,
+            'bid': best_bid,
+            'ask': best_ask,
+            'spread': spread,
+            'funding': funding,
+            'oi': oi_usd,
+            'vol': vol_usd,
+            'bid_vwaps': bid_vwaps,
+            'ask_vwaps': ask_vwaps
+        })
+    return data_to_save
 
-                    if best_bid == 0: continue
 
-                    spread = 0.0
-                    if best_ask > 0:
-                        spread = ((best_ask - best_bid) / best_bid) * 100
+def update_db_loop():
+    time.sleep(2)
+    next_db_write = 0
 
-                    stats = market_stats_cache.get(mid, {})
-                    funding = stats.get('funding', 0.0)
-                    vol_usd = stats.get('vol', 0.0)
-                    oi_usd = stats.get('oi', 0.0) * 2.0
+    while True:
+        wait_for_next_cycle(BUS_PUBLISH_INTERVAL if quote_bus else interval)
 
-                    data_to_save.append({
-                        'token': symbol,
-                        'bid': best_bid,
-                        'ask': best_ask,
-                        'spread': spread,
-                        'funding': funding,
-                        'oi': oi_usd,
-                        'vol': vol_usd
-                    })
+        try:
+            data_to_save = collect_rows()
 
-            if data_to_save:
-                conn = sqlite3.connect(DB_PATH, timeout=10)
-                cursor = conn.cursor()
-                ts = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            if data_to_save and quote_bus:
+                quote_bus.publish([(r['token'], r['bid'], r['ask'], r['funding'], 1, r['oi'], r['vol'],
+                                    r['bid_vwaps'], r['ask_vwaps']) for r in data_to_save])
 
-                for row in data_to_save:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO market_data 
-                        (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        row['token'], row['bid'], row['ask'], row['spread'],
-                        row['funding'], 1, row['oi'], row['vol'], ts
-                    ))
+            if time.time() < next_db_write: continue
+            next_db_write = (int(time.time()) // interval + 1) * interval
 
-                conn.commit()
-                conn.execute('PRAGMA wal_checkpoint(PASSIVE);')
-                conn.close()
+            if data_to_save:
+                ts = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                db_writer.write([(r['token'], r['bid'], r['ask'], r['spread'], r['funding'], 1, r['oi'], r['vol'],
+                                  *r['bid_vwaps'], *r['ask_vwaps']) for r in data_to_save], ts=ts)
 
-                print(f"{C.CYAN}[{ts.split()[1]}] Lighter: оновив {len(data_to_save)} токенів.{C.END}")
+                print(f"{C.CYAN}[{ts.split()[1]}] Lighter: оновив {len(data_to_save)} токенів "
+                      f"(resync: {resync_count}).{C.END}")
 
         except Exception as e:
             print(f"\n{C.RED}❌ DB Loop Error: {e}{C.END}")
@@ -173,75 +152,83 @@ def update_db_loop():
 
 def get_market_map():
     try:
-        r = requests.get(REST_API_URL, headers={'accept': 'application/json'}, timeout=10)
-        data = r.json()
+        data = http.get_json(REST_API_URL, timeout=10)
+        if data is None:
+            print(f"{C.RED}❌ Init Error: {REST_API_URL}{C.END}")
+            return {}
         mapping = {}
         for item in data.get('order_book_details', []):
             if item.get('status') == 'active':
                 if float(item.get('daily_quote_token_volume', 0)) > 10:
                     mapping[item['market_id']] = item['symbol']
+                    price_decimals[item['market_id']] = int(item.get('price_decimals', DEFAULT_PRICE_DECIMALS))
         return mapping
     except Exception as e:
         print(f"{C.RED}❌ Init Error: {e}{C.END}")
         return {}
 
 
+def resync_book(ws, mid):
+    """Пропуск у послідовності: прибираємо запис ринку і перепідписуємось — сервер надішле свіжий знімок."""
+    global resync_count
+    resync_count += 1
+    awaiting_snapshot.add(mid)
+    top_of_book.pop(mid, None)
+    ws.send(json.dumps({"type": "unsubscribe", "channel": f"order_book/{mid}"}))
+    ws.send(json.dumps({"type": "subscribe", "channel": f"order_book/{mid}"}))
+
+
 def on_message(ws, message):
     try:
-        data = json.loads(message)
-        msg_type = data.get('type')
-
-        with data_lock:
-            if msg_type == 'update/market_stats':
-                all_stats_map = data.get('market_stats', {})
-                for mid_str, stats in all_stats_map.items():
-                    try:
-                        mid = int(mid_str)
-                    except:
-                        continue
-
-                    market_stats_cache[mid] = {
-                        'funding': float(stats.get('current_funding_rate', 0) or 0),
-                        'vol': float(stats.get('daily_quote_token_volume', 0) or 0),
-                        'oi': float(stats.get('open_interest', 0) or 0)
-                    }
-
-            elif msg_type == 'update/order_book':
-                channel = data.get('channel', '')
+        # fast_json: msgspec/orjson, якщо встановлені — ціни приходять уже float
+        msg = fast_json.decode_lighter(message)
+        if msg is None: return
+
+        if msg[0] == 'market_stats':
+            for mid_str, funding, vol, oi in msg[1]:
                 try:
-                    mid = int(channel.split(':')[1])
+                    mid = int(mid_str)
                 except:
+                    continue
+
+                market_stats_cache[mid] = {'funding': funding, 'vol': vol, 'oi': oi}
+
+        else:
+            _, channel, raw_bids, raw_asks, (begin_nonce, nonce, offset), is_snapshot = msg
+            try:
+                mid = int(channel.split(':')[1])
+            except:
+                return
+
+            if mid not in id_to_symbol: return
+
+            decimals = price_decimals.get(mid, DEFAULT_PRICE_DECIMALS)
+            scale = price_scale(decimals)
+            bids = [(to_ticks(price, scale), size) for price, size in raw_bids]
+            asks = [(to_ticks(price, scale), size) for price, size in raw_asks]
+
+            if is_snapshot:
+                # Повний стакан — замінює локальний цілком
+                book = local_books[mid] = OrderBook(decimals)
+                awaiting_snapshot.discard(mid)
+            else:
+                book = local_books.get(mid)
+                if mid in awaiting_snapshot: return
+                if book is None:
+                    resync_book(ws, mid)
                     return
 
-                if mid not in id_to_symbol: return
-
-                # Ініціалізація, якщо ще немає
-                if mid not in local_books:
-                    local_books[mid] = {'bids': {}, 'asks': {}}
-
-                ob_data = data.get('order_book', {})
-
-                # 🔥 ВИПРАВЛЕННЯ: Використовуємо СТРОКУ (string) як ключ, щоб уникнути float precision bug
-
-                # Обробка Bids
-                for b in ob_data.get('bids', []):
-                    price_str = str(b['price'])  # Ключ - рядок
-                    size = float(b['size'])
-
-                    if size == 0:
-                        local_books[mid]['bids'].pop(price_str, None)
-                    else:
-                        local_books[mid]['bids'][price_str] = size
-
-                # Обробка Asks
-                for a in ob_data.get('asks', []):
-                    price_str = str(a['price'])  # Ключ - рядок
-                    size = float(a['size'])
+                last_nonce, last_offset = book_seq.get(mid, (None, None))
+                if offset is not None and last_offset is not None and offset <= last_offset:
+                    return  # Повтор або старіша дельта
+                if begin_nonce is not None and last_nonce is not None and begin_nonce != last_nonce:
+                    resync_book(ws, mid)
+                    return
 
-                    if size == 0:
-                        local_books[mid]['asks'].pop(price_str, None)
-                    else:
-                        local_books[mid]['asks'][price_str] = size
+            book.apply_ticks(bids, asks)
+            book_seq[mid] = (nonce, offset)
+            # Публікація — заміна посилання на новий tuple (атомарно), читач ніколи не бачить півоновлення
+            top_of_book[mid] = book.top_record()
 
     except Exception as e:
         pass
@@ -251,18 +238,28 @@ def on_error(ws, error):
     print(f"\n{C.RED}⚠️ WSS Error: {error}{C.END}")
 
 
+def withdraw_quotes():
+    """
+    З'єднання немає — котирування ринків більше не публікуємо (інакше шина і SQLite віддають
+    мертві ціни зі свіжим last_updated). Стакани лишаються для resync, але до нового знімка
+    по кожному ринку запису в top_of_book не буде.
+    """
+    awaiting_snapshot.update(id_to_symbol.keys())
+    top_of_book.clear()
+
+
 def on_close(ws, close_status_code, close_msg):
+    withdraw_quotes()
     print(f"\n{C.YELLOW}🔌 WSS Closed. Reconnecting...{C.END}")
 
 
 def on_open(ws):
     print(f"{C.GREEN}✅ WSS Connected!{C.END}")
 
-    # 🔥 ВАЖЛИВО: Очищаємо локальні дані при кожному новому підключенні
-    # Це прибирає "зомбі-ордери", які висять з минулої сесії
-    with data_lock:
-        local_books.clear()
-        print(f"{C.YELLOW}🧹 Local cache cleared on connect.{C.END}")
+    # Стакани не очищаємо — свіжий знімок підписки замінить кожен цілком ("зомбі-ордери" минулої
+    # сесії його не переживуть). Але до знімка ринок не публікується: on_close міг не викликатись
+    # (виняток у run_forever), тож записи прибираємо і тут. on_open — потік WSS, як і зміни стаканів
+    withdraw_quotes()
 
     ws.send(json.dumps({"type": "subscribe", "channel": "market_stats/all"}))
 
@@ -279,11 +276,12 @@ def on_open(ws):
     threading.Thread(target=subscribe_books).start()
 
 
-def main():
-    global id_to_symbol
+def main(quote_bus_name=None, update_event=None):
+    global id_to_symbol, quote_bus
     print(f"\n{C.CYAN}🚀 LIGHTER WSS MONITOR (FIXED BIDS){C.END}")
 
     init_db()
+    quote_bus = attach_publisher(quote_bus_name, update_event)
 
     print(f"{C.BOLD}🔄 Fetching market map...{C.END}")
     id_to_symbol = get_market_map()
@@ -0,0 +1,176 @@
+import os
+import json
+import sqlite3
+import time
+from datetime import datetime
+
+from order_book import VWAP_COLUMNS
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🗄️ СПІЛЬНИЙ WRITER market_data ДЛЯ ВСІХ МОНІТОРІВ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Одне довге з'єднання на БД (відкривається ліниво в потоці, що пише),
+# налаштовані PRAGMA, і один executemany UPSERT на весь пакет замість
+# connect + execute на кожен токен. SQL-рядки сталі — sqlite3 кешує
+# скомпільовані statements на з'єднанні, тож кожен цикл їх не парсить заново.
+#
+# Режими:
+#   full — оновлює всі колонки (INSERT ... ON CONFLICT(token) DO UPDATE)
+#   fast — bid/ask/spread/funding/freq (+VWAP); oi_usd/volume_24h не чіпає,
+#          новий токен вставляється з oi_usd = volume_24h = 0 (як старий UPDATE + INSERT)
+#
+# write_changed() — для REST-моніторів, що щоцикла отримують весь список ринків:
+# у fast-режимі пишуться лише токени, у яких змінились ціни/funding/VWAP з минулого запису,
+# решті одним UPDATE ... WHERE token IN json_each(?) оновлюється last_updated (heartbeat),
+# щоб агрегатор і далі вважав їх свіжими.
+
+BASE_COLUMNS = ['token', 'bid', 'ask', 'spread_pct', 'funding_pct', 'freq_hours', 'oi_usd', 'volume_24h']
+FAST_COLUMNS = ['bid', 'ask', 'spread_pct', 'funding_pct', 'freq_hours']
+CHECKPOINT_INTERVAL_SEC = 60
+
+TOUCH_SQL = "UPDATE market_data SET last_updated = ? WHERE token IN (SELECT value FROM json_each(?))"
+
+PRAGMAS = [
+    'PRAGMA journal_mode=WAL;',
+    'PRAGMA synchronous=NORMAL;',  # У WAL безпечно: втрачається лише останній коміт при збої ОС
+    'PRAGMA temp_store=MEMORY;',
+    'PRAGMA cache_size=-8000;',  # ~8 MB
+    'PRAGMA busy_timeout=10000;',
+]
+
+MARKET_DATA_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS market_data (
+        token TEXT PRIMARY KEY,
+        bid REAL,
+        ask REAL,
+        spread_pct REAL,
+        funding_pct REAL,
+        freq_hours INTEGER,
+        oi_usd REAL,
+        volume_24h REAL,
+        last_updated TIMESTAMP
+    )
+'''
+
+
+def quote_row(row, with_vwap=False):
+    """Рядок-dict моніторів ('Token', 'Bid', ... 'Volume 24h ($)'[, 'Bid VWAP', 'Ask VWAP']) -> tuple для write()."""
+    values = (row['Token'], row['Bid'], row['Ask'], row['Spread %'], row['Funding %'], row['Freq (h)'],
+              row['OI ($)'], row['Volume 24h ($)'])
+    if with_vwap: values += tuple(row['Bid VWAP']) + tuple(row['Ask VWAP'])
+    return values
+
+
+class MarketDataWriter:
+    """
+    write(rows, full) приймає tuple у порядку BASE_COLUMNS (+ VWAP_COLUMNS, якщо with_vwap).
+    Помилка запису закриває з'єднання — наступний write відкриє нове.
+    """
+
+    def __init__(self, db_path, with_vwap=False):
+        self.db_path = db_path
+        self.with_vwap = with_vwap
+        self.conn = None
+        self.last_checkpoint = time.time()
+        self.last_rows = {}  # {token: поля fast-режиму} — останній записаний стан (write_changed)
+
+        columns = BASE_COLUMNS + (VWAP_COLUMNS if with_vwap else []) + ['last_updated']
+        placeholders = ', '.join('?' * len(columns))
+        self.full_sql = f'''
+            INSERT INTO market_data ({', '.join(columns)}) VALUES ({placeholders})
+            ON CONFLICT(token) DO UPDATE SET {', '.join(f'{c}=excluded.{c}' for c in columns[1:])}
+        '''
+        fast_update = FAST_COLUMNS + (VWAP_COLUMNS if with_vwap else []) + ['last_updated']
+        self.fast_sql = f'''
+            INSERT INTO market_data ({', '.join(columns)}) VALUES ({placeholders})
+            ON CONFLICT(token) DO UPDATE SET {', '.join(f'{c}=excluded.{c}' for c in fast_update)}
+        '''
+
+    def init_schema(self):
+        folder = os.path.dirname(self.db_path)
+        if not os.path.exists(folder):
+            try:
+                os.makedirs(folder)
+            except OSError:
+                pass
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL;')
+            conn.execute(MARKET_DATA_SCHEMA)
+            if self.with_vwap:
+                # VWAP-колонки (додаються і в уже існуючу таблицю)
+                existing = {row[1] for row in conn.execute("PRAGMA table_info(market_data)")}
+                for col in VWAP_COLUMNS:
+                    if col not in existing: conn.execute(f"ALTER TABLE market_data ADD COLUMN {col} REAL")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, timeout=10)
+            for pragma in PRAGMAS: self.conn.execute(pragma)
+        return self.conn
+
+    def _params(self, rows, full, ts):
+        if full: return self.full_sql, [tuple(row) + (ts,) for row in rows]
+        # oi_usd/volume_24h з пакета ігноруються: 0 — тільки для нових токенів
+        return self.fast_sql, [tuple(row[:6]) + (0, 0) + tuple(row[8:]) + (ts,) for row in rows]
+
+    def _execute(self, statements):
+        """[(sql, [params])] — одна транзакція; помилка закриває з'єднання."""
+        conn = self.connect()
+        try:
+            with conn:
+                for sql, params in statements:
+                    if params: conn.executemany(sql, params)
+            if time.time() - self.last_checkpoint >= CHECKPOINT_INTERVAL_SEC:
+                conn.execute('PRAGMA wal_checkpoint(PASSIVE);')
+                self.last_checkpoint = time.time()
+        except Exception:
+            self.close()
+            raise
+
+    def write(self, rows, full=True, ts=None):
+        """Один UPSERT-пакет. Повертає кількість рядків."""
+        if not rows: return 0
+        ts = ts or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        sql, params = self._params(rows, full, ts)
+        self._execute([(sql, params)])
+        return len(params)
+
+    def write_changed(self, rows, full=True, ts=None):
+        """
+        full — як write(). fast — лише змінені рядки + heartbeat решті в тій самій транзакції.
+        Повертає (записано, heartbeat).
+        """
+        if not rows: return 0, 0
+        ts = ts or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        last_rows = self.last_rows
+        fields = {row[0]: tuple(row[1:6]) + tuple(row[8:]) for row in rows}
+
+        if full:
+            changed, unchanged = rows, []
+        else:
+            changed = [row for row in rows if last_rows.get(row[0]) != fields[row[0]]]
+            unchanged = [row[0] for row in rows if last_rows.get(row[0]) == fields[row[0]]]
+
+        sql, params = self._params(changed, full, ts)
+        touch = [(ts, json.dumps(unchanged))] if unchanged else []
+        try:
+            self._execute([(sql, params), (TOUCH_SQL, touch)])
+        except Exception:
+            self.last_rows = {}  # Невідомо, що потрапило в БД — наступний цикл пише все
+            raise
+        for row in changed: last_rows[row[0]] = fields[row[0]]
+        return len(changed), len(unchanged)
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
@@ -0,0 +1,191 @@
+from bisect import bisect_left, insort
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📚 ЛОКАЛЬНИЙ СТАКАН (сортовані рівні у цілих тиках)
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Ціна зберігається як ціле число тиків: ticks = round(price * scale).
+# Ключі без float-похибок, порівняння — цілочисельні.
+#
+# Кожна сторона — відсортований список ключів + dict {ключ: size}.
+# Ключі впорядковані так, що КРАЩИЙ рівень завжди в кінці списку:
+#   bids: ключ = ticks   (найвищий bid — останній)
+#   asks: ключ = -ticks  (найнижчий ask — останній)
+# Тому best bid/ask — O(1), зняття кращого рівня (найчастіша подія) — pop() з кінця,
+# пошук позиції — bisect O(log n); вставка в середину — memmove, для сотень рівнів копійки.
+#
+# Стакан змінює лише потік WSS; назовні він віддає незмінні top_record() (copy-on-write),
+# тож потоку запису в БД не потрібен лок на стакани.
+#
+# VWAP для цільових notional ($) кешується на стороні стакану. Кеш скидається лише тоді,
+# коли оновлення зачіпає рівень не гірший за найглибший рівень, використаний для
+# найбільшого notional (vwap_floor). Зміни глибше в стакані VWAP не змінюють і кеш не чіпають.
+
+DEFAULT_PRICE_DECIMALS = 8
+VWAP_NOTIONALS = (1000, 10000, 50000)  # $ — зростаючий порядок
+
+
+def price_scale(decimals):
+    return 10 ** int(decimals)
+
+
+def vwap_label(notional):
+    """1000 -> '1k', 50000 -> '50k'."""
+    return f"{notional / 1000:g}k" if notional >= 1000 else str(notional)
+
+
+# Колонки market_data: bid_vwap_1k = середня ціна продажу $1k у біди, ask_vwap_1k — купівлі з асків
+VWAP_BID_COLUMNS = [f"bid_vwap_{vwap_label(n)}" for n in VWAP_NOTIONALS]
+VWAP_ASK_COLUMNS = [f"ask_vwap_{vwap_label(n)}" for n in VWAP_NOTIONALS]
+VWAP_COLUMNS = VWAP_BID_COLUMNS + VWAP_ASK_COLUMNS
+
+
+def decimals_from_tick_size(tick_size, default=DEFAULT_PRICE_DECIMALS):
+    """'0.010' -> 2; '1' -> 0. Невідомий/битий tickSize -> default."""
+    try:
+        text = str(tick_size)
+        if 'e' in text.lower(): text = f"{float(text):.{default}f}"
+        return len(text.split('.')[1].rstrip('0')) if '.' in text else 0
+    except:
+        return default
+
+
+def to_ticks(price, scale):
+    """'100.25' / 100.25 -> 10025 при scale=100."""
+    return int(round(float(price) * scale))
+
+
+class BookSide:
+    __slots__ = ('sign', 'keys', 'sizes', 'vwap_cache', 'vwap_floor')
+
+    def __init__(self, is_bid):
+        self.sign = 1 if is_bid else -1
+        self.keys = []
+        self.sizes = {}
+        self.vwap_cache = None  # (notionals, scale, (vwap або None, ...))
+        self.vwap_floor = float('-inf')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, ticks, size):
+        """size == 0 — видалити рівень, інакше — встановити."""
+        self.apply(((ticks, size),))
+
+    def apply(self, levels):
+        """Пакет [(ticks, size)] — один прохід з локальними змінними (гаряча функція on_message)."""
+        sign, keys, sizes, floor = self.sign, self.keys, self.sizes, self.vwap_floor
+        for ticks, size in levels:
+            key = ticks * sign
+            if key >= floor: self.vwap_cache = None
+            if size:
+                if key not in sizes:
+                    if not keys or key > keys[-1]:
+                        keys.append(key)
+                    else:
+                        insort(keys, key)
+                sizes[key] = size
+            elif key in sizes:
+                del sizes[key]
+                if keys[-1] == key:
+                    keys.pop()
+                else:
+                    del keys[bisect_left(keys, key)]
+
+    def best(self):
+        """(ticks, size) кращого рівня або None."""
+        if not self.keys: return None
+        key = self.keys[-1]
+        return key * self.sign, self.sizes[key]
+
+    def top(self, n):
+        """Перші n рівнів від кращого: [(ticks, size)]."""
+        sign, sizes = self.sign, self.sizes
+        return [(key * sign, sizes[key]) for key in reversed(self.keys[-n:])]
+
+    def vwaps(self, notionals, scale):
+        """
+        Середня ціна виконання на кожен notional ($) від кращого рівня вглиб; None — глибини не вистачає.
+        Один прохід до глибини найбільшого notional; повторний виклик без змін угорі — з кешу.
+        """
+        cache = self.vwap_cache
+        if cache is not None and cache[0] == notionals and cache[1] == scale: return cache[2]
+
+        sign, keys, sizes = self.sign, self.keys, self.sizes
+        result = []
+        cost = qty = price = 0.0
+        i = len(keys) - 1
+        for notional in notionals:
+            while cost < notional and i >= 0:
+                key = keys[i]
+                price = key * sign / scale
+                cost += price * sizes[key]
+                qty += sizes[key]
+                i -= 1
+            if cost < notional or price <= 0:
+                result.append(None)
+                continue
+            # Останній рівень взято частково: віднімаємо надлишок
+            result.append(notional / (qty - (cost - notional) / price))
+
+        # Якщо найбільший notional не заповнено — будь-яка зміна може вплинути на VWAP
+        self.vwap_floor = keys[i + 1] if result and result[-1] is not None else float('-inf')
+        result = tuple(result)  # Незмінний: той самий об'єкт віддається з кешу й у top_record()
+        self.vwap_cache = (notionals, scale, result)
+        return result
+
+    def clear(self):
+        self.keys.clear()
+        self.sizes.clear()
+        self.vwap_cache = None
+        self.vwap_floor = float('-inf')
+
+
+class OrderBook:
+    """Стакан одного ринку. Всі ціни назовні — float, всередині — тики."""
+    __slots__ = ('scale', 'bids', 'asks')
+
+    def __init__(self, decimals=DEFAULT_PRICE_DECIMALS):
+        self.scale = price_scale(decimals)
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+
+    def update_bid(self, price, size):
+        self.bids.update(to_ticks(price, self.scale), size)
+
+    def update_ask(self, price, size):
+        self.asks.update(to_ticks(price, self.scale), size)
+
+    def apply_ticks(self, bids, asks):
+        """Пакет вже сконвертованих рівнів [(ticks, size)] — для виклику під локом."""
+        self.bids.apply(bids)
+        self.asks.apply(asks)
+
+    def best_bid(self):
+        best = self.bids.best()
+        return best[0] / self.scale if best else 0.0
+
+    def best_ask(self):
+        best = self.asks.best()
+        return best[0] / self.scale if best else 0.0
+
+    def vwaps(self, notionals=VWAP_NOTIONALS):
+        """([bid_vwap], [ask_vwap]) для кожного notional — ціни продажу в біди / купівлі з асків."""
+        return self.bids.vwaps(notionals, self.scale), self.asks.vwaps(notionals, self.scale)
+
+    def top_record(self, notionals=VWAP_NOTIONALS):
+        """
+        Незмінний знімок верху стакану: (best_bid, best_ask, bid_vwaps, ask_vwaps).
+        Потік WSS публікує його після кожного оновлення — читачі беруть готовий tuple без локу.
+        """
+        return (self.best_bid(), self.best_ask()) + self.vwaps(notionals)
+
+    def top(self, n):
+        """([(bid_price, size)], [(ask_price, size)]) — n кращих рівнів кожної сторони."""
+        scale = self.scale
+        return ([(t / scale, s) for t, s in self.bids.top(n)],
+                [(t / scale, s) for t, s in self.asks.top(n)])
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
@@ -1,16 +1,23 @@
-import requests
+import websocket
 import pandas as pd
+import json
 import time
-import sqlite3
 import os
+import threading
 import concurrent.futures
 from datetime import datetime
 
+from quote_bus import attach_publisher
+from http_client import HttpClient, AsyncHttpClient, aiohttp
+import fast_json
+from market_db import MarketDataWriter, quote_row
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ⚙️ КОНФІГУРАЦІЯ
 # ═══════════════════════════════════════════════════════════════════════════
 
 API_BASE = "https://api.prod.paradex.trade/v1"
+WS_URL = "wss://ws.api.prod.paradex.trade/v1"
 
 # --- ШЛЯХИ ДО БАЗИ ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -18,17 +25,51 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DB_FOLDER = os.path.join(PROJECT_ROOT, 'Database')
 DB_NAME = 'paradex_database.db'
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
+db_writer = MarketDataWriter(DB_PATH)  # Одне з'єднання на весь час роботи
 
 # --- ТАЙМЕРИ ---
 UPDATE_INTERVAL_FAST = 15  # Інтервал синхронізації
 UPDATE_INTERVAL_SLOW = 3600
 
+# 🚌 Shared-memory шина котирувань (підключається з main.py)
+quote_bus = None
+
+# --- WEBSOCKET ---
+STREAM_MODE = True  # bbo + funding_data по WSS; REST — лише bulk-оновлення OI/Volume раз на STATS_REFRESH_INTERVAL
+STATS_REFRESH_INTERVAL = 300
+SEEDED_QUOTE_TTL_SEC = 60  # REST-ціна пари без жодного bbo публікується не довше (як MAX_DATA_DELAY_SEC агрегатора)
+BUS_PUBLISH_INTERVAL = 1  # Шина — раз на секунду, SQLite — раз на UPDATE_INTERVAL_FAST
+SUBSCRIBE_BATCH = 50  # Підписок підряд до короткої паузи
+
+# --- ЗАВАНТАЖЕННЯ ---
+BULK_FETCH = True  # Один запит /markets/summary?market=ALL замість запиту на кожен символ
+FETCH_WORKERS = 20  # Пул для запитів по одному символу (fallback / BULK_FETCH = False)
+HTTP_RATE_PER_SEC = 20  # Бюджет запитів до API (token bucket; при 429 зменшується автоматично)
+ASYNC_FETCH = True  # По одному символу — через asyncio/aiohttp (якщо встановлений), інакше пул потоків
+ASYNC_CONCURRENCY = 50  # Семафор: одночасних запитів в asyncio-режимі
+REQUEST_DEADLINE_SEC = 10  # Ліміт на одну спробу запиту в asyncio-режимі
+STREAM_BATCH_SIZE = 50  # Рядків у пакеті, що йде в save_to_db, не чекаючи решти символів
+
 HEADERS = {
     'Accept': 'application/json',
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
 
+# Постійні HTTP-клієнт (keep-alive, без нового TCP/TLS на кожен запит) та пул потоків
+http = HttpClient('Paradex', headers=HEADERS, rate_per_sec=HTTP_RATE_PER_SEC, burst=2 * HTTP_RATE_PER_SEC,
+                  pool_size=FETCH_WORKERS)
+executor = None
+async_http = None  # AsyncHttpClient — створюється при першому asyncio-циклі
+
+# --- СТАН WSS-РЕЖИМУ ---
+ws_quotes = {}  # {symbol: (bid, ask)} — з каналу bbo
+seeded_quotes = {}  # {symbol: epoch} — ціна в ws_quotes з REST, bbo по парі ще не приходив
+market_stats = {}  # {symbol: {'funding', 'oi_usd', 'vol'}} — funding з WSS, OI/Volume з REST
+ws_symbols = []
+data_lock = threading.Lock()
+
+
 class C:
     CYAN = '\033[96m'
     GREEN = '\033[92m'
@@ -64,99 +105,25 @@ def wait_for_next_cycle(interval=15):
 # ═══════════════════════════════════════════════════════════════════════════
 
 def init_db():
-    if not os.path.exists(DB_FOLDER):
-        try:
-            os.makedirs(DB_FOLDER)
-        except OSError:
-            pass
-
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute('PRAGMA journal_mode=WAL;')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS market_data (
-            token TEXT PRIMARY KEY,
-            bid REAL,
-            ask REAL,
-            spread_pct REAL,
-            funding_pct REAL,
-            freq_hours INTEGER,
-            oi_usd REAL,
-            volume_24h REAL,
-            last_updated TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    db_writer.init_schema()
     print(f"{C.GREEN}✅ DB Connected: {DB_PATH}{C.END}")
 
 
 def save_to_db(data_list, is_full_update):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
+    # full — всі колонки; fast — без OI/Volume (їх оновлює повний цикл раз на UPDATE_INTERVAL_SLOW)
     try:
-        if is_full_update:
-            for row in data_list:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO market_data 
-                    (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row['Token'], row['Bid'], row['Ask'], row['Spread %'],
-                    row['Funding %'], row['Freq (h)'], row['OI ($)'],
-                    row['Volume 24h ($)'], timestamp
-                ))
-        else:
-            for row in data_list:
-                cursor.execute('''
-                    UPDATE market_data 
-                    SET bid=?, ask=?, spread_pct=?, funding_pct=?, freq_hours=?, last_updated=?
-                    WHERE token=?
-                ''', (
-                    row['Bid'], row['Ask'], row['Spread %'],
-                    row['Funding %'], row['Freq (h)'], timestamp, row['Token']
-                ))
-                if cursor.rowcount == 0:
-                    cursor.execute('''
-                        INSERT INTO market_data 
-                        (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?, 0, 0, ?)
-                    ''', (
-                        row['Token'], row['Bid'], row['Ask'], row['Spread %'],
-                        row['Funding %'], row['Freq (h)'], timestamp
-                    ))
-        conn.commit()
+        db_writer.write([quote_row(row) for row in data_list], full=is_full_update)
     except Exception as e:
         print(f"{C.RED}❌ DB Error: {e}{C.END}")
-    finally:
-        conn.close()
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 📡 API ФУНКЦІЇ
 # ═══════════════════════════════════════════════════════════════════════════
 
-def get_json(url, params=None, retries=3):
-    """Виконує GET запит з обробкою помилок"""
-    for i in range(retries):
-        try:
-            response = requests.get(url, params=params, headers=HEADERS, timeout=10)
-
-            # Якщо Paradex повертає 429 (Rate Limit), чекаємо
-            if response.status_code == 429:
-                time.sleep(1 + i)
-                continue
-
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            if i == retries - 1:
-                return None
-            time.sleep(0.5)
-    return None
+def get_json(url, params=None):
+    """GET через спільний клієнт: keep-alive, token bucket, backoff з jitter на 429/5xx"""
+    return http.get_json(url, params=params)
 
 
 def get_markets_meta():
@@ -175,18 +142,9 @@ def get_markets_meta():
     return meta_map
 
 
-def fetch_pair_summary(symbol, freq):
-    """
-    Отримує дані для ОДНІЄЇ пари.
-    """
-    data = get_json(f"{API_BASE}/markets/summary", params={'market': symbol})
-
-    if not data or 'results' not in data or not data['results']:
-        return None
-
+def parse_summary(item, freq):
+    """Один елемент results з /markets/summary -> рядок монітора."""
     try:
-        item = data['results'][0]
-
         bid = float(item.get('bid', 0))
         ask = float(item.get('ask', 0))
         mark_price = float(item.get('mark_price', 0))
@@ -203,7 +161,7 @@ def fetch_pair_summary(symbol, freq):
             spread = ((ask - bid) / bid) * 100
 
         return {
-            'Token': symbol.replace('-USD-PERP', ''),
+            'Token': item['symbol'].replace('-USD-PERP', ''),
             'Bid': bid,
             'Ask': ask,
             'Spread %': spread,
@@ -216,14 +174,297 @@ def fetch_pair_summary(symbol, freq):
         return None
 
 
+def fetch_pair_summary(symbol, freq):
+    """
+    Отримує дані для ОДНІЄЇ пари.
+    """
+    data = get_json(f"{API_BASE}/markets/summary", params={'market': symbol})
+
+    if not data or 'results' not in data or not data['results']:
+        return None
+
+    item = dict(data['results'][0])
+    item.setdefault('symbol', symbol)
+    return parse_summary(item, freq)
+
+
+def fetch_all_summaries(freq_map):
+    """Всі PERP пари одним запитом: {symbol: рядок}. Порожній dict, якщо bulk-запит не вдався."""
+    data = get_json(f"{API_BASE}/markets/summary", params={'market': 'ALL'})
+    rows = {}
+    if not data: return rows
+    for item in data.get('results', []):
+        symbol = item.get('symbol')
+        if symbol not in freq_map: continue
+        row = parse_summary(item, freq_map[symbol])
+        if row: rows[symbol] = row
+    return rows
+
+
+def fetch_per_symbol(symbols, freq_map, progress=False):
+    """Запит на кожен символ у постійному пулі потоків; пакети по STREAM_BATCH_SIZE у порядку завершення."""
+    global executor
+    if executor is None:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='paradex')
+
+    batch = []
+    futures = [executor.submit(fetch_pair_summary, sym, freq_map[sym]) for sym in symbols]
+    for completed, future in enumerate(concurrent.futures.as_completed(futures), 1):
+        data = future.result()
+        if data: batch.append(data)
+        # Прогрес бар тільки для першого запуску
+        if progress:
+            print(f"\r⏳ Progress: {completed}/{len(symbols)}", end="", flush=True)
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch: yield batch
+
+
+async def fetch_pair_summary_async(client, item):
+    symbol, freq = item
+    data = await client.get_json(f"{API_BASE}/markets/summary", params={'market': symbol})
+    if not data or 'results' not in data or not data['results']:
+        return None
+    summary = dict(data['results'][0])
+    summary.setdefault('symbol', symbol)
+    return parse_summary(summary, freq)
+
+
+def fetch_per_symbol_async(symbols, freq_map, progress=False):
+    """
+    Те саме на asyncio: до ASYNC_CONCURRENCY запитів одночасно в одному потоці event loop,
+    без пулу потоків. Пакети віддаються в міру готовності — повільні символи не тримають запис.
+    """
+    global async_http
+    if async_http is None:
+        async_http = AsyncHttpClient(http, concurrency=ASYNC_CONCURRENCY, deadline=REQUEST_DEADLINE_SEC)
+
+    done = 0
+    for batch in async_http.stream(fetch_pair_summary_async, [(sym, freq_map[sym]) for sym in symbols],
+                                   batch_size=STREAM_BATCH_SIZE):
+        done += len(batch)
+        if progress:
+            print(f"\r⏳ Progress: {done}/{len(symbols)}", end="", flush=True)
+        yield batch
+
+
+def fetch_cycle_stream(symbols, freq_map, progress=False):
+    """
+    Дані всіх символів за цикл пакетами: спочатку bulk-запит, далі по одному — тільки символи,
+    яких у bulk-відповіді не виявилось (або всі, якщо bulk вимкнено/не вдався).
+    """
+    bulk = fetch_all_summaries(freq_map) if BULK_FETCH else {}
+    if bulk: yield list(bulk.values())
+    missing = [sym for sym in symbols if sym not in bulk]
+    if not missing: return
+    fetch = fetch_per_symbol_async if ASYNC_FETCH and aiohttp is not None else fetch_per_symbol
+    yield from fetch(missing, freq_map, progress)
+
+
+def fetch_cycle(symbols, freq_map, progress=False):
+    """Весь цикл одним списком."""
+    return [row for batch in fetch_cycle_stream(symbols, freq_map, progress) for row in batch]
+
+
+def shutdown():
+    """Закриває пул потоків, event loop та HTTP-сесії (для виходу та бенчмарків)."""
+    global executor, async_http
+    if executor is not None:
+        executor.shutdown(wait=False)
+        executor = None
+    if async_http is not None:
+        async_http.close()
+        async_http = None
+    http.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🌐 WEBSOCKET РЕЖИМ
+# ═══════════════════════════════════════════════════════════════════════════
+
+def build_row(symbol, bid, ask, stats, freq):
+    """Рядок монітора в тому ж форматі, що й parse_summary."""
+    spread = ((ask - bid) / bid) * 100 if bid > 0 else 0.0
+    return {
+        'Token': symbol.replace('-USD-PERP', ''),
+        'Bid': bid,
+        'Ask': ask,
+        'Spread %': spread,
+        'Funding %': stats.get('funding', 0.0),
+        'Freq (h)': freq,
+        'OI ($)': stats.get('oi_usd', 0.0),
+        'Volume 24h ($)': stats.get('vol', 0.0)
+    }
+
+
+def refresh_stats(freq_map):
+    """
+    Один bulk-запит: OI/Volume для всіх пар. Funding і ціни з REST беремо лише для пар,
+    по яких з WSS ще нічого не прийшло (старт / щойно після реконекту / тихий ринок без bbo).
+    REST-ціна живе SEEDED_QUOTE_TTL_SEC, далі пара не публікується до bbo або наступного оновлення.
+    """
+    rows = fetch_all_summaries(freq_map)
+    now = time.time()
+    with data_lock:
+        for symbol, row in rows.items():
+            stats = market_stats.setdefault(symbol, {})
+            stats['oi_usd'] = row['OI ($)']
+            stats['vol'] = row['Volume 24h ($)']
+            stats.setdefault('funding', row['Funding %'])
+            if (symbol not in ws_quotes or symbol in seeded_quotes) and row['Bid'] > 0 and row['Ask'] > 0:
+                ws_quotes[symbol] = (row['Bid'], row['Ask'])
+                seeded_quotes[symbol] = now
+    return len(rows)
+
+
+def stats_refresh_loop(freq_map):
+    while True:
+        time.sleep(STATS_REFRESH_INTERVAL)
+        try:
+            refresh_stats(freq_map)
+            http.report()
+        except Exception as e:
+            print(f"{C.RED}❌ Stats Refresh Error: {e}{C.END}")
+
+
+def update_db_loop(freq_map):
+    time.sleep(2)
+    next_db_write = 0
+
+    while True:
+        wait_for_next_cycle(BUS_PUBLISH_INTERVAL if quote_bus else UPDATE_INTERVAL_FAST)
+
+        try:
+            with data_lock:
+                # Прострочені REST-ціни прибираємо: без bbo ми не знаємо, чи вони ще актуальні
+                expired = [symbol for symbol, seeded in seeded_quotes.items()
+                           if time.time() - seeded > SEEDED_QUOTE_TTL_SEC]
+                for symbol in expired:
+                    ws_quotes.pop(symbol, None)
+                    del seeded_quotes[symbol]
+                live = [(symbol, bid, ask) for symbol, (bid, ask) in ws_quotes.items() if bid > 0 and ask > 0]
+                data_to_save = [build_row(symbol, bid, ask, market_stats.get(symbol, {}), freq_map.get(symbol, 1))
+                                for symbol, bid, ask in live]
+                # Час джерела для шини: REST-ціна — момент запиту, bbo — момент публікації (None)
+                updated = [seeded_quotes.get(symbol) for symbol, _, _ in live]
+
+            if data_to_save and quote_bus:
+                quote_bus.publish([(r['Token'], r['Bid'], r['Ask'], r['Funding %'], r['Freq (h)'], r['OI ($)'],
+                                    r['Volume 24h ($)'], None, None, ts) for r, ts in zip(data_to_save, updated)])
+
+            if time.time() < next_db_write: continue
+            next_db_write = (int(time.time()) // UPDATE_INTERVAL_FAST + 1) * UPDATE_INTERVAL_FAST
+
+            if data_to_save:
+                ts = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                db_writer.write([quote_row(r) for r in data_to_save], ts=ts)
+                print(f"{C.CYAN}[{ts.split()[1]}] Paradex (WSS): оновив {len(data_to_save)} токенів.{C.END}")
+
+        except Exception as e:
+            print(f"{C.RED}❌ DB Loop Error: {e}{C.END}")
+            time.sleep(1)
+
+
+def on_message(ws, message):
+    try:
+        msg = fast_json.decode_paradex(message)
+        if msg is None: return
+        kind, symbol, values = msg
+
+        if kind == 'bbo':
+            with data_lock:
+                ws_quotes[symbol] = values
+                seeded_quotes.pop(symbol, None)
+
+        elif kind == 'funding_data':
+            if values is None: return
+            with data_lock:
+                market_stats.setdefault(symbol, {})['funding'] = values * 100
+
+    except Exception:
+        pass
+
+
+def on_error(ws, error):
+    if str(error):
+        print(f"\n{C.RED}⚠️ WSS Error: {error}{C.END}")
+
+
+def withdraw_quotes():
+    """
+    Прибирає котирування WSS: без з'єднання bbo не оновлюються, і заморожена ціна публікувалась би
+    як свіжа. До першого bbo пари в шину потрапляє лише ціна з REST-циклу (з TTL посіву).
+    """
+    with data_lock:
+        ws_quotes.clear()
+        seeded_quotes.clear()
+
+
+def on_close(ws, close_status_code, close_msg):
+    withdraw_quotes()
+    print(f"\n{C.YELLOW}🔌 WSS Closed. Reconnecting in 3s...{C.END}")
+    time.sleep(3)
+
+
+def on_open(ws):
+    print(f"{C.GREEN}✅ WSS Connected! Subscribing...{C.END}")
+
+    # on_close міг не викликатись (виняток у run_forever) — котирування минулої сесії прибираємо і тут
+    withdraw_quotes()
+
+    def subscribe():
+        channels = [f"{kind}.{sym}" for sym in ws_symbols for kind in ('bbo', 'funding_data')]
+        for i, channel in enumerate(channels, 1):
+            try:
+                ws.send(json.dumps({"jsonrpc": "2.0", "method": "subscribe", "params": {"channel": channel}, "id": i}))
+            except:
+                return
+            if i % SUBSCRIBE_BATCH == 0: time.sleep(0.2)
+        print(f"{C.GREEN}✅ Subscribed: {len(channels)} channels.{C.END}")
+
+    threading.Thread(target=subscribe, daemon=True).start()
+
+
+def run_stream(symbols, freq_map):
+    """WSS-режим: bbo + funding_data для всіх PERP, REST — тільки bulk-оновлення OI/Volume."""
+    global ws_symbols
+    ws_symbols = symbols
+
+    print(f"{C.BOLD}🔄 Loading OI/Volume snapshot...{C.END}")
+    print(f"{C.GREEN}✅ Snapshot: {refresh_stats(freq_map)} pairs.{C.END}")
+
+    threading.Thread(target=update_db_loop, args=(freq_map,), daemon=True).start()
+    threading.Thread(target=stats_refresh_loop, args=(freq_map,), daemon=True).start()
+
+    while True:
+        try:
+            ws = websocket.WebSocketApp(
+                WS_URL,
+                on_open=on_open,
+                on_message=on_message,
+                on_error=on_error,
+                on_close=on_close
+            )
+            ws.run_forever(ping_interval=25, ping_timeout=20)
+        except KeyboardInterrupt:
+            print(f"\n{C.RED}🛑 Stopped{C.END}")
+            shutdown()
+            break
+        except Exception:
+            time.sleep(5)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # 🚀 MAIN LOOP
 # ═══════════════════════════════════════════════════════════════════════════
 
-def main():
+def main(quote_bus_name=None, update_event=None):
+    global quote_bus
     print(f"\n{C.CYAN}🚀 PARADEX MONITOR STARTED (SYNCED){C.END}")
 
     init_db()
+    quote_bus = attach_publisher(quote_bus_name, update_event)
 
     print(f"{C.BOLD}🔄 Loading Metadata...{C.END}")
     freq_map = get_markets_meta()
@@ -234,12 +475,16 @@ def main():
 
     print(f"{C.GREEN}✅ Loaded {len(freq_map)} PERP pairs.{C.END}")
 
-    last_slow_update = 0
-    first_run = True
-
     # Список символів для сканування
     symbols = list(freq_map.keys())
 
+    if STREAM_MODE:
+        run_stream(symbols, freq_map)
+        return
+
+    last_slow_update = 0
+    first_run = True
+
     while True:
         # 🔥 1. СИНХРОНІЗАЦІЯ: Чекаємо старту циклу
         wait_for_next_cycle(UPDATE_INTERVAL_FAST)
@@ -249,36 +494,25 @@ def main():
             is_full_update = (current_time - last_slow_update) >= UPDATE_INTERVAL_SLOW
 
             if first_run:
-                print(f"{C.BOLD}🔄 Fetching live data (Threads)...{C.END}")
+                print(f"{C.BOLD}🔄 Fetching live data ({'asyncio' if ASYNC_FETCH and aiohttp is not None else 'threads'})...{C.END}")
 
+            # 🔥 2-3. ОТРИМАННЯ ДАНИХ І ЗБЕРЕЖЕННЯ
+            # Bulk-запит + по одному символу лише для відсутніх у ньому; кожен готовий пакет
+            # одразу пишеться в БД, не чекаючи найповільніших символів
             results = []
-
-            # 🔥 2. ОТРИМАННЯ ДАНИХ (Починається синхронно)
-            # Багатопотоковий запуск (20 потоків)
-            with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-                future_to_symbol = {
-                    executor.submit(fetch_pair_summary, sym, freq_map[sym]): sym
-                    for sym in symbols
-                }
-
-                completed = 0
-                for future in concurrent.futures.as_completed(future_to_symbol):
-                    data = future.result()
-                    if data:
-                        results.append(data)
-
-                    completed += 1
-                    # Прогрес бар тільки для першого запуску
-                    if first_run:
-                        print(f"\r⏳ Progress: {completed}/{len(symbols)}", end="", flush=True)
+            for batch in fetch_cycle_stream(symbols, freq_map, progress=first_run):
+                save_to_db(batch, is_full_update)
+                results.extend(batch)
 
             if not results:
                 print(f"\n{C.RED}⚠️ No data fetched. API might be blocking or down.{C.END}")
                 # Якщо API лежить, чекаємо наступного циклу, не спимо вручну
                 continue
 
-            # 🔥 3. ЗБЕРЕЖЕННЯ
-            save_to_db(results, is_full_update)
+            # Шина — тільки повним знімком біржі
+            if quote_bus:
+                quote_bus.publish([(r['Token'], r['Bid'], r['Ask'], r['Funding %'], r['Freq (h)'], r['OI ($)'],
+                                    r['Volume 24h ($)']) for r in results])
 
             if is_full_update:
                 last_slow_update = time.time()
@@ -291,11 +525,13 @@ def main():
                 first_run = False
             else:
                 print(f"{C.CYAN}[{ts}] Paradex: оновив {len(results)} токенів.{C.END}")
+            http.report()
 
             # time.sleep більше не потрібен
 
         except KeyboardInterrupt:
             print(f"\n{C.RED}🛑 Stopped{C.END}")
+            shutdown()
             break
         except Exception as e:
             print(f"\n{C.RED}❌ Error: {e}{C.END}")
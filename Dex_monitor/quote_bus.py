@@ -0,0 +1,161 @@
+import os
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+from order_book import VWAP_NOTIONALS
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚌 SHARED-MEMORY QUOTE BUS (монітори -> агрегатор без SQLite)
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Один сегмент shared memory на біржу. Фіксований layout:
+#   [HEADER: seq u8, count u4, published f8] [QUOTES: MAX_TOKENS x QUOTE_DTYPE]
+#
+# Seqlock: один writer (процес монітора) робить seq непарним, пише весь масив,
+# потім робить seq парним. Reader копіює масив і перевіряє, що seq не змінився
+# і був парним — інакше повторює. Блокувань між процесами немає.
+#
+# Після кожної публікації writer може "смикнути" спільний multiprocessing.Event —
+# агрегатор прокидається одразу, а не чекає свого таймера.
+
+MAX_TOKENS = 2048
+TOKEN_BYTES = 32
+SNAPSHOT_RETRIES = 100
+
+HEADER_DTYPE = np.dtype([('seq', '<u8'), ('count', '<u4'), ('published', '<f8')])
+QUOTES_OFFSET = 64  # Заголовок в окремій cache line
+
+QUOTE_DTYPE = np.dtype([
+    ('token', f'S{TOKEN_BYTES}'),
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('funding_pct', '<f8'),
+    ('freq_hours', '<i4'),
+    ('oi_usd', '<f8'),
+    ('volume_24h', '<f8'),
+    ('last_updated', '<f8'),  # epoch seconds
+    # VWAP для order_book.VWAP_NOTIONALS; NaN — біржа не дає глибини або її не вистачає
+    ('bid_vwap', '<f8', (len(VWAP_NOTIONALS),)),
+    ('ask_vwap', '<f8', (len(VWAP_NOTIONALS),)),
+])
+
+NO_VWAP = (float('nan'),) * len(VWAP_NOTIONALS)
+
+SEGMENT_SIZE = QUOTES_OFFSET + MAX_TOKENS * QUOTE_DTYPE.itemsize
+
+
+def vwap_fields(row):
+    if len(row) < 9 or row[7] is None: return NO_VWAP, NO_VWAP
+    return (tuple(float('nan') if v is None else v for v in row[7]),
+            tuple(float('nan') if v is None else v for v in row[8]))
+
+
+def segment_name(exchange):
+    return f"dex_quotes_{exchange.lower()}_{os.getpid()}"
+
+
+class QuoteBus:
+    """Сегмент однієї біржі. create() — у main.py, attach() — у моніторі та агрегаторі."""
+
+    def __init__(self, shm, owner, notify=None):
+        self.shm = shm
+        self.owner = owner
+        self.notify = notify
+        self.header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf, offset=0)
+        self.quotes = np.ndarray((MAX_TOKENS,), dtype=QUOTE_DTYPE, buffer=shm.buf, offset=QUOTES_OFFSET)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def create(cls, exchange):
+        shm = shared_memory.SharedMemory(name=segment_name(exchange), create=True, size=SEGMENT_SIZE)
+        shm.buf[:QUOTES_OFFSET] = bytes(QUOTES_OFFSET)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name, notify=None):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: дочірні процеси main.py ділять його resource_tracker,
+            # тож повторна реєстрація сегмента нічого не змінює
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False, notify=notify)
+
+    # ─── Writer ───────────────────────────────────────────────────────────
+
+    def publish(self, rows, ts=None):
+        """
+        rows: [(token, bid, ask, funding_pct, freq_hours, oi_usd, volume_24h[, bid_vwaps, ask_vwaps[, updated]])] —
+        повний знімок біржі. bid_vwaps/ask_vwaps — по значенню (або None) на кожен VWAP_NOTIONALS.
+        updated — epoch, коли котирування востаннє оновилось у джерелі (None — момент публікації ts):
+        агрегатор відкидає застарілі рядки поштучно, а не по часу публікації всього знімка.
+        """
+        rows = rows[:MAX_TOKENS]
+        ts = time.time() if ts is None else ts
+        batch = np.array([(str(r[0]).encode('utf-8')[:TOKEN_BYTES],) + tuple(r[1:7]) +
+                          (r[9] if len(r) > 9 and r[9] is not None else ts,) + vwap_fields(r)
+                          for r in rows], dtype=QUOTE_DTYPE)
+
+        # Непарний seq — "пишу". Лічильник нормалізуємо від поточного значення: якщо попередній writer
+        # помер між двома записами і лишив seq непарним, парність не інвертується назавжди.
+        start = int(self.header['seq'][0]) | 1
+        self.header['seq'][0] = start
+        self.quotes[:len(batch)] = batch
+        self.header['count'][0] = len(batch)
+        self.header['published'][0] = time.time()
+        self.header['seq'][0] = start + 1
+
+        if self.notify is not None: self.notify.set()
+
+    # ─── Reader ───────────────────────────────────────────────────────────
+
+    def version(self):
+        return int(self.header['seq'][0])
+
+    def published(self):
+        """Epoch останньої публікації (для вимірювання затримки quote -> route)."""
+        return float(self.header['published'][0])
+
+    def snapshot(self):
+        """Повертає (seq, копія масиву котирувань) або (seq, None), якщо узгодженої копії не вийшло."""
+        for _ in range(SNAPSHOT_RETRIES):
+            seq_before = int(self.header['seq'][0])
+            if seq_before & 1:
+                time.sleep(0)
+                continue
+            count = int(self.header['count'][0])
+            data = self.quotes[:count].copy()
+            if int(self.header['seq'][0]) == seq_before:
+                return seq_before, data
+        return self.version(), None
+
+    def close(self):
+        # numpy-представлення тримають буфер — спочатку відпускаємо їх
+        self.header = self.quotes = None
+        try:
+            self.shm.close()
+            if self.owner: self.shm.unlink()
+        except Exception:
+            pass
+
+
+def create_bus(exchanges):
+    """{exchange: QuoteBus} — викликається один раз у головному процесі."""
+    return {ex: QuoteBus.create(ex) for ex in exchanges}
+
+
+def attach_publisher(name, notify=None):
+    """
+    Для моніторів: підключення до сегмента за ім'ям або None, якщо шина вимкнена.
+    notify — спільний multiprocessing.Event агрегатора (сигнал "є нові дані").
+    """
+    if not name: return None
+    try:
+        return QuoteBus.attach(name, notify)
+    except Exception as e:
+        print(f"⚠️ Quote bus unavailable ({name}): {e}")
+        return None
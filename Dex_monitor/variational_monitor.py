@@ -1,10 +1,13 @@
-import requests
 import pandas as pd
 import time
-import sqlite3
 import os
 from datetime import datetime
 
+from quote_bus import attach_publisher
+from market_db import MarketDataWriter, quote_row
+from http_client import HttpClient, NOT_MODIFIED
+from order_book import VWAP_NOTIONALS
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ⚙️ КОНФІГУРАЦІЯ
 # ═══════════════════════════════════════════════════════════════════════════
@@ -17,14 +20,26 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DB_FOLDER = os.path.join(PROJECT_ROOT, 'Database')
 DB_NAME = 'variational_database.db'
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
+db_writer = MarketDataWriter(DB_PATH, with_vwap=True)  # Одне з'єднання на весь час роботи
 
 UPDATE_INTERVAL_FAST = 15
 UPDATE_INTERVAL_SLOW = 3600
 
+# Variational сам котирує ціни лише для фіксованих notional: quotes.size_1k / quotes.size_100k.
+# Notional з VWAP_NOTIONALS без свого котирування (10k, 50k) лишаються None — не вгадуємо їх.
+QUOTE_SIZE_KEYS = {1000: 'size_1k'}
+
+# 🚌 Shared-memory шина котирувань (підключається з main.py)
+quote_bus = None
+
+last_results = []  # Рядки останньої розпарсеної відповіді (для NOT_MODIFIED)
+
 HEADERS = {
     'Accept': 'application/json',
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
 }
+HTTP_RATE_PER_SEC = 5
+http = HttpClient('Variational', headers=HEADERS, rate_per_sec=HTTP_RATE_PER_SEC)
 
 class C:
     CYAN = '\033[96m'
@@ -54,102 +69,53 @@ def wait_for_next_cycle(interval=15):
 # ═══════════════════════════════════════════════════════════════════════════
 
 def init_db():
-    if not os.path.exists(DB_FOLDER):
-        try: os.makedirs(DB_FOLDER)
-        except: pass
-
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute('PRAGMA journal_mode=WAL;')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS market_data (
-            token TEXT PRIMARY KEY,
-            bid REAL,
-            ask REAL,
-            spread_pct REAL,
-            funding_pct REAL,
-            freq_hours INTEGER,
-            oi_usd REAL,
-            volume_24h REAL,
-            last_updated TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    db_writer.init_schema()
     print(f"{C.GREEN}✅ DB Connected: {DB_PATH}{C.END}")
 
-def save_to_db(data_list, is_full_update):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
+def save_to_db(data_list, is_full_update):
+    """
+    full — всі колонки; fast — без OI/Volume (їх оновлює повний цикл раз на UPDATE_INTERVAL_SLOW).
+    У fast-режимі пишуться лише змінені токени, решті — heartbeat last_updated. Повертає (записано, heartbeat).
+    """
     try:
-        if is_full_update:
-            for row in data_list:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO market_data 
-                    (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row['Token'], row['Bid'], row['Ask'], row['Spread %'],
-                    row['Funding %'], row['Freq (h)'], row['OI ($)'],
-                    row['Volume 24h ($)'], timestamp
-                ))
-        else:
-            for row in data_list:
-                cursor.execute('''
-                    UPDATE market_data 
-                    SET bid=?, ask=?, spread_pct=?, funding_pct=?, freq_hours=?, last_updated=?
-                    WHERE token=?
-                ''', (
-                    row['Bid'], row['Ask'], row['Spread %'],
-                    row['Funding %'], row['Freq (h)'], timestamp, row['Token']
-                ))
-                if cursor.rowcount == 0:
-                    cursor.execute('''
-                        INSERT INTO market_data 
-                        (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?, 0, 0, ?)
-                    ''', (
-                        row['Token'], row['Bid'], row['Ask'], row['Spread %'],
-                        row['Funding %'], row['Freq (h)'], timestamp
-                    ))
-        conn.commit()
+        return db_writer.write_changed([quote_row(row, with_vwap=True) for row in data_list], full=is_full_update)
     except Exception as e:
         print(f"{C.RED}❌ DB Error: {e}{C.END}")
-    finally:
-        conn.close()
+        return 0, 0
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 📡 API ФУНКЦІЇ
 # ═══════════════════════════════════════════════════════════════════════════
 
-def get_json(url, retries=3):
-    for i in range(retries):
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=20)
-            if response.status_code != 200:
-                print(f"{C.RED}⚠️ API Status: {response.status_code}{C.END}")
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            if i == retries - 1: return None
-            time.sleep(2)
-    return None
+def get_json(url):
+    """
+    Умовний GET через спільний клієнт (keep-alive, token bucket, backoff з jitter на 429/5xx).
+    (json, розпарсених байт); (NOT_MODIFIED, 0) — відповідь та сама, що минулого циклу.
+    """
+    data, parsed_bytes = http.get_if_changed(url, timeout=20)
+    if data is None: print(f"{C.RED}❌ Req Error: {url}{C.END}")
+    return data, parsed_bytes
 
 
 def fetch_variational_data():
-    raw_data = get_json(API_URL)
+    """(рядки, розпарсених байт). Незмінена відповідь — рядки минулого циклу без парсингу."""
+    global last_results
+    raw_data, parsed_bytes = get_json(API_URL)
+
+    if raw_data is NOT_MODIFIED:
+        return last_results, 0
 
     if not raw_data:
-        return []
+        return [], 0
+    last_results = []  # Помилкову відповідь (навіть повторену) не підміняємо старими рядками
 
     listings = raw_data.get('listings', [])
 
     if not listings:
         print(f"{C.YELLOW}⚠️ No 'listings' found.{C.END}")
-        return []
+        return [], 0
 
     results = []
 
@@ -165,6 +131,11 @@ def fetch_variational_data():
             bid = float(size_1k.get('bid', 0))
             ask = float(size_1k.get('ask', 0))
 
+            # VWAP на розмір — лише для notional, які котирує API (QUOTE_SIZE_KEYS)
+            sized = [quotes.get(QUOTE_SIZE_KEYS[n]) or {} if n in QUOTE_SIZE_KEYS else {} for n in VWAP_NOTIONALS]
+            bid_vwaps = [float(q.get('bid', 0) or 0) or None for q in sized]
+            ask_vwaps = [float(q.get('ask', 0) or 0) or None for q in sized]
+
             # 2. Spread
             spread = 0.0
             if bid > 0:
@@ -195,23 +166,28 @@ def fetch_variational_data():
                 'Funding %': hourly_funding_pct,
                 'Freq (h)': freq_hours,
                 'OI ($)': oi_usd,
-                'Volume 24h ($)': vol_usd
+                'Volume 24h ($)': vol_usd,
+                'Bid VWAP': bid_vwaps,
+                'Ask VWAP': ask_vwaps
             })
 
         except Exception as e:
             continue
 
-    return results
+    last_results = results
+    return results, parsed_bytes
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 🚀 MAIN LOOP
 # ═══════════════════════════════════════════════════════════════════════════
 
-def main():
+def main(quote_bus_name=None, update_event=None):
+    global quote_bus
     print(f"\n{C.CYAN}🚀 VARIATIONAL MONITOR (SYNCED){C.END}")
     print(f"{C.YELLOW}📂 DB Path: {DB_PATH}{C.END}")
 
     init_db()
+    quote_bus = attach_publisher(quote_bus_name, update_event)
 
     last_slow_update = 0
     first_run = True
@@ -223,13 +199,17 @@ def main():
             current_time = time.time()
             is_full_update = (current_time - last_slow_update) >= UPDATE_INTERVAL_SLOW
 
-            data_list = fetch_variational_data()
+            data_list, parsed_bytes = fetch_variational_data()
 
             if not data_list:
                 print(f"{C.RED}⚠️ No data. Retrying next cycle...{C.END}")
                 continue
 
-            save_to_db(data_list, is_full_update)
+            if quote_bus:
+                quote_bus.publish([(r['Token'], r['Bid'], r['Ask'], r['Funding %'], r['Freq (h)'], r['OI ($)'],
+                                    r['Volume 24h ($)'], r['Bid VWAP'], r['Ask VWAP']) for r in data_list])
+
+            written, touched = save_to_db(data_list, is_full_update)
 
             if is_full_update:
                 last_slow_update = time.time()
@@ -240,7 +220,9 @@ def main():
                 print(f"{C.GREEN}✅ Monitor Active. Pairs: {len(data_list)}{C.END}\n")
                 first_run = False
             else:
-                print(f"{C.CYAN}[{ts}] Variational: оновив {len(data_list)} токенів.{C.END}", end="\r")
+                print(f"{C.CYAN}[{ts}] Variational: оновив {len(data_list)} токенів "
+                      f"(записано {written}, heartbeat {touched}, розпарсено {parsed_bytes / 1024:.0f} KB).{C.END}", end="\r")
+            http.report()
 
         except KeyboardInterrupt:
             print(f"\n{C.RED}🛑 Stopped{C.END}")
@@ -1,10 +1,26 @@
 import sqlite3
+import numpy as np
 import pandas as pd
 import time
 import os
+import sys
+import concurrent.futures
 from datetime import datetime, timedelta, timezone
+from collections import deque
 from contextlib import closing
 
+# Dex_monitor потрібен для quote_bus (при запуску через main.py шлях вже доданий)
+MONITORS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Dex_monitor')
+if MONITORS_DIR not in sys.path:
+    sys.path.append(MONITORS_DIR)
+
+from quote_bus import QuoteBus
+from order_book import VWAP_NOTIONALS, VWAP_BID_COLUMNS, VWAP_ASK_COLUMNS, vwap_label
+from spread_stats import SpreadStatsEngine
+from history_tiers import SpreadHistoryStore, RAW_HISTORY_RETENTION_HOURS, HISTORY_RETENTION_DAYS, \
+    ROLLUP_1H_RETENTION_DAYS  # Ретеншн історії — спільний з дашбордом
+from live_feed import LiveFeed
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ⚙️ КОНФІГУРАЦІЯ
 # ═══════════════════════════════════════════════════════════════════════════
@@ -13,7 +29,7 @@ PAUSE_AFTER_UPDATE = 15
 RESET_HISTORY_ON_START = False
 STATS_WARMUP_SEC = 60
 
-HISTORY_RETENTION_DAYS = 8
+HISTORY_SAMPLE_INTERVAL_SEC = 15  # Не частіше одного семпла на маршрут за інтервал
 NEW_TOKEN_GRACE_PERIOD_HOURS = 24
 
 # 🔥 ПРИМУСОВЕ ОНОВЛЕННЯ (Якщо токен не оновлювався X секунд)
@@ -27,6 +43,24 @@ MIN_VOL_USD = 500000
 MAX_DATA_DELAY_SEC = 60
 MAX_SYNC_DIFF_SEC = 25
 
+# ⚡ EVENT-DRIVEN РЕЖИМ (перерахунок одразу після сигналу монітора, а не раз на PAUSE_AFTER_UPDATE)
+EVENT_DRIVEN_MODE = True
+EVENT_COALESCE_SEC = 0.05  # Пачка сигналів від кількох бірж за цей час = один перерахунок
+EVENT_MIN_INTERVAL_SEC = 0.25  # Не частіше одного перерахунку за цей час
+SQLITE_POLL_SEC = 0.2  # Опитування PRAGMA data_version для бірж без шини
+SLOW_INPUTS_REFRESH_SEC = 5  # Funding 24h та таймери force update змінюються повільно
+LATENCY_REPORT_SEC = 60
+SNAPSHOT_WORKERS = 5  # Паралельне читання джерел (sqlite3 відпускає GIL під час запиту)
+
+# ♻️ ІНКРЕМЕНТАЛЬНИЙ РЕЖИМ (перераховуються лише токени зі зміненими котируваннями)
+INCREMENTAL_MODE = True
+FULL_REFRESH_INTERVAL_SEC = 120
+
+# 📡 PUSH-ОНОВЛЕННЯ ДАШБОРДУ (SSE: snapshot + диффи маршрутів, див. live_feed.py)
+LIVE_FEED_ENABLED = True
+LIVE_FEED_HOST = '0.0.0.0'  # Як Streamlit у main.py: браузер з іншої машини підключається до SSE напряму
+LIVE_FEED_PORT = 8765  # Має збігатись з LIVE_FEED_PORT у dashboard.py
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DB_FOLDER = os.path.join(PROJECT_ROOT, 'Database')
@@ -44,6 +78,9 @@ TARGET_DB_PATH = os.path.join(DB_FOLDER, TARGET_DB_NAME)
 
 SCRIPT_START_TIME = time.time()
 
+# Taker-спред маршруту на розмір: продаж у біди sell-біржі, купівля з асків buy-біржі (VWAP)
+EXEC_SPREAD_COLS = [f"exec_spread_{vwap_label(n)}" for n in VWAP_NOTIONALS]
+
 
 class C:
     CYAN = '\033[96m'
@@ -58,7 +95,7 @@ class C:
 # 🛠️ РОБОТА З БАЗОЮ ДАНИХ (TARGET DB)
 # ═══════════════════════════════════════════════════════════════════════════
 
-def init_target_db():
+def init_target_db(history_store):
     if not os.path.exists(DB_FOLDER):
         os.makedirs(DB_FOLDER)
 
@@ -99,16 +136,6 @@ def init_target_db():
             )
         ''')
 
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS spread_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                token TEXT,
-                route TEXT, 
-                spread_pct REAL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS funding_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -127,15 +154,29 @@ def init_target_db():
             )
         ''')
 
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_hist_token_route ON spread_history (token, route);')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_hist_time ON spread_history (timestamp);')
         cursor.execute(
             'CREATE INDEX IF NOT EXISTS idx_fund_hist ON funding_history (exchange, token, payout_time_utc);')
 
+        # Фільтри і сортування дашборду виконує SQLite (dashboard_data.build_filter)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_live_spread ON live_opportunities (spread_pct);')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_live_token ON live_opportunities (token, spread_pct);')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_live_buy ON live_opportunities (buy_exchange, spread_pct);')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_live_sell ON live_opportunities (sell_exchange, spread_pct);')
+
+        # Колонки executable spread (додаються і в уже існуючу таблицю)
+        existing = {row[1] for row in cursor.execute("PRAGMA table_info(live_opportunities)")}
+        for col in EXEC_SPREAD_COLS:
+            if col not in existing: cursor.execute(f"ALTER TABLE live_opportunities ADD COLUMN {col} REAL")
+
+        conn.commit()
+
+        # 🗂️ Історія спредів: сирі семпли + хвилинні/годинні підсумки, партиції по часу
+        history_store.init(conn)
+        history_store.enforce_retention(conn, force=True)
         conn.commit()
 
         if RESET_HISTORY_ON_START:
-            cursor.execute("DELETE FROM spread_history")
+            history_store.reset(conn)
             cursor.execute("DELETE FROM funding_history")
             conn.commit()
             print(f"{C.RED}🧹 All History CLEARED.{C.END}")
@@ -248,209 +289,644 @@ def get_data_from_source(db_config):
     db_path = os.path.join(DB_FOLDER, db_config['file'])
     if not os.path.exists(db_path): return None
     try:
-        with closing(sqlite3.connect(db_path, timeout=10, isolation_level=None)) as conn:
-            conn.execute('PRAGMA journal_mode=WAL;')
-            df = pd.read_sql_query("SELECT * FROM market_data", conn)
-            if df.empty: return None
-            df.rename(columns={'funding_rate': 'funding_pct', 'fundingRate': 'funding_pct',
-                               'predicted_funding_rate': 'funding_pct'}, inplace=True)
-            df['last_updated'] = pd.to_datetime(df['last_updated'])
-            fresh_df = df[df['last_updated'] > datetime.now() - timedelta(seconds=MAX_DATA_DELAY_SEC)].copy()
-            if fresh_df.empty: return None
-            fresh_df['exchange'] = db_config['name']
-            if 'freq_hours' not in fresh_df.columns: fresh_df['freq_hours'] = 1
-            return fresh_df
+        # Свіжість фільтрується в SQL: застарілі рядки не потрапляють у pandas взагалі.
+        # last_updated — локальний час рядком 'YYYY-MM-DD HH:MM:SS', тож порівняння рядків = порівняння часу
+        cutoff = (datetime.now() - timedelta(seconds=MAX_DATA_DELAY_SEC)).strftime('%Y-%m-%d %H:%M:%S')
+        with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=10)) as conn:
+            fresh_df = pd.read_sql_query("SELECT * FROM market_data WHERE last_updated > ?", conn, params=(cutoff,))
+        if fresh_df.empty: return None
+        fresh_df.rename(columns={'funding_rate': 'funding_pct', 'fundingRate': 'funding_pct',
+                                 'predicted_funding_rate': 'funding_pct'}, inplace=True)
+        fresh_df['last_updated'] = pd.to_datetime(fresh_df['last_updated'])
+        fresh_df['exchange'] = db_config['name']
+        if 'freq_hours' not in fresh_df.columns: fresh_df['freq_hours'] = 1
+        return fresh_df
+    except:
+        return None
+
+
+def get_data_from_bus(bus, db_config):
+    """Те саме, що get_data_from_source, але з shared-memory знімка монітора (без SQLite)."""
+    try:
+        _, quotes = bus.snapshot()
+        if quotes is None or len(quotes) == 0: return None
+        df = pd.DataFrame({
+            'token': np.char.decode(quotes['token'], 'utf-8'),
+            'bid': quotes['bid'],
+            'ask': quotes['ask'],
+            'funding_pct': quotes['funding_pct'],
+            'freq_hours': quotes['freq_hours'],
+            'oi_usd': quotes['oi_usd'],
+            'volume_24h': quotes['volume_24h'],
+        })
+        for k in range(len(VWAP_NOTIONALS)):
+            df[VWAP_BID_COLUMNS[k]] = quotes['bid_vwap'][:, k]
+            df[VWAP_ASK_COLUMNS[k]] = quotes['ask_vwap'][:, k]
+        df['spread_pct'] = np.where(df['bid'] > 0, (df['ask'] - df['bid']) / df['bid'] * 100, 0.0)
+        # epoch -> локальний naive datetime, як last_updated у market_data
+        df['last_updated'] = pd.to_datetime(quotes['last_updated'], unit='s', utc=True) \
+            .tz_convert(datetime.now().astimezone().tzinfo).tz_localize(None)
+        fresh_df = df[df['last_updated'] > datetime.now() - timedelta(seconds=MAX_DATA_DELAY_SEC)].copy()
+        if fresh_df.empty: return None
+        fresh_df['exchange'] = db_config['name']
+        return fresh_df
     except:
         return None
 
 
+def get_exchange_data(db_config, buses):
+    """Шина, якщо вона є і вже має свіжі дані; інакше — SQLite монітора. Повертає (df, джерело)."""
+    df = get_data_from_bus(buses[db_config['name']], db_config) if db_config['name'] in buses else None
+    if df is not None: return df, 'bus'
+    return get_data_from_source(db_config), 'sqlite'
+
+
+class SnapshotLoader:
+    """
+    Знімок усіх бірж за цикл: джерела читаються паралельно в постійному пулі потоків,
+    результат — один DataFrame. timings: {exchange: (секунди, рядків, джерело)} останнього load().
+    """
+
+    def __init__(self, buses, workers=SNAPSHOT_WORKERS):
+        self.buses = buses
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='snapshot')
+        self.timings = {}
+        self.total_time = 0.0
+        self.history = {db['name']: deque(maxlen=1000) for db in SOURCE_DBS}
+        self.last_report = time.time()
+
+    def _load_one(self, db_config):
+        start = time.perf_counter()
+        df, source = get_exchange_data(db_config, self.buses)
+        return df, source, time.perf_counter() - start
+
+    def load(self):
+        start = time.perf_counter()
+        futures = [(db['name'], self.executor.submit(self._load_one, db)) for db in SOURCE_DBS]
+        dfs = []
+        self.timings = {}
+        for name, future in futures:
+            df, source, seconds = future.result()
+            rows = 0 if df is None else len(df)
+            self.timings[name] = (seconds, rows, source)
+            self.history[name].append(seconds)
+            if rows: dfs.append(df)
+        self.total_time = time.perf_counter() - start
+        return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+    def report(self):
+        """Раз на LATENCY_REPORT_SEC: p50/max часу читання кожної біржі."""
+        if time.time() - self.last_report < LATENCY_REPORT_SEC: return
+        parts = []
+        for name, samples in self.history.items():
+            if not samples: continue
+            source = self.timings.get(name, (0, 0, '-'))[2]
+            parts.append(f"{name} {np.percentile(samples, 50) * 1000:.1f}/{max(samples) * 1000:.1f}ms ({source})")
+        if parts: print(f"\n{C.YELLOW}📥 Snapshot load p50/max: {', '.join(parts)}{C.END}")
+        self.last_report = time.time()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # 🧠 РОЗРАХУНОК (МАКЕР + FORCE UPDATE + FUNDING 24H)
 # ═══════════════════════════════════════════════════════════════════════════
 
-def calculate_live_routes(all_data_df, discovery_map, funding_24h_df, last_updated_map):
-    if all_data_df.empty: return pd.DataFrame()
-    results = []
-    grouped = all_data_df.groupby('token')
-    current_time = datetime.now()
+def _period_funding_array(df):
+    """Векторна версія get_period_funding для всього фрейму."""
+    rate = pd.to_numeric(df['funding_pct'], errors='coerce').to_numpy(dtype=float)
+    freq = pd.to_numeric(df['freq_hours'], errors='coerce').to_numpy(dtype=float)
+    period = np.where(df['exchange'].to_numpy() == 'Variational', rate * np.maximum(1, freq), rate)
+    return np.where(np.isnan(freq), 0.0, period)
 
-    f24_map = {}
-    if not funding_24h_df.empty:
-        f24_map = funding_24h_df.set_index(['exchange', 'token'])['funding_24h'].to_dict()
 
-    for token, group in grouped:
-        if len(group) < 2: continue
+def _column_array(df, col):
+    """Колонка як float-масив; NaN, якщо біржі без неї (немає глибини) не дали цієї колонки."""
+    if col not in df.columns: return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
 
-        # 1. Перевірка на новий токен
-        is_new_token = False
-        if token in discovery_map:
-            if (current_time - discovery_map[token]).total_seconds() / 3600 < NEW_TOKEN_GRACE_PERIOD_HOURS:
-                is_new_token = True
 
-        # 2. 🔥 ПЕРЕВІРКА НА FORCE UPDATE
-        force_update = False
+def _token_flags(tokens, discovery_map, last_updated_map, current_time):
+    """Для кожного унікального токена: (is_new_token, force_update)."""
+    grace_sec = NEW_TOKEN_GRACE_PERIOD_HOURS * 3600
+    is_new = np.zeros(len(tokens), dtype=bool)
+    force = np.ones(len(tokens), dtype=bool)
+    for k, token in enumerate(tokens):
+        if token in discovery_map:
+            is_new[k] = (current_time - discovery_map[token]).total_seconds() < grace_sec
         if token in last_updated_map:
-            if (current_time - last_updated_map[token]).total_seconds() > FORCE_UPDATE_TIMEOUT_SEC:
-                force_update = True
-        else:
-            force_update = True
-
-        # MAKER ЛОГІКА (Buy @ Bid, Sell @ Ask)
-        potential_buys = group[group['bid'] > 0]
-        potential_sells = group[group['ask'] > 0]
-
-        for _, buy_row in potential_buys.iterrows():
-            if not is_new_token and not force_update and (
-                    buy_row['oi_usd'] < MIN_OI_USD or buy_row['volume_24h'] < MIN_VOL_USD): continue
-
-            for _, sell_row in potential_sells.iterrows():
-                if not is_new_token and not force_update and (
-                        sell_row['oi_usd'] < MIN_OI_USD or sell_row['volume_24h'] < MIN_VOL_USD): continue
-                if buy_row['exchange'] == sell_row['exchange']: continue
-
-                time_diff = abs((buy_row['last_updated'] - sell_row['last_updated']).total_seconds())
-
-                # Ігноруємо розсинхрон, якщо це Force Update
-                if not force_update and time_diff > MAX_SYNC_DIFF_SEC: continue
-
-                buy_price = buy_row['bid']
-                sell_price = sell_row['ask']
-                spread = ((sell_price - buy_price) / buy_price) * 100
-
-                buy_fund_period = get_period_funding(buy_row)
-                sell_fund_period = get_period_funding(sell_row)
-
-                buy_fund_24h = f24_map.get((buy_row['exchange'], token), 0.0)
-                sell_fund_24h = f24_map.get((sell_row['exchange'], token), 0.0)
-
-                results.append({
-                    'token': token,
-                    'route': f"{buy_row['exchange']} ➡️ {sell_row['exchange']}",
-                    'buy_exchange': buy_row['exchange'],
-                    'sell_exchange': sell_row['exchange'],
-                    'buy_price': buy_price,
-                    'sell_price': sell_price,
-                    'spread': spread,
-                    'buy_funding_rate': buy_fund_period,
-                    'buy_funding_freq': int(buy_row['freq_hours']),
-                    'sell_funding_rate': sell_fund_period,
-                    'sell_funding_freq': int(sell_row['freq_hours']),
-                    'buy_funding_24h_pct': buy_fund_24h,
-                    'sell_funding_24h_pct': sell_fund_24h,
-                    'oi_long': buy_row['oi_usd'],
-                    'oi_short': sell_row['oi_usd'],
-                    'vol_long': buy_row['volume_24h'],
-                    'vol_short': sell_row['volume_24h']
-                })
-
-    return pd.DataFrame(results)
+            force[k] = (current_time - last_updated_map[token]).total_seconds() > FORCE_UPDATE_TIMEOUT_SEC
+    return is_new, force
+
+
+def calculate_live_routes(all_data_df, discovery_map, funding_24h_df, last_updated_map):
+    """
+    Будує всі маршрути (token, buy_exchange, sell_exchange) одним cross-join всередині токена.
+    Всі фільтри (OI/Volume, новий токен, force update, MAX_SYNC_DIFF_SEC) — булеві маски NumPy.
+    """
+    if all_data_df.empty: return pd.DataFrame()
+    current_time = datetime.now()
+
+    # 1. Групування по токену: сортуємо рядки так, щоб кожен токен був суцільним блоком
+    token_codes, tokens = pd.factorize(all_data_df['token'], sort=True)
+    order = np.argsort(token_codes, kind='stable')
+    df = all_data_df.iloc[order].reset_index(drop=True)
+    token_codes = token_codes[order]
+
+    sizes = np.bincount(token_codes, minlength=len(tokens))
+    starts = np.cumsum(sizes) - sizes
+
+    # 2. Cross-join: кожен рядок (buy) з'єднується з усіма рядками свого токена (sell)
+    rep = sizes[token_codes]
+    buy_idx = np.repeat(np.arange(len(df)), rep)
+    offsets = np.arange(len(buy_idx)) - np.repeat(np.cumsum(rep) - rep, rep)
+    sell_idx = np.repeat(starts[token_codes], rep) + offsets
+    pair_token = token_codes[buy_idx]
+
+    # 3. Колонки як масиви
+    bid = pd.to_numeric(df['bid'], errors='coerce').to_numpy(dtype=float)
+    ask = pd.to_numeric(df['ask'], errors='coerce').to_numpy(dtype=float)
+    oi = pd.to_numeric(df['oi_usd'], errors='coerce').to_numpy(dtype=float)
+    vol = pd.to_numeric(df['volume_24h'], errors='coerce').to_numpy(dtype=float)
+    ts = df['last_updated'].to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+    exchange_codes, exchanges = pd.factorize(df['exchange'])
+
+    is_new, force = _token_flags(tokens, discovery_map, last_updated_map, current_time)
+    relaxed = (is_new | force)[pair_token]
+    force_pair = force[pair_token]
+
+    # NaN проходить фільтр так само, як у порівняннях "<" старої логіки
+    liquid = ~((oi < MIN_OI_USD) | (vol < MIN_VOL_USD))
+
+    # 4. MAKER ЛОГІКА (Buy @ Bid, Sell @ Ask) + фільтри
+    mask = (bid[buy_idx] > 0) & (ask[sell_idx] > 0)
+    mask &= exchange_codes[buy_idx] != exchange_codes[sell_idx]
+    mask &= relaxed | (liquid[buy_idx] & liquid[sell_idx])
+    # Ігноруємо розсинхрон, якщо це Force Update
+    mask &= force_pair | ~(np.abs(ts[buy_idx] - ts[sell_idx]) > MAX_SYNC_DIFF_SEC)
+
+    if not mask.any(): return pd.DataFrame()
+    b, s = buy_idx[mask], sell_idx[mask]
+
+    # 5. Фандінг за період та за 24h
+    period_funding = _period_funding_array(df)
+    f24 = np.zeros(len(df))
+    if not funding_24h_df.empty:
+        f24_series = funding_24h_df.set_index(['exchange', 'token'])['funding_24h']
+        keys = pd.MultiIndex.from_arrays([df['exchange'], df['token']])
+        f24 = f24_series.reindex(keys).fillna(0.0).to_numpy(dtype=float)
+
+    freq = df['freq_hours'].to_numpy().astype(int)
+    route_names = np.array([[f"{be} ➡️ {se}" for se in exchanges] for be in exchanges], dtype=object)
+    exchange_names = np.asarray(exchanges, dtype=object)
+
+    buy_price = bid[b]
+    sell_price = ask[s]
+
+    # 6. Executable spread на розмір (taker): купуємо з асків buy-біржі, продаємо в біди sell-біржі
+    exec_spreads = {}
+    for col, bid_col, ask_col in zip(EXEC_SPREAD_COLS, VWAP_BID_COLUMNS, VWAP_ASK_COLUMNS):
+        buy_vwap = _column_array(df, ask_col)[b]
+        sell_vwap = _column_array(df, bid_col)[s]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exec_spreads[col] = np.where(buy_vwap > 0, (sell_vwap - buy_vwap) / buy_vwap * 100, np.nan)
+
+    return pd.DataFrame({
+        'token': np.asarray(tokens, dtype=object)[token_codes[b]],
+        'route': route_names[exchange_codes[b], exchange_codes[s]],
+        'buy_exchange': exchange_names[exchange_codes[b]],
+        'sell_exchange': exchange_names[exchange_codes[s]],
+        'buy_price': buy_price,
+        'sell_price': sell_price,
+        'spread': ((sell_price - buy_price) / buy_price) * 100,
+        'buy_funding_rate': period_funding[b],
+        'buy_funding_freq': freq[b],
+        'sell_funding_rate': period_funding[s],
+        'sell_funding_freq': freq[s],
+        'buy_funding_24h_pct': f24[b],
+        'sell_funding_24h_pct': f24[s],
+        'oi_long': oi[b],
+        'oi_short': oi[s],
+        'vol_long': vol[b],
+        'vol_short': vol[s],
+        **exec_spreads
+    })
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # ЗАПИС ТА MAIN
 # ═══════════════════════════════════════════════════════════════════════════
 
-def update_history_and_get_stats(df_live):
+def update_history_and_get_stats(df_live, stats_engine, history_store):
     if df_live.empty: return df_live
     try:
+        history_store.stage(zip(df_live['token'], df_live['route'], df_live['spread']))
         with closing(sqlite3.connect(TARGET_DB_PATH, timeout=10)) as conn:
-            cursor = conn.cursor()
-            history_data = [(r['token'], r['route'], r['spread'], datetime.now().strftime('%Y-%m-%d %H:%M:%S')) for _, r
-                            in df_live.iterrows()]
-            if history_data: cursor.executemany(
-                "INSERT INTO spread_history (token, route, spread_pct, timestamp) VALUES (?, ?, ?, ?)", history_data)
-            cursor.execute(
-                f"DELETE FROM spread_history WHERE timestamp < datetime('now', '-{HISTORY_RETENTION_DAYS} days')")
+            history_data = history_store.flush(conn)
+            history_store.enforce_retention(conn)
             conn.commit()
 
-            if time.time() - SCRIPT_START_TIME < STATS_WARMUP_SEC:
-                for col in ['min_24h', 'max_24h', 'min_30d', 'max_30d']: df_live[col] = df_live['spread']
-                return df_live
-            else:
-                df_stats = pd.read_sql_query("""
-                SELECT token, route, MIN(CASE WHEN timestamp >= datetime('now', '-24 hours') THEN spread_pct END) as db_min_24h, MAX(CASE WHEN timestamp >= datetime('now', '-24 hours') THEN spread_pct END) as db_max_24h, MIN(spread_pct) as db_min_30d, MAX(spread_pct) as db_max_30d
-                FROM spread_history GROUP BY token, route""", conn)
-                if not df_stats.empty:
-                    df_final = pd.merge(df_live, df_stats, on=['token', 'route'], how='left')
-                    for col in ['db_min_24h', 'db_max_24h', 'db_min_30d', 'db_max_30d']: df_final[col] = df_final[
-                        col].fillna(df_final['spread'])
-                    df_final['min_24h'] = df_final[['spread', 'db_min_24h']].min(axis=1)
-                    df_final['max_24h'] = df_final[['spread', 'db_max_24h']].max(axis=1)
-                    df_final['min_30d'] = df_final[['spread', 'db_min_30d']].min(axis=1)
-                    df_final['max_30d'] = df_final[['spread', 'db_max_30d']].max(axis=1)
-                    return df_final
+        for row in history_data: stats_engine.add(*row)
+        stats_engine.sweep()
+
+        if time.time() - SCRIPT_START_TIME < STATS_WARMUP_SEC:
+            for col in ['min_24h', 'max_24h', 'min_30d', 'max_30d']: df_live[col] = df_live['spread']
+            return df_live
+        else:
+            # 📈 Статистика з in-process rolling min/max замість GROUP BY по spread_history
+            cutoffs = stats_engine.get_cutoffs()
+            stats = [stats_engine.get(token, route, cutoffs) for token, route in zip(df_live['token'], df_live['route'])]
+            df_stats = pd.DataFrame(stats, columns=['db_min_24h', 'db_max_24h', 'db_min_30d', 'db_max_30d'],
+                                    index=df_live.index, dtype=float)
+            if not df_stats.empty:
+                df_final = pd.concat([df_live, df_stats], axis=1)
+                for col in ['db_min_24h', 'db_max_24h', 'db_min_30d', 'db_max_30d']: df_final[col] = df_final[
+                    col].fillna(df_final['spread'])
+                df_final['min_24h'] = df_final[['spread', 'db_min_24h']].min(axis=1)
+                df_final['max_24h'] = df_final[['spread', 'db_max_24h']].max(axis=1)
+                df_final['min_30d'] = df_final[['spread', 'db_min_30d']].min(axis=1)
+                df_final['max_30d'] = df_final[['spread', 'db_max_30d']].max(axis=1)
+                return df_final
     except:
         pass
     return df_live
 
 
+DASHBOARD_ROUND_COLS = ['buy_price', 'sell_price', 'spread', 'min_24h', 'max_24h', 'min_30d', 'max_30d',
+                        'buy_funding_rate', 'sell_funding_rate', 'buy_funding_24h_pct',
+                        'sell_funding_24h_pct'] + EXEC_SPREAD_COLS
+
+# (колонка фрейму, колонка live_opportunities) — у порядку рядка get_dashboard_rows
+DASHBOARD_COLUMNS = [
+    ('token', 'token'), ('route', 'route'), ('buy_exchange', 'buy_exchange'), ('sell_exchange', 'sell_exchange'),
+    ('buy_price', 'buy_price'), ('sell_price', 'sell_price'), ('spread', 'spread_pct'),
+    ('min_24h', 'spread_min_24h'), ('max_24h', 'spread_max_24h'),
+    ('min_30d', 'spread_min_30d'), ('max_30d', 'spread_max_30d'),
+    ('buy_funding_rate', 'buy_funding_rate'), ('buy_funding_freq', 'buy_funding_freq'),
+    ('sell_funding_rate', 'sell_funding_rate'), ('sell_funding_freq', 'sell_funding_freq'),
+    ('buy_funding_24h_pct', 'buy_funding_24h_pct'), ('sell_funding_24h_pct', 'sell_funding_24h_pct'),
+    ('oi_long', 'oi_long_usd'), ('oi_short', 'oi_short_usd'), ('vol_long', 'vol_long_usd'), ('vol_short', 'vol_short_usd'),
+] + [(col, col) for col in EXEC_SPREAD_COLS]
+
+_DB_COLS = [db_col for _, db_col in DASHBOARD_COLUMNS] + ['last_updated']
+DASHBOARD_UPSERT_SQL = f'''
+    INSERT INTO live_opportunities ({', '.join(_DB_COLS)})
+    VALUES ({', '.join('?' * len(_DB_COLS))})
+    ON CONFLICT(token, buy_exchange, sell_exchange) DO UPDATE SET {', '.join(f'{c}=excluded.{c}' for c in _DB_COLS if c not in ('token', 'buy_exchange', 'sell_exchange'))}
+'''
+
+
+def get_dashboard_rows(df_final):
+    """Повертає {(token, buy_exchange, sell_exchange): рядок для live_opportunities без last_updated}."""
+    rows = {}
+    if df_final.empty: return rows
+    df_final = df_final.copy()
+    for col in DASHBOARD_ROUND_COLS:
+        if col in df_final.columns: df_final[col] = df_final[col].round(5)
+
+    cols = [frame_col for frame_col, _ in DASHBOARD_COLUMNS]
+    for values in df_final.reindex(columns=cols).itertuples(index=False, name=None):
+        # NaN -> None: в SQLite це NULL, а порівняння рядків між циклами стає стабільним
+        row = tuple(None if isinstance(v, float) and v != v else v for v in values)
+        rows[(row[0], row[2], row[3])] = row
+    return rows
+
+
 def update_dashboard_db(df_final):
+    """Пише всі маршрути циклу; повертає їх {(token, buy_exchange, sell_exchange): рядок} (для live feed)."""
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = get_dashboard_rows(df_final)
     try:
         with closing(sqlite3.connect(TARGET_DB_PATH, timeout=10)) as conn:
             cursor = conn.cursor()
-            if not df_final.empty:
-                cols_to_round = ['buy_price', 'sell_price', 'spread', 'min_24h', 'max_24h', 'min_30d', 'max_30d',
-                                 'buy_funding_rate', 'sell_funding_rate', 'buy_funding_24h_pct', 'sell_funding_24h_pct']
-                for col in cols_to_round:
-                    if col in df_final.columns: df_final[col] = df_final[col].round(5)
-
-                data_to_insert = [(
-                    r['token'], r['route'], r['buy_exchange'], r['sell_exchange'], r['buy_price'], r['sell_price'],
-                    r['spread'],
-                    r['min_24h'], r['max_24h'], r['min_30d'], r['max_30d'], r['buy_funding_rate'],
-                    r['buy_funding_freq'],
-                    r['sell_funding_rate'], r['sell_funding_freq'], r['buy_funding_24h_pct'], r['sell_funding_24h_pct'],
-                    r['oi_long'], r['oi_short'], r['vol_long'], r['vol_short'], timestamp
-                ) for _, r in df_final.iterrows()]
-
-                cursor.executemany('''
-                    INSERT INTO live_opportunities (token, route, buy_exchange, sell_exchange, buy_price, sell_price, spread_pct, spread_min_24h, spread_max_24h, spread_min_30d, spread_max_30d, buy_funding_rate, buy_funding_freq, sell_funding_rate, sell_funding_freq, buy_funding_24h_pct, sell_funding_24h_pct, oi_long_usd, oi_short_usd, vol_long_usd, vol_short_usd, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(token, buy_exchange, sell_exchange) DO UPDATE SET route=excluded.route, buy_price=excluded.buy_price, sell_price=excluded.sell_price, spread_pct=excluded.spread_pct, spread_min_24h=excluded.spread_min_24h, spread_max_24h=excluded.spread_max_24h, spread_min_30d=excluded.spread_min_30d, spread_max_30d=excluded.spread_max_30d, buy_funding_rate=excluded.buy_funding_rate, buy_funding_freq=excluded.buy_funding_freq, sell_funding_rate=excluded.sell_funding_rate, sell_funding_freq=excluded.sell_funding_freq, buy_funding_24h_pct=excluded.buy_funding_24h_pct, sell_funding_24h_pct=excluded.sell_funding_24h_pct, oi_long_usd=excluded.oi_long_usd, oi_short_usd=excluded.oi_short_usd, vol_long_usd=excluded.vol_long_usd, vol_short_usd=excluded.vol_short_usd, last_updated=excluded.last_updated
-                ''', data_to_insert)
+            if rows:
+                cursor.executemany(DASHBOARD_UPSERT_SQL, [row + (timestamp,) for row in rows.values()])
 
             cursor.execute("DELETE FROM live_opportunities WHERE last_updated < datetime('now', '-5 minute')")
             conn.commit()
     except Exception as e:
         print(f"{C.RED}❌ DB Write Error: {e}{C.END}")
+    return rows
 
 
-def main():
-    print(f"\n{C.CYAN}🚀 ARBITRAGE AGGREGATOR{C.END}")
-    print(f"{C.GREEN}Feature: 24h Funding Tracker & 2-Min Force Update active.{C.END}")
-    init_target_db()
+# ═══════════════════════════════════════════════════════════════════════════
+# ♻️ ІНКРЕМЕНТАЛЬНИЙ РЕЖИМ (перераховуємо тільки токени зі зміненими котируваннями)
+# ═══════════════════════════════════════════════════════════════════════════
+
+class IncrementalState:
+    """
+    Пам'ять між циклами агрегатора.
+    quote_versions: {(exchange, token): хеш bid/ask/funding/freq/OI/vol/funding_24h}
+    routes: {(token, buy_exchange, sell_exchange): останній записаний рядок live_opportunities}
+    """
+
+    def __init__(self):
+        self.quote_versions = {}
+        self.routes = {}
+        self.last_full_refresh = 0.0
+        self.db_synced = False  # live_opportunities звірено з routes (перший повний цикл)
+
+    def changed_tokens(self, full_market_data, funding_24h_df):
+        """Оновлює версії котирувань і повертає токени, у яких змінилась хоча б одна нога."""
+        cols = ['bid', 'ask', 'funding_pct', 'freq_hours', 'oi_usd', 'volume_24h'] + VWAP_BID_COLUMNS + VWAP_ASK_COLUMNS
+        legs = full_market_data.reindex(columns=['exchange', 'token'] + cols)
+        legs['funding_24h'] = 0.0
+        if not funding_24h_df.empty:
+            f24 = funding_24h_df.set_index(['exchange', 'token'])['funding_24h']
+            keys = pd.MultiIndex.from_arrays([legs['exchange'], legs['token']])
+            legs['funding_24h'] = f24.reindex(keys).fillna(0.0).to_numpy()
+
+        # Фільтр розсинхрону (MAX_SYNC_DIFF_SEC) залежить від last_updated ніг. Поки всі ноги токена
+        # свіжіші за MAX_SYNC_DIFF_SEC, різниця між ними не може його перевищити — у хеш іде лише ця
+        # ознака. Якщо хоч одна нога застаріла, результат залежить від точного часу — хешуємо його.
+        last_updated = pd.to_datetime(full_market_data['last_updated'])
+        stale = (last_updated < datetime.now() - timedelta(seconds=MAX_SYNC_DIFF_SEC)).to_numpy()
+        token_stale = pd.Series(stale).groupby(legs['token'].to_numpy()).transform('any').to_numpy()
+        legs['sync'] = np.where(token_stale, last_updated.to_numpy(dtype='datetime64[ns]').astype(np.int64), -1)
+
+        hashes = pd.util.hash_pandas_object(legs[cols + ['funding_24h', 'sync']], index=False).to_numpy()
+        versions = dict(zip(zip(legs['exchange'], legs['token']), hashes.tolist()))
+
+        changed = {key[1] for key, h in versions.items() if self.quote_versions.get(key) != h}
+        # Нога зникла (застарілі дані) — маршрути токена теж треба перерахувати
+        changed |= {token for (_, token) in self.quote_versions.keys() - versions.keys()}
+
+        self.quote_versions = versions
+        return changed
+
+    def apply_routes(self, tokens, new_rows):
+        """
+        Замінює маршрути перерахованих токенів у кеші.
+        Повертає (рядки, що змінились, ключі маршрутів, що зникли).
+        """
+        changed = [row for key, row in new_rows.items() if self.routes.get(key) != row]
+        removed = [key for key in self.routes if key[0] in tokens and key not in new_rows]
+        for key in removed: del self.routes[key]
+        self.routes.update(new_rows)
+        return changed, removed
+
+
+def write_dashboard_delta(changed_rows, heartbeat_keys=(), prune=False):
+    """
+    Пише в live_opportunities тільки змінені рядки.
+    heartbeat_keys — маршрути, які веде агрегатор (state.routes): лише їм оновлюється last_updated.
+    Зниклі маршрути, як і раніше, видаляються через 5 хвилин без оновлень (grace period).
+    prune — видалити рядки поза heartbeat_keys (залишки попереднього запуску, делістинг під час простою).
+    """
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        with closing(sqlite3.connect(TARGET_DB_PATH, timeout=10)) as conn:
+            cursor = conn.cursor()
+            if changed_rows:
+                cursor.executemany(DASHBOARD_UPSERT_SQL, [row + (timestamp,) for row in changed_rows])
+            if prune:
+                live = set(heartbeat_keys)
+                stale = [key for key in cursor.execute(
+                    "SELECT token, buy_exchange, sell_exchange FROM live_opportunities") if key not in live]
+                cursor.executemany(
+                    "DELETE FROM live_opportunities WHERE token=? AND buy_exchange=? AND sell_exchange=?", stale)
+            if heartbeat_keys:
+                cursor.executemany(
+                    "UPDATE live_opportunities SET last_updated=? "
+                    "WHERE token=? AND buy_exchange=? AND sell_exchange=? AND last_updated<?",
+                    [(timestamp, *key, timestamp) for key in heartbeat_keys])
+                cursor.execute("DELETE FROM live_opportunities WHERE last_updated < datetime('now', '-5 minute')")
+            conn.commit()
+    except Exception as e:
+        print(f"{C.RED}❌ DB Write Error: {e}{C.END}")
+
+
+def run_incremental_cycle(state, stats_engine, history_store, full_market_data, discovery_map, funding_24h_df,
+                          last_updated_map, feed=None):
+    """
+    Один цикл інкрементального режиму. Раз на FULL_REFRESH_INTERVAL_SEC перераховує всі токени —
+    так підхоплюються зміни, що залежать лише від часу (grace period, force update, вікна статистики).
+    feed (LiveFeed) отримує ту саму різницю; зниклі маршрути з нього прибираються одразу,
+    а з live_opportunities — після 5-хвилинного grace period.
+    Повертає (кількість маршрутів, кількість перерахованих токенів, кількість записаних рядків).
+    """
+    is_full = time.time() - state.last_full_refresh >= FULL_REFRESH_INTERVAL_SEC
+    dirty = state.changed_tokens(full_market_data, funding_24h_df)
+    if is_full:
+        dirty |= set(full_market_data['token'].unique()) | {key[0] for key in state.routes}
+
+    if dirty:
+        subset = full_market_data[full_market_data['token'].isin(dirty)]
+        df_live = calculate_live_routes(subset, discovery_map, funding_24h_df, last_updated_map)
+        df_final = update_history_and_get_stats(df_live, stats_engine, history_store)
+        new_rows = get_dashboard_rows(df_final)
+    else:
+        new_rows = {}
+
+    changed_rows, removed_keys = state.apply_routes(dirty, new_rows)
+    if changed_rows or is_full:
+        # Перший повний цикл після старту прибирає рядки, яких агрегатор уже не веде
+        write_dashboard_delta(changed_rows, list(state.routes) if is_full else (),
+                              prune=is_full and not state.db_synced)
+    if feed is not None: feed.publish(changed_rows, removed_keys)
+    if is_full:
+        state.last_full_refresh = time.time()
+        state.db_synced = True
+
+    return len(state.routes), len(dirty), len(changed_rows) + len(removed_keys)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚡ EVENT-DRIVEN РЕЖИМ
+# ═══════════════════════════════════════════════════════════════════════════
+
+class UpdateWatcher:
+    """
+    Чекає нових котирувань від моніторів:
+      - біржі з шиною: multiprocessing.Event + номер версії (seq) сегмента;
+      - біржі без шини: PRAGMA data_version їхньої SQLite (змінюється після commit іншого з'єднання).
+    """
+
+    def __init__(self, buses, update_event):
+        self.buses = buses
+        self.event = update_event
+        self.bus_versions = {name: bus.version() for name, bus in buses.items()}
+        self.db_conns = {}
+        self.db_versions = {}
+        self.quote_ts = None  # Час публікації найстаршого з нових котирувань
+
+    def _data_version(self, db_config):
+        name = db_config['name']
+        if name not in self.db_conns:
+            db_path = os.path.join(DB_FOLDER, db_config['file'])
+            if not os.path.exists(db_path): return None
+            self.db_conns[name] = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=10)
+        try:
+            return self.db_conns[name].execute('PRAGMA data_version').fetchone()[0]
+        except sqlite3.Error:
+            self.db_conns.pop(name).close()
+            return None
+
+    def poll(self):
+        """Біржі, дані яких змінились з минулого poll()."""
+        changed = set()
+        now = time.time()
+        for db in SOURCE_DBS:
+            name = db['name']
+            if name in self.buses:
+                version = self.buses[name].version()
+                if version == self.bus_versions[name]: continue
+                self.bus_versions[name] = version
+                ts = self.buses[name].published()
+            else:
+                version = self._data_version(db)
+                if version is None or version == self.db_versions.get(name): continue
+                first_seen = name not in self.db_versions
+                self.db_versions[name] = version
+                if first_seen: continue
+                # Для SQLite час публікації невідомий — беремо момент виявлення (точність SQLITE_POLL_SEC)
+                ts = now
+            changed.add(name)
+            self.quote_ts = ts if self.quote_ts is None else min(self.quote_ts, ts)
+        return changed
+
+    def close(self):
+        for conn in self.db_conns.values(): conn.close()
+        self.db_conns.clear()
+
+    def wait(self, timeout):
+        """Блокує до появи нових даних (з коалесценцією) або до timeout. Повертає набір бірж."""
+        deadline = time.time() + timeout
+        self.quote_ts = None
+        while True:
+            changed = self.poll()
+            if changed:
+                time.sleep(EVENT_COALESCE_SEC)
+                return changed | self.poll()
+            remaining = deadline - time.time()
+            if remaining <= 0: return set()
+            if self.event is not None:
+                if self.event.wait(min(remaining, SQLITE_POLL_SEC)): self.event.clear()
+            else:
+                time.sleep(min(remaining, SQLITE_POLL_SEC))
 
-    while True:
-        start_time = time.time()
-        dfs = [get_data_from_source(db) for db in SOURCE_DBS if
-               get_data_from_source(db) is not None and not get_data_from_source(db).empty]
 
-        if not dfs:
-            print(f"\r{C.RED}⚠️ Waiting for FRESH data...{C.END}", end="")
-            time.sleep(1)
-            continue
+class LatencyStats:
+    """Затримка quote -> route: від публікації котирування до запису в live_opportunities."""
 
-        full_market_data = pd.concat(dfs, ignore_index=True)
+    def __init__(self, maxlen=5000):
+        self.samples = deque(maxlen=maxlen)
+        self.last_report = time.time()
 
-        save_funding_snapshots(full_market_data)
-        funding_24h_df = get_24h_funding_stats()
-        discovery_map = manage_new_tokens(full_market_data['token'].unique().tolist())
+    def add(self, seconds):
+        self.samples.append(seconds)
 
-        # 🔥 Отримуємо таймери оновлення
-        last_updated_map = get_last_updated_map()
+    def report(self):
+        if time.time() - self.last_report < LATENCY_REPORT_SEC or not self.samples: return
+        p50, p90, p99 = np.percentile(np.array(self.samples) * 1000, [50, 90, 99])
+        print(f"\n{C.YELLOW}⏱️ Quote→route latency: p50 {p50:.0f}ms, p90 {p90:.0f}ms, p99 {p99:.0f}ms "
+              f"(n={len(self.samples)}){C.END}")
+        self.last_report = time.time()
 
-        # 🔥 Передаємо всі дані в розрахунок
-        df_live = calculate_live_routes(full_market_data, discovery_map, funding_24h_df, last_updated_map)
-        df_final = update_history_and_get_stats(df_live)
 
-        if not df_final.empty: df_final = df_final.sort_values(by='spread', ascending=False)
-        update_dashboard_db(df_final)
+def main(quote_bus_names=None, update_event=None):
+    print(f"\n{C.CYAN}🚀 ARBITRAGE AGGREGATOR{C.END}")
+    print(f"{C.GREEN}Feature: 24h Funding Tracker & 2-Min Force Update active.{C.END}")
+    if INCREMENTAL_MODE:
+        print(f"{C.GREEN}Feature: Incremental mode (full refresh every {FULL_REFRESH_INTERVAL_SEC}s).{C.END}")
+    history_store = SpreadHistoryStore(RAW_HISTORY_RETENTION_HOURS, HISTORY_RETENTION_DAYS, ROLLUP_1H_RETENTION_DAYS,
+                                       HISTORY_SAMPLE_INTERVAL_SEC)
+    init_target_db(history_store)
+    state = IncrementalState()
+
+    # 🚌 Якщо main.py передав shared-memory шину — читаємо котирування з неї, інакше з SQLite моніторів
+    buses = {}
+    for name, shm_name in (quote_bus_names or {}).items():
+        try:
+            buses[name] = QuoteBus.attach(shm_name)
+        except Exception as e:
+            print(f"{C.YELLOW}⚠️ Quote bus for {name} unavailable, using SQLite: {e}{C.END}")
+    if buses:
+        print(f"{C.GREEN}Feature: Shared-memory quote bus ({', '.join(buses)}).{C.END}")
+
+    loader = SnapshotLoader(buses)
+
+    feed = None
+    if LIVE_FEED_ENABLED:
+        try:
+            feed = LiveFeed([db_col for _, db_col in DASHBOARD_COLUMNS], LIVE_FEED_HOST, LIVE_FEED_PORT).start()
+            print(f"{C.GREEN}Feature: Live feed for dashboard push mode ({feed.url}).{C.END}")
+        except OSError as e:
+            print(f"{C.YELLOW}⚠️ Live feed unavailable (dashboard falls back to polling): {e}{C.END}")
+    watcher = UpdateWatcher(buses, update_event) if EVENT_DRIVEN_MODE else None
+    latency = LatencyStats()
+    if watcher:
+        signal = 'bus signal' if update_event is not None else 'data_version polling'
+        print(f"{C.GREEN}Feature: Event-driven mode ({signal}).{C.END}")
+    last_cycle_end = 0.0
+    slow_inputs_time = 0.0
+    quote_ts = None
+
+    stats_engine = SpreadStatsEngine(HISTORY_RETENTION_DAYS)
+    warm_start_time = time.time()
+    n_samples = stats_engine.warm_start(TARGET_DB_PATH, history_store)
+    print(f"{C.GREEN}✅ Spread stats warmed up: {n_samples} samples, {len(stats_engine.windows)} routes "
+          f"({time.time() - warm_start_time:.1f}s).{C.END}")
 
-        ts = datetime.now().strftime('%H:%M:%S')
-        print(f"\r{C.CYAN}[{ts}] Routes: {len(df_final)}. Took: {time.time() - start_time:.3f}s{C.END}", end="")
-        time.sleep(PAUSE_AFTER_UPDATE)
+    try:
+        while True:
+            if watcher:
+                # Мінімальний інтервал між перерахунками: сигнали за цей час теж зливаються в один
+                pause = EVENT_MIN_INTERVAL_SEC - (time.time() - last_cycle_end)
+                if pause > 0: time.sleep(pause)
+                changed = watcher.wait(PAUSE_AFTER_UPDATE)
+                quote_ts = watcher.quote_ts if changed else None
+
+            start_time = time.time()
+            full_market_data = loader.load()
+            loader.report()
+
+            if full_market_data.empty:
+                print(f"\r{C.RED}⚠️ Waiting for FRESH data...{C.END}", end="")
+                time.sleep(1)
+                continue
+
+            save_funding_snapshots(full_market_data)
+            discovery_map = manage_new_tokens(full_market_data['token'].unique().tolist())
+
+            # 🔥 Funding 24h та таймери оновлення (в event-режимі — не частіше SLOW_INPUTS_REFRESH_SEC)
+            if not watcher or time.time() - slow_inputs_time >= SLOW_INPUTS_REFRESH_SEC:
+                funding_24h_df = get_24h_funding_stats()
+                last_updated_map = get_last_updated_map()
+                slow_inputs_time = time.time()
+
+            ts = datetime.now().strftime('%H:%M:%S')
+            if INCREMENTAL_MODE:
+                n_routes, n_dirty, n_written = run_incremental_cycle(state, stats_engine, history_store,
+                                                                     full_market_data, discovery_map, funding_24h_df,
+                                                                     last_updated_map, feed)
+                print(f"\r{C.CYAN}[{ts}] Routes: {n_routes}. Recalc tokens: {n_dirty}. Written: {n_written}. "
+                      f"Took: {time.time() - start_time:.3f}s{C.END}", end="")
+            else:
+                # 🔥 Передаємо всі дані в розрахунок
+                df_live = calculate_live_routes(full_market_data, discovery_map, funding_24h_df, last_updated_map)
+                df_final = update_history_and_get_stats(df_live, stats_engine, history_store)
+
+                if not df_final.empty: df_final = df_final.sort_values(by='spread', ascending=False)
+                rows = update_dashboard_db(df_final)
+                if feed is not None: feed.replace(rows)
+
+                print(f"\r{C.CYAN}[{ts}] Routes: {len(df_final)}. Took: {time.time() - start_time:.3f}s{C.END}", end="")
+
+            if watcher:
+                last_cycle_end = time.time()
+                if quote_ts: latency.add(last_cycle_end - quote_ts)
+                latency.report()
+            else:
+                time.sleep(PAUSE_AFTER_UPDATE)
+    finally:
+        # Ctrl+C / завершення процесу main.py: пул потоків, HTTP-сервер feed і сегменти шини
+        loader.close()
+        if feed is not None: feed.stop()
+        if watcher: watcher.close()
+        for bus in buses.values(): bus.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
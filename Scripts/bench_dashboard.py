@@ -0,0 +1,207 @@
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from contextlib import closing
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+import dashboard_data
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Навантажувальний тест дашборду: BENCH_SESSIONS вкладок роблять rerun кожні REFRESH_SECONDS,
+# агрегатор пише кожні WRITE_INTERVAL_SEC. Час стиснутий у TIME_SCALE разів;
+# запити/хв перераховані назад у реальний час.
+#   legacy — нове з'єднання + SELECT * + фільтри/сортування/похідні колонки в pandas на кожен rerun
+#   sql    — спільний LiveData: фільтри, сортування і сторінка в SQLite (індекси), кеш на версію бази
+# Сесії мають різні фільтри (SESSION_FILTERS по колу) — як різні вкладки різних людей.
+
+BENCH_SESSIONS = 20
+BENCH_ROUTES = 3000
+REFRESH_SECONDS = 15
+WRITE_INTERVAL_SEC = 5
+TIME_SCALE = 5
+BENCH_DURATION_SEC = 24  # Реальних секунд на режим (= BENCH_DURATION_SEC * TIME_SCALE симульованих)
+
+EXCHANGES = ['Lighter', 'Paradex', 'Backpack', 'Extended', 'Variational']
+SESSION_FILTERS = [  # (min_spread, tokens, exchanges)
+    (-100.0, [], []),
+    (0.5, [], []),
+    (-100.0, [], ['Lighter']),
+    (0.0, ['TKN1', 'TKN2', 'TKN3'], ['Paradex', 'Backpack']),
+]
+
+
+class C:
+    CYAN = '\033[96m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 БАЗА І АГРЕГАТОР
+# ═══════════════════════════════════════════════════════════════════════════
+
+def make_db(path, n_routes, seed=7):
+    rng = np.random.default_rng(seed)
+    with closing(sqlite3.connect(path)) as conn:
+        conn.execute('PRAGMA journal_mode=WAL;')
+        conn.execute('''
+            CREATE TABLE live_opportunities (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, token TEXT, route TEXT, buy_exchange TEXT, sell_exchange TEXT,
+                buy_price REAL, sell_price REAL, spread_pct REAL, spread_min_24h REAL, spread_max_24h REAL,
+                buy_funding_rate REAL, buy_funding_freq INTEGER, sell_funding_rate REAL, sell_funding_freq INTEGER,
+                buy_funding_24h_pct REAL, sell_funding_24h_pct REAL, last_updated TIMESTAMP)
+        ''')
+        rows = []
+        for i in range(n_routes):
+            buy, sell = rng.choice(EXCHANGES, 2, replace=False)
+            price = float(rng.uniform(0.1, 5000))
+            rows.append((f"TKN{i // 10}", f"{buy}->{sell}", buy, sell, price, price * 1.001,
+                         float(rng.normal(0, 0.5)), -1.0, 1.0, float(rng.normal(0, 0.01)), int(rng.choice([1, 8])),
+                         float(rng.normal(0, 0.01)), int(rng.choice([1, 8])), 0.0, 0.0, '2026-01-01 00:00:00'))
+        conn.executemany('''
+            INSERT INTO live_opportunities (token, route, buy_exchange, sell_exchange, buy_price, sell_price,
+                spread_pct, spread_min_24h, spread_max_24h, buy_funding_rate, buy_funding_freq, sell_funding_rate,
+                sell_funding_freq, buy_funding_24h_pct, sell_funding_24h_pct, last_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        # Як init_target_db в agregator.py
+        conn.execute('CREATE INDEX idx_live_spread ON live_opportunities (spread_pct);')
+        conn.execute('CREATE INDEX idx_live_token ON live_opportunities (token, spread_pct);')
+        conn.execute('CREATE INDEX idx_live_buy ON live_opportunities (buy_exchange, spread_pct);')
+        conn.execute('CREATE INDEX idx_live_sell ON live_opportunities (sell_exchange, spread_pct);')
+        conn.commit()
+
+
+def writer_loop(path, stop, counter):
+    """Як write_dashboard_delta: частина маршрутів змінює спред, один коміт на цикл."""
+    rng = np.random.default_rng(8)
+    with closing(sqlite3.connect(path, timeout=10)) as conn:
+        while not stop.wait(WRITE_INTERVAL_SEC / TIME_SCALE):
+            ids = rng.integers(1, BENCH_ROUTES + 1, BENCH_ROUTES // 20)
+            conn.executemany("UPDATE live_opportunities SET spread_pct=? WHERE id=?",
+                             [(float(rng.normal(0, 0.5)), int(i)) for i in ids])
+            conn.commit()
+            counter[0] += 1
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🐢 СТАРИЙ ЗАВАНТАЖУВАЧ (вся таблиця в pandas на кожен rerun)
+# ═══════════════════════════════════════════════════════════════════════════
+
+class LegacyLoader:
+    def __init__(self, path):
+        self.path = path
+        self.queries = 0
+        self.rows_read = 0
+        self.lock = threading.Lock()
+
+    def query(self, min_spread=-100.0, tokens=(), exchanges=(), page=0, page_size=None):
+        """Як dashboard.py до SQL-фільтрів; page_size=None — всі рядки (старий дашборд не мав сторінок)."""
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        df = pd.read_sql_query("SELECT * FROM live_opportunities", conn)
+        conn.close()
+        with self.lock:
+            self.queries += 1
+            self.rows_read += len(df)
+
+        df = df[df['spread_pct'] >= min_spread]
+        if tokens: df = df[df['token'].isin(tokens)]
+        if exchanges:
+            buy, sell = df['buy_exchange'].isin(exchanges), df['sell_exchange'].isin(exchanges)
+            df = df[buy | sell] if len(exchanges) == 1 else df[buy & sell]
+        df = df.sort_values(by='spread_pct', ascending=False, kind='stable')  # Рівні спреди — за id
+        total = len(df)
+        top = df.iloc[0] if total else None
+        if page_size is not None: df = df.iloc[page * page_size:(page + 1) * page_size]
+        return dashboard_data.add_derived_columns(df.reset_index(drop=True)), total, top
+
+    def filter_options(self):
+        pass  # Старий дашборд брав варіанти з уже завантаженого фрейму
+
+    def close(self):
+        pass
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def run(loader, path, duration=BENCH_DURATION_SEC):
+    """(SELECT за хвилину, записів агрегатора за хвилину, reruns, рядків у pandas на rerun, тривалості rerun у с)."""
+    stop = threading.Event()
+    writes = [0]
+    latencies, latencies_lock = [], threading.Lock()
+
+    def session(index):
+        interval = REFRESH_SECONDS / TIME_SCALE
+        min_spread, tokens, exchanges = SESSION_FILTERS[index % len(SESSION_FILTERS)]
+        stop.wait(interval * index / BENCH_SESSIONS)  # Вкладки відкриті в різний час
+        while not stop.is_set():
+            start = time.perf_counter()
+            loader.filter_options()
+            loader.query(min_spread, tokens, exchanges)
+            with latencies_lock: latencies.append(time.perf_counter() - start)
+            stop.wait(interval)
+
+    threads = [threading.Thread(target=writer_loop, args=(path, stop, writes))] + \
+              [threading.Thread(target=session, args=(i,)) for i in range(BENCH_SESSIONS)]
+    for t in threads: t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads: t.join()
+    loader.close()
+
+    per_minute = 60 / (duration * TIME_SCALE)
+    return (loader.queries * per_minute, writes[0] * per_minute, len(latencies),
+            loader.rows_read / max(len(latencies), 1), np.array(latencies))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'arbitrage_dashboard.db')
+        make_db(path, BENCH_ROUTES)
+
+        print(f"\n{C.CYAN}🏁 DASHBOARD LOAD TEST ({BENCH_SESSIONS} sessions, rerun every {REFRESH_SECONDS}s, "
+              f"aggregator write every {WRITE_INTERVAL_SEC}s, {BENCH_ROUTES} routes, "
+              f"{BENCH_DURATION_SEC * TIME_SCALE / 60:.0f} simulated min){C.END}")
+        print(f"{'mode':>8} {'queries/min':>12} {'writes/min':>11} {'reruns':>7} {'rows/rerun':>11} "
+              f"{'rerun p50 ms':>13} {'p99 ms':>8}")
+
+        for name, loader in [('legacy', LegacyLoader(path)), ('sql', dashboard_data.LiveData(path))]:
+            queries, writes, reruns, rows, latencies = run(loader, path)
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            print(f"{name:>8} {queries:>12.1f} {writes:>11.1f} {reruns:>7} {rows:>11.0f} {p50:>13.2f} {p99:>8.2f}")
+
+        # SQL-сторінки збігаються з фільтрами pandas (кожен профіль, перша і друга сторінка)
+        legacy, live = LegacyLoader(path), dashboard_data.LiveData(path)
+        for min_spread, tokens, exchanges in SESSION_FILTERS:
+            for page in (0, 1):
+                expected = legacy.query(min_spread, tokens, exchanges, page, dashboard_data.PAGE_SIZE)
+                actual = live.query(min_spread, tokens, exchanges, page)
+                if expected[0].empty:
+                    assert actual[0].empty
+                else:
+                    pd.testing.assert_frame_equal(actual[0], expected[0])
+                assert actual[1] == expected[1]
+                assert (actual[2] is None) == (expected[2] is None)
+                if actual[2] is not None: pd.testing.assert_series_equal(actual[2], expected[2], check_names=False)
+        print(f"{C.GREEN}✅ SQL pages identical to pandas filtering ({len(SESSION_FILTERS)} filter sets x 2 pages).{C.END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MONITORS_DIR = os.path.join(PROJECT_ROOT, 'Dex_monitor')
+if MONITORS_DIR not in sys.path:
+    sys.path.append(MONITORS_DIR)
+
+from market_db import MarketDataWriter, MARKET_DATA_SCHEMA, quote_row
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+
+BATCH_TOKENS = 500
+BENCH_CYCLES = 40
+
+class C:
+    CYAN = '\033[96m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🐢 СТАРИЙ ЗАПИС (як save_to_db у paradex/extended до спільного writer)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def legacy_save_to_db(db_path, data_list, is_full_update):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        for row in data_list:
+            if is_full_update:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO market_data
+                    (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (row['Token'], row['Bid'], row['Ask'], row['Spread %'], row['Funding %'], row['Freq (h)'],
+                      row['OI ($)'], row['Volume 24h ($)'], timestamp))
+            else:
+                cursor.execute('''
+                    UPDATE market_data
+                    SET bid=?, ask=?, spread_pct=?, funding_pct=?, freq_hours=?, last_updated=?
+                    WHERE token=?
+                ''', (row['Bid'], row['Ask'], row['Spread %'], row['Funding %'], row['Freq (h)'], timestamp,
+                      row['Token']))
+                if cursor.rowcount == 0:
+                    cursor.execute('''
+                        INSERT INTO market_data
+                        (token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h, last_updated)
+                        VALUES (?, ?, ?, ?, ?, ?, 0, 0, ?)
+                    ''', (row['Token'], row['Bid'], row['Ask'], row['Spread %'], row['Funding %'], row['Freq (h)'],
+                          timestamp))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def make_batch(n_tokens, cycle):
+    return [{'Token': f"TKN{i}", 'Bid': 100 + i + cycle * 0.01, 'Ask': 100.1 + i + cycle * 0.01, 'Spread %': 0.1,
+             'Funding %': 0.001 * cycle, 'Freq (h)': 1, 'OI ($)': 1e6 + cycle, 'Volume 24h ($)': 1e7}
+            for i in range(n_tokens)]
+
+
+def make_db(folder, name):
+    path = os.path.join(folder, name)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL;')
+    conn.execute(MARKET_DATA_SCHEMA)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def dump(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT token, bid, ask, spread_pct, funding_pct, freq_hours, oi_usd, volume_24h FROM market_data ORDER BY token"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def run(batches, write_func):
+    start = time.perf_counter()
+    for batch, full in batches: write_func(batch, full)
+    return time.perf_counter() - start
+
+
+def main():
+    n_tokens = int(sys.argv[1]) if len(sys.argv) > 1 else BATCH_TOKENS
+    print(f"\n{C.CYAN}🏁 MARKET_DATA WRITE BENCHMARK ({n_tokens}-token batches, {BENCH_CYCLES} cycles){C.END}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'mode':>6} {'legacy rows/s':>14} {'writer rows/s':>14} {'speedup':>9}")
+        for mode, full in [('full', True), ('fast', False)]:
+            # Перший цикл завжди повний — таблиця заповнена, як у живому моніторі
+            batches = [(make_batch(n_tokens, c), full or c == 0) for c in range(BENCH_CYCLES)]
+            n_rows = n_tokens * BENCH_CYCLES
+
+            old_path = make_db(tmp, f"legacy_{mode}.db")
+            old_time = run(batches, lambda batch, is_full: legacy_save_to_db(old_path, batch, is_full))
+
+            new_path = make_db(tmp, f"writer_{mode}.db")
+            writer = MarketDataWriter(new_path)
+            new_time = run(batches, lambda batch, is_full: writer.write([quote_row(r) for r in batch], full=is_full))
+            writer.close()
+
+            assert dump(old_path) == dump(new_path), mode
+            print(f"{mode:>6} {n_rows / old_time:>14,.0f} {n_rows / new_time:>14,.0f} {old_time / new_time:>8.1f}x")
+
+    print(f"{C.GREEN}✅ Table contents identical.{C.END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+from contextlib import closing
+from datetime import datetime, timedelta
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import agregator
+from history_tiers import SpreadHistoryStore
+from spread_stats import TS_FORMAT
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Графік історії маршруту в дашборді (7 днів семплів кожні 15 с ≈ 40k рядків на маршрут):
+#   legacy — усі семпли вікна з spread_history (індекс idx_hist_token_route) у pandas і в браузер
+#   tiered — SpreadHistoryStore.load_downsampled: min/max по бакетах у SQLite, до CHART_POINTS точок
+# Час — запит + DataFrame + JSON-пейлоад графіка (те, що сервер готує і пересилає для малювання).
+
+BENCH_ROUTES = 10
+SAMPLE_EVERY_SEC = 15
+CHART_POINTS = 2000
+BENCH_WINDOWS_HOURS = [6, 24, 24 * 7]
+
+C = agregator.C
+
+
+def build_databases(legacy_path, tiered_path, end, seed=25):
+    """Однакові семпли в обох базах; tiered — міграція старої таблиці в рівні + ретеншн агрегатора."""
+    rng = np.random.default_rng(seed)
+    n_samples = int(agregator.HISTORY_RETENTION_DAYS * 86400 / SAMPLE_EVERY_SEC)
+    timestamps = [(end - timedelta(seconds=(i + 1) * SAMPLE_EVERY_SEC)).strftime(TS_FORMAT)
+                  for i in range(n_samples)][::-1]
+    series = {}
+    for path in (legacy_path, tiered_path):
+        with closing(sqlite3.connect(path)) as conn:
+            conn.execute('''
+                CREATE TABLE spread_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    token TEXT,
+                    route TEXT,
+                    spread_pct REAL,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute('CREATE INDEX idx_hist_token_route ON spread_history (token, route);')
+            conn.execute('CREATE INDEX idx_hist_time ON spread_history (timestamp);')
+            for r in range(BENCH_ROUTES):
+                key = (f"TKN{r}", "Lighter->Paradex")
+                if key not in series:
+                    spreads = np.cumsum(rng.normal(0, 0.02, n_samples))
+                    spreads[rng.choice(n_samples, 20, replace=False)] += rng.normal(0, 2, 20)  # Поодинокі сплески
+                    series[key] = pd.Series(spreads, index=timestamps)
+                conn.executemany("INSERT INTO spread_history (token, route, spread_pct, timestamp) VALUES (?, ?, ?, ?)",
+                                 [(*key, float(s), ts) for ts, s in series[key].items()])
+            conn.commit()
+
+    store = SpreadHistoryStore(agregator.RAW_HISTORY_RETENTION_HOURS, agregator.HISTORY_RETENTION_DAYS,
+                               agregator.ROLLUP_1H_RETENTION_DAYS)
+    with closing(sqlite3.connect(tiered_path)) as conn:
+        store.init(conn)
+        store.enforce_retention(conn, force=True)
+        conn.commit()
+    return store, series
+
+
+def legacy_chart(conn, token, route, start_ts, end_ts):
+    df = pd.read_sql_query("SELECT timestamp, spread_pct FROM spread_history "
+                           "WHERE token = ? AND route = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+                           conn, params=(token, route, start_ts, end_ts))
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return None, df
+
+
+def tiered_chart(store, conn, token, route, start_ts, end_ts):
+    tier, df = store.load_downsampled(conn, token, route, start_ts, end_ts, CHART_POINTS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return tier, df
+
+
+def measure(func, *args):
+    timings, rows, payload, tier = [], 0, 0, None
+    for _ in range(3):
+        start = time.perf_counter()
+        tier, df = func(*args)
+        body = df.to_json(orient='records', date_format='iso')
+        timings.append(time.perf_counter() - start)
+        rows, payload = len(df), len(body)
+    return min(timings), rows, payload, tier, df
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def main():
+    # Локальний час, як у SpreadHistoryStore.flush; вікна з початком на межі хвилини — як бакети 1m
+    end = datetime.now().replace(second=0, microsecond=0)
+    end_ts = end.strftime(TS_FORMAT)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path, tiered_path = os.path.join(tmp, 'legacy.db'), os.path.join(tmp, 'tiered.db')
+        build_start = time.perf_counter()
+        store, series = build_databases(legacy_path, tiered_path, end)
+        print(f"\n{C.CYAN}🏁 HISTORY CHART BENCHMARK ({BENCH_ROUTES} routes, {SAMPLE_EVERY_SEC}s samples, "
+              f"{agregator.HISTORY_RETENTION_DAYS}d history, ≤{CHART_POINTS} points; "
+              f"built in {time.perf_counter() - build_start:.1f}s){C.END}")
+        print(f"{'window':>8} | {'legacy rows':>11} {'ms':>7} {'KB':>8} | {'tier':>4} {'points':>7} {'ms':>7} "
+              f"{'KB':>7} | {'speedup':>7}")
+
+        with closing(sqlite3.connect(legacy_path)) as legacy_conn, closing(sqlite3.connect(tiered_path)) as conn:
+            for hours in BENCH_WINDOWS_HOURS:
+                start_ts = (end - timedelta(hours=hours)).strftime(TS_FORMAT)
+                totals = np.zeros(6)
+                tier = None
+                for (token, route), spreads in series.items():
+                    l_sec, l_rows, l_bytes, _, _ = measure(legacy_chart, legacy_conn, token, route, start_ts, end_ts)
+                    t_sec, t_rows, t_bytes, tier, df = measure(tiered_chart, store, conn, token, route, start_ts, end_ts)
+                    totals += (l_sec, l_rows, l_bytes, t_sec, t_rows, t_bytes)
+
+                    # Екстремуми вікна збережені, кожна точка — справжнє значення семпла, точок не більше ліміту
+                    window = spreads[(spreads.index >= start_ts) & (spreads.index < end_ts)]
+                    assert len(df) <= CHART_POINTS + 2, f"{len(df)} points"
+                    assert np.isclose(df['spread_pct'].min(), window.min()) and \
+                           np.isclose(df['spread_pct'].max(), window.max()), "window extremes lost"
+                    assert np.isin(df['spread_pct'].round(9), window.round(9)).all(), "point not in samples"
+
+                l_sec, l_rows, l_bytes, t_sec, t_rows, t_bytes = totals / len(series)
+                label = f"{hours // 24}d" if hours >= 24 else f"{hours}h"
+                print(f"{label:>8} | {l_rows:>11.0f} {l_sec * 1000:>7.2f} {l_bytes / 1024:>8.1f} | {tier:>4} "
+                      f"{t_rows:>7.0f} {t_sec * 1000:>7.2f} {t_bytes / 1024:>7.1f} | {l_sec / t_sec:>6.1f}x")
+
+    print(f"{C.GREEN}✅ Downsampled charts keep the window min/max and only real sample values.{C.END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import sys
+import os
+import json
+import time
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MONITORS_DIR = os.path.join(PROJECT_ROOT, 'Dex_monitor')
+if MONITORS_DIR not in sys.path:
+    sys.path.append(MONITORS_DIR)
+
+import fast_json
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+#   python bench_json_decode.py                    — синтетичні кадри
+#   python bench_json_decode.py <dir>              — записані кадри (<venue>.jsonl, один кадр на рядок)
+#   python bench_json_decode.py record <dir> [s]   — записати живі кадри Lighter/Backpack/Paradex (потрібна мережа)
+
+SYNTHETIC_FRAMES = 20000
+BOOK_LEVELS = 10  # Рівнів у синтетичному оновленні стакану
+REST_MARKETS = 300  # Ринків у синтетичній REST-відповіді
+BENCH_REPEATS = 3
+RECORD_SECONDS = 60
+RECORD_MARKETS = 10
+
+VENUES = ('lighter', 'backpack', 'paradex')
+
+
+class C:
+    CYAN = '\033[96m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 СИНТЕТИЧНІ КАДРИ (формат як у живих WSS/REST)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _levels(rng, price, n):
+    return [(f"{price * (1 + rng.uniform(-0.002, 0.002)):.4f}", f"{rng.uniform(0, 50):.3f}") for _ in range(n)]
+
+
+def make_frames(n, seed=5):
+    rng = np.random.default_rng(seed)
+    frames = {venue: [] for venue in VENUES}
+    for i in range(n):
+        price = float(rng.uniform(1, 5000))
+        mid = int(rng.integers(0, 100))
+        if i % 200 == 0:
+            stats = {str(m): {'current_funding_rate': f"{rng.normal(0, 1e-4):.6f}",
+                              'daily_quote_token_volume': float(rng.uniform(1e4, 1e8)),
+                              'open_interest': f"{rng.uniform(1, 1e6):.2f}"} for m in range(100)}
+            frames['lighter'].append(json.dumps({'type': 'update/market_stats', 'channel': 'market_stats:all',
+                                                 'market_stats': stats}))
+        else:
+            frames['lighter'].append(json.dumps({
+                'type': 'update/order_book', 'channel': f"order_book:{mid}", 'offset': i,
+                'order_book': {'code': 0,
+                               'bids': [{'price': p, 'size': s} for p, s in _levels(rng, price, BOOK_LEVELS)],
+                               'asks': [{'price': p, 'size': s} for p, s in _levels(rng, price, BOOK_LEVELS)]}}))
+
+        symbol = f"TKN{mid}_USDC_PERP"
+        kind = ('depth', 'depth', 'depth', 'ticker', 'markPrice', 'openInterest')[i % 6]
+        data = {'e': kind, 'E': 1700000000000000 + i, 's': symbol}
+        if kind == 'depth':
+            data.update({'b': _levels(rng, price, BOOK_LEVELS // 2), 'a': _levels(rng, price, BOOK_LEVELS // 2),
+                         'U': i, 'u': i + 1, 'T': 1700000000000000 + i})
+        elif kind == 'ticker':
+            data.update({'o': f"{price:.4f}", 'c': f"{price:.4f}", 'h': f"{price:.4f}", 'l': f"{price:.4f}",
+                         'v': f"{rng.uniform(1, 1e5):.2f}", 'V': f"{rng.uniform(1e4, 1e8):.2f}", 'n': 1000})
+        elif kind == 'markPrice':
+            data.update({'p': f"{price:.4f}", 'f': f"{rng.normal(0, 1e-4):.8f}", 'i': f"{price:.4f}",
+                         'n': 1700000000000})
+        else:
+            data.update({'o': f"{rng.uniform(1, 1e6):.2f}"})
+        frames['backpack'].append(json.dumps({'stream': f"{kind}.{symbol}", 'data': data}))
+
+        market = f"TKN{mid}-USD-PERP"
+        if i % 4:
+            payload = {'market': market, 'bid': f"{price:.4f}", 'bid_size': '1.5', 'ask': f"{price * 1.0004:.4f}",
+                       'ask_size': '2.0', 'last_updated_at': 1700000000000, 'seq_no': i}
+            channel = f"bbo.{market}"
+        else:
+            payload = {'market': market, 'funding_rate': f"{rng.normal(0, 1e-4):.8f}", 'funding_index': '1.0',
+                       'funding_premium': '0.0', 'created_at': 1700000000000}
+            channel = f"funding_data.{market}"
+        frames['paradex'].append(json.dumps({'jsonrpc': '2.0', 'method': 'subscription',
+                                             'params': {'channel': channel, 'data': payload}}))
+    return frames
+
+
+def make_rest_payload(n, seed=6):
+    """Схоже на /info/markets Extended: список ринків з вкладеною статистикою (кілька сотень KB)."""
+    rng = np.random.default_rng(seed)
+    markets = [{'name': f"TKN{i}-USD", 'status': 'ACTIVE', 'assetName': f"TKN{i}", 'active': True,
+                'marketStats': {k: f"{rng.uniform(0, 1e6):.6f}" for k in
+                                ('bidPrice', 'askPrice', 'markPrice', 'indexPrice', 'lastPrice', 'fundingRate',
+                                 'openInterest', 'dailyVolume', 'dailyVolumeBase', 'dailyPriceChange', 'dailyLow',
+                                 'dailyHigh', 'openInterestBase', 'nextFundingRate')},
+                'tradingConfig': {k: f"{rng.uniform(0, 100):.4f}" for k in
+                                  ('minOrderSize', 'minOrderSizeChange', 'minPriceChange', 'maxMarketOrderValue',
+                                   'maxLimitOrderValue', 'maxPositionValue', 'maxLeverage')}}
+               for i in range(n)]
+    return json.dumps({'status': 'OK', 'data': markets}).encode()
+
+
+def load_frames(folder):
+    frames = {}
+    for venue in VENUES:
+        path = os.path.join(folder, f"{venue}.jsonl")
+        if os.path.exists(path):
+            with open(path) as f: frames[venue] = [line.rstrip('\n') for line in f if line.strip()]
+    return frames
+
+
+def record_frames(folder, seconds=RECORD_SECONDS):
+    """Пише сирі кадри живих WSS у <folder>/<venue>.jsonl (по RECORD_MARKETS ринків на біржу)."""
+    import threading
+    import websocket
+
+    subscriptions = {
+        'lighter': ("wss://mainnet.zklighter.elliot.ai/stream",
+                    [{"type": "subscribe", "channel": "market_stats/all"}] +
+                    [{"type": "subscribe", "channel": f"order_book/{mid}"} for mid in range(RECORD_MARKETS)]),
+        'backpack': ("wss://ws.backpack.exchange",
+                     [{"method": "SUBSCRIBE", "params": [f"{kind}.{sym}_USDC_PERP" for sym in
+                                                         ('BTC', 'ETH', 'SOL', 'DOGE', 'XRP')[:RECORD_MARKETS]
+                                                         for kind in ('depth', 'ticker', 'markPrice', 'openInterest')]}]),
+        'paradex': ("wss://ws.api.prod.paradex.trade/v1",
+                    [{"jsonrpc": "2.0", "method": "subscribe", "params": {"channel": f"{kind}.{sym}-USD-PERP"}, "id": i}
+                     for i, (sym, kind) in enumerate((s, k) for s in ('BTC', 'ETH', 'SOL') for k in ('bbo', 'funding_data'))]),
+    }
+    os.makedirs(folder, exist_ok=True)
+
+    def record(venue, url, messages):
+        deadline = time.time() + seconds
+        count = 0
+        ws = websocket.create_connection(url, timeout=10)
+        try:
+            for msg in messages: ws.send(json.dumps(msg))
+            with open(os.path.join(folder, f"{venue}.jsonl"), 'w') as f:
+                while time.time() < deadline:
+                    try:
+                        frame = ws.recv()
+                    except websocket.WebSocketTimeoutException:
+                        continue
+                    if frame:
+                        f.write(frame.replace('\n', '') + '\n')
+                        count += 1
+        finally:
+            ws.close()
+        print(f"✅ {venue}: {count} frames")
+
+    threads = [threading.Thread(target=record, args=(venue, url, msgs)) for venue, (url, msgs) in subscriptions.items()]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def measure(func, items):
+    """(повідомлень/с — найкращий з BENCH_REPEATS прогонів, результати окремим проходом).
+    Під час заміру результати не накопичуються — як в on_message, де кадр одразу застосовується."""
+    best = float('inf')
+    for _ in range(BENCH_REPEATS):
+        start = time.perf_counter()
+        for item in items: func(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best, [func(item) for item in items]
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == 'record':
+        record_frames(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else RECORD_SECONDS)
+        return
+
+    frames = make_frames(SYNTHETIC_FRAMES)
+    if len(sys.argv) > 1:
+        recorded = load_frames(sys.argv[1])
+        frames.update(recorded)
+        print(f"📼 Recorded frames: {', '.join(f'{v} ({len(f)})' for v, f in recorded.items()) or 'none'}")
+    rest = make_rest_payload(REST_MARKETS)
+
+    decoders = [name for name in ('json', 'orjson', 'msgspec') if name in fast_json.DECODERS]
+    print(f"\n{C.CYAN}🏁 JSON DECODE BENCHMARK (decoders: {', '.join(decoders)}){C.END}")
+    print(f"{'stream':>22} " + ' '.join(f"{name + ' msg/s':>15}" for name in decoders) + f" {'speedup':>8}")
+
+    streams = [(f"{venue} WSS ({len(frames[venue])})", venue) for venue in VENUES] + \
+              [(f"REST {len(rest) // 1024} KB x 50", 'rest')]
+    for label, venue in streams:
+        rates, reference = [], None
+        for name in decoders:
+            fast_json.use(name)
+            func = fast_json.loads if venue == 'rest' else getattr(fast_json, f"decode_{venue}")
+            items = [rest] * 50 if venue == 'rest' else frames[venue]
+            rate, results = measure(func, items)
+            if reference is None:
+                reference = results
+            else:
+                assert results == reference, (venue, name)
+            rates.append(rate)
+        print(f"{label:>22} " + ' '.join(f"{rate:>15,.0f}" for rate in rates) + f" {rates[-1] / rates[0]:>7.1f}x")
+
+    fast_json.use()
+    print(f"{C.GREEN}✅ Identical decoded output for every decoder. Default: {fast_json.decoder.name}.{C.END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import sys
+import os
+import json
+import time
+import threading
+import http.client
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import agregator
+from live_feed import LiveFeed
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Push-режим дашборду: BENCH_CLIENTS підписників SSE, агрегатор публікує BENCH_UPDATES циклів,
+# у кожному змінюється CHANGED_SHARE маршрутів (і частина зникає/з'являється).
+# Порівнюємо байти на оновлення з повною таблицею, яку опитування пересилає щоразу,
+# і перевіряємо, що стан кожного клієнта (snapshot + диффи) збігається зі станом агрегатора.
+
+BENCH_CLIENTS = 20
+BENCH_ROUTES = 3000
+BENCH_UPDATES = 50
+CHANGED_SHARE = 0.05
+CHURN_SHARE = 0.005  # Маршрутів, що зникають і з'являються за цикл
+UPDATE_INTERVAL_SEC = 0.05
+
+C = agregator.C
+COLUMNS = [db_col for _, db_col in agregator.DASHBOARD_COLUMNS]
+EXCHANGES = ['Lighter', 'Paradex', 'Backpack', 'Extended', 'Variational']
+
+
+def make_row(rng, token, buy, sell):
+    values = {'token': token, 'route': f"{buy}->{sell}", 'buy_exchange': buy, 'sell_exchange': sell,
+              'buy_funding_freq': 1, 'sell_funding_freq': 8}
+    return tuple(values[c] if c in values else round(float(rng.normal(0, 1)), 5) for c in COLUMNS)
+
+
+class SseClient(threading.Thread):
+    """Тримає стан як push-таблиця в браузері: snapshot, далі диффи по порядку seq."""
+
+    def __init__(self, port):
+        super().__init__(daemon=True)
+        self.port = port
+        self.routes = {}
+        self.seq = None
+        self.received = 0
+        self.diff_bytes = []
+        self.ready = threading.Event()
+        self.errors = 0
+
+    def run(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        conn.request('GET', '/events')
+        response = conn.getresponse()
+        event, data = None, None
+        for raw in response:
+            self.received += len(raw)
+            line = raw.decode().rstrip('\n')
+            if line.startswith('event: '):
+                event = line[7:]
+            elif line.startswith('data: '):
+                data = line[6:]
+            elif not line and event:
+                self.apply(event, json.loads(data), len(data))
+                event, data = None, None
+
+    def apply(self, event, payload, size):
+        if event == 'snapshot':
+            self.routes = {r['key']: r for r in payload['rows']}
+            self.seq = payload['seq']
+            self.ready.set()
+            return
+        if payload['seq'] != self.seq + 1: self.errors += 1
+        self.seq = payload['seq']
+        self.diff_bytes.append(size)
+        for r in payload['upsert']: self.routes[r['key']] = r
+        for key in payload['remove']: self.routes.pop(key, None)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def main():
+    rng = np.random.default_rng(21)
+    keys = [(f"TKN{i // 10}", *rng.choice(EXCHANGES, 2, replace=False)) for i in range(BENCH_ROUTES)]
+    rows = {key: make_row(rng, *key) for key in keys}
+    next_token = BENCH_ROUTES // 10 + 1
+
+    feed = LiveFeed(COLUMNS).start()
+    feed.replace(rows)
+    full_table_bytes = len(feed.snapshot_json())
+
+    clients = [SseClient(feed.server.server_address[1]) for _ in range(BENCH_CLIENTS)]
+    for client in clients: client.start()
+    for client in clients: client.ready.wait(10)
+
+    print(f"\n{C.CYAN}🏁 LIVE FEED BENCHMARK ({BENCH_CLIENTS} SSE clients, {BENCH_ROUTES} routes, "
+          f"{BENCH_UPDATES} updates, {CHANGED_SHARE:.0%} changed per update){C.END}")
+
+    publish_cpu = 0.0
+    for _ in range(BENCH_UPDATES):
+        live = list(rows)
+        for i in rng.choice(len(live), int(len(live) * CHANGED_SHARE), replace=False):
+            rows[live[i]] = make_row(rng, *live[i])
+        for i in rng.choice(len(live), int(len(live) * CHURN_SHARE), replace=False):
+            rows.pop(live[i], None)
+            key = (f"TKN{next_token}", *rng.choice(EXCHANGES, 2, replace=False))
+            rows[key] = make_row(rng, *key)
+            next_token += 1
+
+        start = time.process_time()
+        feed.replace(rows)
+        publish_cpu += time.process_time() - start
+        time.sleep(UPDATE_INTERVAL_SEC)
+
+    deadline = time.time() + 10
+    while time.time() < deadline and any(c.seq != feed.seq for c in clients): time.sleep(0.05)
+
+    diff_bytes = np.mean([np.mean(c.diff_bytes) for c in clients])
+    print(f"{'full table per viewer update':>32}: {full_table_bytes / 1024:>8.1f} KB (polling re-sends it every rerun)")
+    print(f"{'diff per viewer update':>32}: {diff_bytes / 1024:>8.1f} KB ({diff_bytes / full_table_bytes:.1%})")
+    print(f"{'publish CPU per update':>32}: {publish_cpu / BENCH_UPDATES * 1000:>8.2f} ms (diff + fan-out, all clients)")
+
+    ok = all(c.seq == feed.seq and c.errors == 0 and c.routes == feed.routes for c in clients)
+    feed.stop()
+    assert ok, "client state diverged from the feed"
+    print(f"{C.GREEN}✅ Every client state (snapshot + {feed.seq} diffs) equals the aggregator state.{C.END}")
+
+
+if __name__ == "__main__":
+    main()
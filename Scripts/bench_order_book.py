@@ -0,0 +1,241 @@
+import sys
+import os
+import json
+import time
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MONITORS_DIR = os.path.join(PROJECT_ROOT, 'Dex_monitor')
+if MONITORS_DIR not in sys.path:
+    sys.path.append(MONITORS_DIR)
+
+from order_book import OrderBook, to_ticks, price_scale
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Запуск:
+#   python bench_order_book.py                      — синтетичний потік у форматі Lighter
+#   python bench_order_book.py stream.jsonl         — реплей записаного потоку
+#   python bench_order_book.py record stream.jsonl 60  — записати 60 с живого Lighter WS
+
+BENCH_MARKETS = 100
+BENCH_DEPTH = 500  # Рівнів на сторону після прогріву
+BENCH_MESSAGES = 50000
+LEVELS_PER_MESSAGE = 6
+PRICE_DECIMALS = 2
+RECORDED_PRICE_DECIMALS = 8  # Для запису справжні знаки невідомі — беремо з запасом
+READ_CYCLES = 200  # Скільки разів читаємо top-of-book усіх ринків
+
+class C:
+    CYAN = '\033[96m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🐢 СТАРА РЕАЛІЗАЦІЯ (dict з рядковими цінами + max/min по всіх ключах)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def legacy_apply(books, mid, ob_data):
+    if mid not in books:
+        books[mid] = {'bids': {}, 'asks': {}}
+    for b in ob_data.get('bids', []):
+        price_str = str(b['price'])
+        size = float(b['size'])
+        if size == 0:
+            books[mid]['bids'].pop(price_str, None)
+        else:
+            books[mid]['bids'][price_str] = size
+    for a in ob_data.get('asks', []):
+        price_str = str(a['price'])
+        size = float(a['size'])
+        if size == 0:
+            books[mid]['asks'].pop(price_str, None)
+        else:
+            books[mid]['asks'][price_str] = size
+
+
+def legacy_top(book):
+    bids_prices = [float(p) for p in book['bids'].keys()]
+    asks_prices = [float(p) for p in book['asks'].keys()]
+    return (max(bids_prices) if bids_prices else 0.0), (min(asks_prices) if asks_prices else 0.0)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 НОВА РЕАЛІЗАЦІЯ (як у lighter_monitor.on_message / update_db_loop)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def new_parse(ob_data, scale):
+    """Частина on_message, що виконується ДО data_lock."""
+    bids = [(to_ticks(b['price'], scale), float(b['size'])) for b in ob_data.get('bids', [])]
+    asks = [(to_ticks(a['price'], scale), float(a['size'])) for a in ob_data.get('asks', [])]
+    return bids, asks
+
+
+def new_apply(books, mid, levels, decimals):
+    """Частина on_message під data_lock."""
+    book = books.get(mid)
+    if book is None:
+        book = books[mid] = OrderBook(decimals)
+    book.apply_ticks(*levels)
+
+
+def new_top(book):
+    return book.best_bid(), book.best_ask()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 ПОТІК ПОВІДОМЛЕНЬ
+# ═══════════════════════════════════════════════════════════════════════════
+
+def make_stream(n_markets, depth, n_messages, seed=3):
+    """
+    Синтетичний update/order_book: спочатку по depth рівнів на сторону,
+    далі — зміни розмірів, зняття і додавання рівнів біля кращих цін (як у живому потоці).
+    """
+    rng = np.random.default_rng(seed)
+    fmt = f"{{:.{PRICE_DECIMALS}f}}"
+    tick = 10 ** -PRICE_DECIMALS
+    mids = rng.uniform(1, 5000, n_markets).round(PRICE_DECIMALS)
+    messages = []
+
+    for m in range(n_markets):
+        bids = [{'price': fmt.format(mids[m] - (i + 1) * tick), 'size': f"{rng.uniform(1, 100):.3f}"} for i in range(depth)]
+        asks = [{'price': fmt.format(mids[m] + (i + 1) * tick), 'size': f"{rng.uniform(1, 100):.3f}"} for i in range(depth)]
+        messages.append({'type': 'update/order_book', 'channel': f"order_book:{m}",
+                         'order_book': {'bids': bids, 'asks': asks}})
+
+    for _ in range(n_messages):
+        m = int(rng.integers(n_markets))
+        mids[m] += int(rng.integers(-2, 3)) * tick
+        book = {'bids': [], 'asks': []}
+        for _ in range(LEVELS_PER_MESSAGE):
+            side = 'bids' if rng.random() < 0.5 else 'asks'
+            offset = int(rng.geometric(0.2))  # Більшість змін — біля верху стакану
+            price = mids[m] - offset * tick if side == 'bids' else mids[m] + offset * tick
+            size = 0 if rng.random() < 0.3 else rng.uniform(1, 100)
+            book[side].append({'price': fmt.format(price), 'size': f"{size:.3f}"})
+        messages.append({'type': 'update/order_book', 'channel': f"order_book:{m}", 'order_book': book})
+
+    return messages
+
+
+def load_stream(path):
+    """JSONL сирих WS-повідомлень; беремо тільки update/order_book."""
+    messages = []
+    with open(path) as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except:
+                continue
+            if data.get('type') == 'update/order_book':
+                messages.append(data)
+    return messages
+
+
+def record_stream(path, seconds):
+    """Записує живий потік Lighter у JSONL (потрібна мережа)."""
+    import websocket
+    import lighter_monitor
+
+    markets = lighter_monitor.get_market_map()
+    ws = websocket.create_connection(lighter_monitor.WS_URL, timeout=10)
+    for mid in markets:
+        ws.send(json.dumps({"type": "subscribe", "channel": f"order_book/{mid}"}))
+
+    count, deadline = 0, time.time() + seconds
+    with open(path, 'w') as f:
+        while time.time() < deadline:
+            try:
+                f.write(ws.recv() + '\n')
+                count += 1
+            except Exception as e:
+                print(f"{C.YELLOW}⚠️ {e}{C.END}")
+                break
+    ws.close()
+    print(f"{C.GREEN}✅ Recorded {count} messages -> {path}{C.END}")
+
+
+def channel_mid(data):
+    return int(data['channel'].split(':')[1])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def replay_legacy(messages):
+    books = {}
+    start = time.perf_counter()
+    for data in messages:
+        legacy_apply(books, channel_mid(data), data.get('order_book', {}))
+    return time.perf_counter() - start, books
+
+
+def replay_new(messages, decimals):
+    """Повертає (час парсингу поза локом, час застосування під локом, книги)."""
+    scale = price_scale(decimals)
+    start = time.perf_counter()
+    parsed = [(channel_mid(data), new_parse(data.get('order_book', {}), scale)) for data in messages]
+    parse_time = time.perf_counter() - start
+
+    books = {}
+    start = time.perf_counter()
+    for mid, levels in parsed:
+        new_apply(books, mid, levels, decimals)
+    return parse_time, time.perf_counter() - start, books
+
+
+def read_tops(books, top_func):
+    start = time.perf_counter()
+    for _ in range(READ_CYCLES):
+        tops = {mid: top_func(book) for mid, book in books.items()}
+    return time.perf_counter() - start, tops
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'record':
+        record_stream(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 60)
+        return
+
+    print(f"\n{C.CYAN}🏁 ORDER BOOK BENCHMARK (str-dict vs sorted ticks){C.END}")
+    if len(sys.argv) > 1:
+        messages = load_stream(sys.argv[1])
+        decimals = RECORDED_PRICE_DECIMALS
+        print(f"📼 Replay: {sys.argv[1]}")
+    else:
+        messages = make_stream(BENCH_MARKETS, BENCH_DEPTH, BENCH_MESSAGES)
+        decimals = PRICE_DECIMALS
+        print(f"🧪 Synthetic: {BENCH_MARKETS} markets, depth {BENCH_DEPTH}, {BENCH_MESSAGES} updates")
+    n_levels = sum(len(m.get('order_book', {}).get('bids', [])) + len(m.get('order_book', {}).get('asks', []))
+                   for m in messages)
+
+    old_upd, old_books = replay_legacy(messages)
+    new_parse_time, new_lock_time, new_books = replay_new(messages, decimals)
+    new_upd = new_parse_time + new_lock_time
+    old_read, old_tops = read_tops(old_books, legacy_top)
+    new_read, new_tops = read_tops(new_books, new_top)
+
+    for mid, (bid, ask) in old_tops.items():
+        assert abs(new_tops[mid][0] - bid) < 1e-9 and abs(new_tops[mid][1] - ask) < 1e-9, mid
+
+    n_msgs, n_reads = len(messages), READ_CYCLES * len(old_books)
+    print(f"{'':>24} {'str-dict':>14} {'sorted ticks':>14} {'ratio':>9}")
+    print(f"{'updates, msg/s':>24} {n_msgs / old_upd:>14,.0f} {n_msgs / new_upd:>14,.0f} {old_upd / new_upd:>8.1f}x")
+    print(f"{'updates, level/s':>24} {n_levels / old_upd:>14,.0f} {n_levels / new_upd:>14,.0f}")
+    # Старий on_message робив усе під data_lock; новий — тільки apply_ticks
+    print(f"{'lock held per msg, us':>24} {old_upd / n_msgs * 1e6:>14.2f} {new_lock_time / n_msgs * 1e6:>14.2f} {old_upd / new_lock_time:>8.1f}x")
+    print(f"{'top-of-book, read/s':>24} {n_reads / old_read:>14,.0f} {n_reads / new_read:>14,.0f} {old_read / new_read:>8.1f}x")
+    print(f"{'cycle read (all mkts), ms':>24} {old_read / READ_CYCLES * 1e3:>14.3f} {new_read / READ_CYCLES * 1e3:>14.3f}")
+    print(f"{C.GREEN}✅ Best bid/ask identical for {len(old_tops)} markets.{C.END}")
+
+
+if __name__ == "__main__":
+    main()
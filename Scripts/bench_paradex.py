@@ -0,0 +1,164 @@
+import sys
+import os
+import time
+import concurrent.futures
+import requests
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MONITORS_DIR = os.path.join(PROJECT_ROOT, 'Dex_monitor')
+if MONITORS_DIR not in sys.path:
+    sys.path.append(MONITORS_DIR)
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import paradex_monitor
+from paradex_stub import StubServer, make_payloads, load_payloads
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+#   python bench_paradex.py            — синтетичні відповіді
+#   python bench_paradex.py <dir>      — записані відповіді (python paradex_stub.py record <dir>)
+#
+# Перед заміром — перевірка bulk і fallback на стабі: fetch_all_summaries віддає рівно ті символи, що є
+# в market=ALL, а fetch_cycle дозапитує по одному решту (і всі, якщо bulk-запит не вдався).
+
+BENCH_MARKETS = 250
+BENCH_CYCLES = 3
+HIDDEN_FROM_BULK = 5  # Символів, яких немає в market=ALL — перевіряємо fallback
+
+C = paradex_monitor.C
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🐢 СТАРИЙ ЦИКЛ (новий пул на кожен цикл, requests.get без сесії, запит на символ)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def legacy_get_json(url, params=None, retries=3):
+    for i in range(retries):
+        try:
+            response = requests.get(url, params=params, headers=paradex_monitor.HEADERS, timeout=10)
+            if response.status_code == 429:
+                time.sleep(1 + i)
+                continue
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            if i == retries - 1: return None
+            time.sleep(0.5)
+    return None
+
+
+def legacy_fetch_pair_summary(symbol, freq):
+    data = legacy_get_json(f"{paradex_monitor.API_BASE}/markets/summary", params={'market': symbol})
+    if not data or 'results' not in data or not data['results']: return None
+    item = dict(data['results'][0])
+    item.setdefault('symbol', symbol)
+    return paradex_monitor.parse_summary(item, freq)
+
+
+def legacy_cycle(symbols, freq_map):
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
+        futures = [executor.submit(legacy_fetch_pair_summary, sym, freq_map[sym]) for sym in symbols]
+        for future in concurrent.futures.as_completed(futures):
+            data = future.result()
+            if data: results.append(data)
+    return results
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ✅ ПЕРЕВІРКА BULK / FALLBACK
+# ═══════════════════════════════════════════════════════════════════════════
+
+def check_fetch_modes(markets, summary_all, hidden):
+    """Кількість запитів на цикл і набір рядків у кожному режимі; повертає еталонні рядки."""
+    paradex_monitor.BULK_FETCH = True
+    reference = None
+    for fail_bulk in (False, True):
+        stub = StubServer(markets, summary_all, hide_from_bulk=hidden, fail_bulk=fail_bulk,
+                          latency=0, connect_latency=0).start()
+        paradex_monitor.API_BASE = stub.base_url
+        try:
+            freq_map = paradex_monitor.get_markets_meta()
+            symbols = list(freq_map.keys())
+
+            stub.reset_counters()
+            bulk = paradex_monitor.fetch_all_summaries(freq_map)
+            expected = set() if fail_bulk else set(symbols) - set(hidden)
+            assert set(bulk) == expected, f"bulk: {len(bulk)} symbols, expected {len(expected)}"
+            assert stub.requests == 1, f"bulk: {stub.requests} requests"
+
+            stub.reset_counters()
+            rows = sorted(paradex_monitor.fetch_cycle(symbols, freq_map), key=lambda r: r['Token'])
+            per_symbol = len(symbols) if fail_bulk else len(set(hidden) & set(symbols))
+            assert stub.requests == 1 + per_symbol, f"cycle: {stub.requests} requests, expected {1 + per_symbol}"
+            assert len(rows) == len(symbols), f"cycle: {len(rows)} rows for {len(symbols)} symbols"
+            if reference is None: reference = rows
+            assert rows == reference, "bulk failure changed the rows"
+        finally:
+            stub.stop()
+    return reference
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def new_cycle(bulk):
+    def run(symbols, freq_map):
+        paradex_monitor.BULK_FETCH = bulk
+        return paradex_monitor.fetch_cycle(symbols, freq_map)
+    return run
+
+
+def measure(stub, cycle_func, symbols, freq_map):
+    """(запитів за цикл, нових з'єднань за цикл, секунд на цикл, результат останнього циклу)."""
+    stub.reset_counters()
+    start = time.perf_counter()
+    for _ in range(BENCH_CYCLES):
+        results = cycle_func(symbols, freq_map)
+    elapsed = (time.perf_counter() - start) / BENCH_CYCLES
+    return stub.requests / BENCH_CYCLES, stub.connections / BENCH_CYCLES, elapsed, results
+
+
+def main():
+    if len(sys.argv) > 1:
+        markets, summary_all = load_payloads(sys.argv[1])
+        print(f"📼 Recorded payloads: {sys.argv[1]}")
+    else:
+        markets, summary_all = make_payloads(BENCH_MARKETS)
+        print(f"🧪 Synthetic payloads: {BENCH_MARKETS} markets")
+
+    hidden = [item['symbol'] for item in summary_all['results'][:HIDDEN_FROM_BULK]]
+    reference = check_fetch_modes(markets, summary_all, hidden)
+    print(f"{C.GREEN}✅ Bulk: 1 request; fallback: {HIDDEN_FROM_BULK} hidden symbols, or all if bulk fails.{C.END}")
+
+    stub = StubServer(markets, summary_all, hide_from_bulk=hidden).start()
+    paradex_monitor.API_BASE = stub.base_url
+    print(f"\n{C.CYAN}🏁 PARADEX FETCH BENCHMARK (stub: {stub.latency * 1000:.0f}ms/request, "
+          f"{stub.connect_latency * 1000:.0f}ms/connection){C.END}")
+
+    try:
+        freq_map = paradex_monitor.get_markets_meta()
+        symbols = list(freq_map.keys())
+
+        print(f"{'mode':>28} {'requests':>9} {'conns':>7} {'cycle, s':>9} {'rows':>6}")
+        for name, func in [('legacy (per symbol)', legacy_cycle),
+                           (f'per symbol, pool, {paradex_monitor.HTTP_RATE_PER_SEC} req/s', new_cycle(bulk=False)),
+                           ('bulk + fallback', new_cycle(bulk=True))]:
+            n_req, n_conn, elapsed, results = measure(stub, func, symbols, freq_map)
+            rows = sorted(results, key=lambda r: r['Token'])
+            assert rows == reference, name
+            print(f"{name:>28} {n_req:>9.0f} {n_conn:>7.0f} {elapsed:>9.3f} {len(rows):>6}")
+    finally:
+        paradex_monitor.shutdown()
+        stub.stop()
+
+    print(f"{C.GREEN}✅ Same rows in every mode ({HIDDEN_FROM_BULK} symbols served via fallback).{C.END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import sys
+import os
+import json
+import time
+import resource
+import tracemalloc
+import tempfile
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MONITORS_DIR = os.path.join(PROJECT_ROOT, 'Dex_monitor')
+if MONITORS_DIR not in sys.path:
+    sys.path.append(MONITORS_DIR)
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import paradex_monitor
+from http_client import HttpClient
+from paradex_stub import StubServer, make_payloads
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Запит на кожен символ (BULK_FETCH = False): пул потоків vs asyncio.
+# Кожен режим — в окремому процесі (чистий пік RSS), stub — у головному.
+# Бюджет запитів піднято, щоб вимірювалась конкурентність, а не token bucket.
+#
+#   python bench_paradex_async.py [markets ...]
+
+BENCH_MARKETS = (250, 1000)
+BENCH_CYCLES = 3
+BENCH_RATE_PER_SEC = 100000
+
+C = paradex_monitor.C
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 ДОЧІРНІЙ ПРОЦЕС (один режим)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def run_cycle(symbols, freq_map):
+    """(рядків, секунд до першого пакета, секунд на цикл)."""
+    rows = first = 0
+    start = time.perf_counter()
+    for batch in paradex_monitor.fetch_cycle_stream(symbols, freq_map):
+        if not first: first = time.perf_counter() - start
+        paradex_monitor.save_to_db(batch, True)
+        rows += len(batch)
+    return rows, first, time.perf_counter() - start
+
+
+def child(mode, base_url, db_path):
+    paradex_monitor.API_BASE = base_url
+    paradex_monitor.BULK_FETCH = False
+    paradex_monitor.ASYNC_FETCH = mode == 'asyncio'
+    paradex_monitor.http = HttpClient('Paradex', headers=paradex_monitor.HEADERS, rate_per_sec=BENCH_RATE_PER_SEC,
+                                      pool_size=paradex_monitor.FETCH_WORKERS)
+    paradex_monitor.db_writer = paradex_monitor.MarketDataWriter(db_path)
+    paradex_monitor.db_writer.init_schema()
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    freq_map = paradex_monitor.get_markets_meta()
+    symbols = list(freq_map.keys())
+
+    # Перший цикл — холодний (пул/сесія, з'єднання); далі — усталений режим
+    _, _, cold = run_cycle(symbols, freq_map)
+    firsts, walls = [], []
+    for _ in range(BENCH_CYCLES):
+        rows, first, wall = run_cycle(symbols, freq_map)
+        firsts.append(first)
+        walls.append(wall)
+
+    tracemalloc.start()
+    run_cycle(symbols, freq_map)
+    heap_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    paradex_monitor.shutdown()
+    print(json.dumps({'rows': rows, 'cold': cold, 'first': min(firsts), 'wall': min(walls),
+                      'heap_mb': heap_peak / 2 ** 20, 'rss_mb': (rss_peak - rss_before) / 1024}))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def run_mode(mode, base_url, db_path):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, base_url, db_path],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or list(BENCH_MARKETS)
+    print(f"\n{C.CYAN}🏁 PARADEX PER-SYMBOL FETCH: THREADS ({paradex_monitor.FETCH_WORKERS} workers) vs ASYNCIO "
+          f"(semaphore {paradex_monitor.ASYNC_CONCURRENCY}){C.END}")
+    print(f"{'markets':>8} {'mode':>8} {'cold, s':>8} {'cycle, s':>9} {'1st batch, s':>13} "
+          f"{'heap peak, MB':>14} {'RSS +, MB':>10} {'rows':>6}")
+
+    for n in sizes:
+        markets, summary_all = make_payloads(n)
+        stub = StubServer(markets, summary_all).start()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                for mode in ('threads', 'asyncio'):
+                    r = run_mode(mode, stub.base_url, os.path.join(tmp, f"{mode}.db"))
+                    print(f"{n:>8} {mode:>8} {r['cold']:>8.3f} {r['wall']:>9.3f} {r['first']:>13.3f} "
+                          f"{r['heap_mb']:>14.2f} {r['rss_mb']:>10.1f} {r['rows']:>6}")
+                    assert r['rows'] == n, mode
+        finally:
+            stub.stop()
+
+    print(f"{C.GREEN}✅ All symbols fetched in both modes.{C.END}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        main()
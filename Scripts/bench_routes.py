@@ -0,0 +1,187 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import agregator
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+
+BENCH_SIZES = [100, 1000, 10000]
+BENCH_REPEATS = 3
+EXCHANGES = [db['name'] for db in agregator.SOURCE_DBS]
+
+C = agregator.C
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🐢 СТАРА РЕАЛІЗАЦІЯ (groupby + подвійний iterrows) — еталон для порівняння
+# ═══════════════════════════════════════════════════════════════════════════
+
+def legacy_calculate_live_routes(all_data_df, discovery_map, funding_24h_df, last_updated_map):
+    if all_data_df.empty: return pd.DataFrame()
+    results = []
+    grouped = all_data_df.groupby('token')
+    current_time = datetime.now()
+
+    f24_map = {}
+    if not funding_24h_df.empty:
+        f24_map = funding_24h_df.set_index(['exchange', 'token'])['funding_24h'].to_dict()
+
+    for token, group in grouped:
+        if len(group) < 2: continue
+
+        # 1. Перевірка на новий токен
+        is_new_token = False
+        if token in discovery_map:
+            if (current_time - discovery_map[token]).total_seconds() / 3600 < agregator.NEW_TOKEN_GRACE_PERIOD_HOURS:
+                is_new_token = True
+
+        # 2. 🔥 ПЕРЕВІРКА НА FORCE UPDATE
+        force_update = False
+        if token in last_updated_map:
+            if (current_time - last_updated_map[token]).total_seconds() > agregator.FORCE_UPDATE_TIMEOUT_SEC:
+                force_update = True
+        else:
+            force_update = True
+
+        # MAKER ЛОГІКА (Buy @ Bid, Sell @ Ask)
+        potential_buys = group[group['bid'] > 0]
+        potential_sells = group[group['ask'] > 0]
+
+        for _, buy_row in potential_buys.iterrows():
+            if not is_new_token and not force_update and (
+                    buy_row['oi_usd'] < agregator.MIN_OI_USD or buy_row['volume_24h'] < agregator.MIN_VOL_USD): continue
+
+            for _, sell_row in potential_sells.iterrows():
+                if not is_new_token and not force_update and (
+                        sell_row['oi_usd'] < agregator.MIN_OI_USD or sell_row['volume_24h'] < agregator.MIN_VOL_USD): continue
+                if buy_row['exchange'] == sell_row['exchange']: continue
+
+                time_diff = abs((buy_row['last_updated'] - sell_row['last_updated']).total_seconds())
+
+                # Ігноруємо розсинхрон, якщо це Force Update
+                if not force_update and time_diff > agregator.MAX_SYNC_DIFF_SEC: continue
+
+                buy_price = buy_row['bid']
+                sell_price = sell_row['ask']
+                spread = ((sell_price - buy_price) / buy_price) * 100
+
+                buy_fund_period = agregator.get_period_funding(buy_row)
+                sell_fund_period = agregator.get_period_funding(sell_row)
+
+                buy_fund_24h = f24_map.get((buy_row['exchange'], token), 0.0)
+                sell_fund_24h = f24_map.get((sell_row['exchange'], token), 0.0)
+
+                results.append({
+                    'token': token,
+                    'route': f"{buy_row['exchange']} ➡️ {sell_row['exchange']}",
+                    'buy_exchange': buy_row['exchange'],
+                    'sell_exchange': sell_row['exchange'],
+                    'buy_price': buy_price,
+                    'sell_price': sell_price,
+                    'spread': spread,
+                    'buy_funding_rate': buy_fund_period,
+                    'buy_funding_freq': int(buy_row['freq_hours']),
+                    'sell_funding_rate': sell_fund_period,
+                    'sell_funding_freq': int(sell_row['freq_hours']),
+                    'buy_funding_24h_pct': buy_fund_24h,
+                    'sell_funding_24h_pct': sell_fund_24h,
+                    'oi_long': buy_row['oi_usd'],
+                    'oi_short': sell_row['oi_usd'],
+                    'vol_long': buy_row['volume_24h'],
+                    'vol_short': sell_row['volume_24h']
+                })
+
+    return pd.DataFrame(results)
+
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 СИНТЕТИЧНІ ДАНІ
+# ═══════════════════════════════════════════════════════════════════════════
+
+def make_market_data(n_tokens, seed=42):
+    """Фрейм як після pd.concat(dfs): n_tokens токенів на кожній з 5 бірж (частина пропусків)."""
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    tokens = np.array([f"TKN{i}" for i in range(n_tokens)])
+
+    frames = []
+    for ex in EXCHANGES:
+        listed = rng.random(n_tokens) < 0.8
+        n = int(listed.sum())
+        mid = rng.uniform(0.01, 1000, n)
+        frames.append(pd.DataFrame({
+            'token': tokens[listed],
+            'bid': np.where(rng.random(n) < 0.02, 0.0, mid * (1 - rng.uniform(0, 0.002, n))),
+            'ask': mid * (1 + rng.uniform(0, 0.002, n)),
+            'funding_pct': rng.normal(0, 0.01, n),
+            'freq_hours': rng.choice([1, 8], n),
+            'oi_usd': rng.lognormal(11, 2, n),
+            'volume_24h': rng.lognormal(13, 2, n),
+            'last_updated': pd.to_datetime(now - pd.to_timedelta(rng.uniform(0, 40, n), unit='s')),
+            'exchange': ex
+        }))
+    df = pd.concat(frames, ignore_index=True)
+
+    # Віки далеко від порогів, щоб повільний прогін не перетнув межу grace/force між викликами
+    ages_h = np.where(rng.random(n_tokens) < 0.3, rng.uniform(0, 20, n_tokens), rng.uniform(30, 200, n_tokens))
+    ages_s = np.where(rng.random(n_tokens) < 0.8, rng.uniform(0, 3000, n_tokens), rng.uniform(4200, 9000, n_tokens))
+    discovery_map = {t: now - timedelta(hours=float(h)) for t, h in zip(tokens, ages_h)}
+    last_updated_map = {t: now - timedelta(seconds=float(s)) for t, s in zip(tokens, ages_s)}
+    funding_24h_df = pd.DataFrame({
+        'exchange': df['exchange'], 'token': df['token'], 'funding_24h': rng.normal(0, 0.1, len(df))
+    }).drop_duplicates(['exchange', 'token'])
+    return df, discovery_map, funding_24h_df, last_updated_map
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def best_time(func, args, repeats):
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check_equal(old_df, new_df):
+    assert old_df.empty == new_df.empty, f"routes: legacy {len(old_df)}, numpy {len(new_df)}"
+    if old_df.empty: return
+    key = ['token', 'buy_exchange', 'sell_exchange']
+    old_df = old_df.sort_values(key).reset_index(drop=True)
+    # Нові колонки (exec_spread_*) у старій версії відсутні — порівнюємо спільні
+    new_df = new_df.sort_values(key).reset_index(drop=True)[old_df.columns]
+    pd.testing.assert_frame_equal(old_df, new_df, check_dtype=False)
+
+
+def main():
+    sizes = [int(x) for x in sys.argv[1:]] or BENCH_SIZES
+    print(f"\n{C.CYAN}🏁 ROUTE ENGINE BENCHMARK (iterrows vs NumPy){C.END}")
+    print(f"{'tokens':>8} {'rows':>8} {'routes':>9} {'iterrows, s':>12} {'numpy, s':>10} {'speedup':>9}")
+
+    for n in sizes:
+        args = make_market_data(n)
+        # Стара версія дуже повільна на великих розмірах — один прогін
+        old_t, old_df = best_time(legacy_calculate_live_routes, args, 1 if n >= 10000 else BENCH_REPEATS)
+        new_t, new_df = best_time(agregator.calculate_live_routes, args, BENCH_REPEATS)
+        check_equal(old_df, new_df)
+        print(f"{n:>8} {len(args[0]):>8} {len(new_df):>9} {old_t:>12.4f} {new_t:>10.4f} {old_t / new_t:>8.1f}x")
+
+    print(f"{C.GREEN}✅ Results identical.{C.END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+from contextlib import closing
+from datetime import timedelta
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import agregator
+from spread_stats import SpreadStatsEngine, sqlite_now, TS_FORMAT
+from history_tiers import SpreadHistoryStore
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+
+BENCH_ROUTES = 500
+SAMPLE_EVERY_SEC = 60  # 15s у проді; крупніше, щоб бенчмарк швидко будував БД
+BENCH_REPEATS = 3
+
+C = agregator.C
+
+# Старий запит з update_history_and_get_stats — еталон
+GROUP_BY_QUERY = """
+SELECT token, route, MIN(CASE WHEN timestamp >= datetime('now', '-24 hours') THEN spread_pct END) as db_min_24h, MAX(CASE WHEN timestamp >= datetime('now', '-24 hours') THEN spread_pct END) as db_max_24h, MIN(spread_pct) as db_min_30d, MAX(spread_pct) as db_max_30d
+FROM spread_history GROUP BY token, route"""
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 СИНТЕТИЧНА ІСТОРІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+
+def build_history(db_path, n_routes, seed=7):
+    """Стара схема: одна таблиця spread_history з усіма семплами за HISTORY_RETENTION_DAYS."""
+    rng = np.random.default_rng(seed)
+    now = sqlite_now()
+    n_samples = int(agregator.HISTORY_RETENTION_DAYS * 86400 / SAMPLE_EVERY_SEC)
+    timestamps = [(now - timedelta(seconds=i * SAMPLE_EVERY_SEC)).strftime(TS_FORMAT) for i in range(n_samples)][::-1]
+
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute('''
+            CREATE TABLE spread_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                token TEXT,
+                route TEXT,
+                spread_pct REAL,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('CREATE INDEX idx_hist_token_route ON spread_history (token, route);')
+        conn.execute('CREATE INDEX idx_hist_time ON spread_history (timestamp);')
+        for r in range(n_routes):
+            spreads = np.cumsum(rng.normal(0, 0.02, n_samples))
+            conn.executemany("INSERT INTO spread_history (token, route, spread_pct, timestamp) VALUES (?, ?, ?, ?)",
+                             [(f"TKN{r // 10}", f"R{r % 10}", float(v), ts) for v, ts in zip(spreads, timestamps)])
+        conn.commit()
+    return n_routes * n_samples
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def main():
+    n_routes = int(sys.argv[1]) if len(sys.argv) > 1 else BENCH_ROUTES
+    print(f"\n{C.CYAN}🏁 SPREAD STATS BENCHMARK (GROUP BY vs rolling min/max){C.END}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, agregator.TARGET_DB_NAME)
+        n_rows = build_history(db_path, n_routes)
+        print(f"📦 spread_history: {n_rows} rows, {n_routes} routes")
+
+        sql_time = float('inf')
+        with closing(sqlite3.connect(db_path)) as conn:
+            for _ in range(BENCH_REPEATS):
+                start = time.perf_counter()
+                df_sql = pd.read_sql_query(GROUP_BY_QUERY, conn)
+                sql_time = min(sql_time, time.perf_counter() - start)
+
+        # Сирі семпли за весь період — щоб порівняння з GROUP BY було точним до секунди
+        store = SpreadHistoryStore(agregator.HISTORY_RETENTION_DAYS * 24, agregator.HISTORY_RETENTION_DAYS,
+                                   agregator.ROLLUP_1H_RETENTION_DAYS)
+        start = time.perf_counter()
+        with closing(sqlite3.connect(db_path)) as conn:
+            store.init(conn)
+        migrate_time = time.perf_counter() - start
+
+        engine = SpreadStatsEngine(agregator.HISTORY_RETENTION_DAYS)
+        start = time.perf_counter()
+        engine.warm_start(db_path, store)
+        warm_time = time.perf_counter() - start
+
+        keys = list(zip(df_sql['token'], df_sql['route']))
+        engine_time = float('inf')
+        for _ in range(BENCH_REPEATS):
+            start = time.perf_counter()
+            cutoffs = engine.get_cutoffs()
+            stats = [engine.get(token, route, cutoffs) for token, route in keys]
+            engine_time = min(engine_time, time.perf_counter() - start)
+
+    df_engine = pd.DataFrame(stats, columns=['db_min_24h', 'db_max_24h', 'db_min_30d', 'db_max_30d'], dtype=float)
+    cols = ['db_min_24h', 'db_max_24h', 'db_min_30d', 'db_max_30d']
+    pd.testing.assert_frame_equal(df_sql[cols].reset_index(drop=True), df_engine, check_dtype=False)
+
+    print(f"{'GROUP BY per cycle, s':>28}: {sql_time:.4f}")
+    print(f"{'rolling get per cycle, s':>28}: {engine_time:.4f}  ({sql_time / engine_time:.0f}x)")
+    print(f"{'tier migration (once), s':>28}: {migrate_time:.4f}")
+    print(f"{'warm start (once), s':>28}: {warm_time:.4f}")
+    print(f"{C.GREEN}✅ Results identical.{C.END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import sys
+import os
+import json
+import time
+import threading
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MONITORS_DIR = os.path.join(PROJECT_ROOT, 'Dex_monitor')
+if MONITORS_DIR not in sys.path:
+    sys.path.append(MONITORS_DIR)
+
+import fast_json
+import lighter_monitor
+from order_book import OrderBook, to_ticks, price_scale, DEFAULT_PRICE_DECIMALS
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Затримка обробки одного WSS-кадру (on_message Lighter) без та з паралельним циклом знімків:
+#   locked — старий варіант: один data_lock на кадр і на весь прохід знімка по стаканах;
+#   cow    — поточний: потік WSS публікує незмінні top_record(), знімок копіює dict посилань.
+
+BENCH_SYMBOLS = 500
+SNAPSHOT_LEVELS = 50  # Рівнів на сторону в початковому знімку стакану
+UPDATE_FRAMES = 50000
+LEVELS_PER_UPDATE = 4
+SNAPSHOT_PAUSE_SEC = 0.005  # Пауза між знімками (живий монітор — 1 с; тут навмисно часто)
+
+C = lighter_monitor.C
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🐢 СТАРИЙ ВАРІАНТ (один лок на все)
+# ═══════════════════════════════════════════════════════════════════════════
+
+class LockedMonitor:
+    def __init__(self, id_to_symbol):
+        self.id_to_symbol = id_to_symbol
+        self.local_books = {}
+        self.data_lock = threading.Lock()
+
+    def on_message(self, message):
+        msg = fast_json.decode_lighter(message)
+        if msg is None or msg[0] != 'order_book': return
+        channel, raw_bids, raw_asks = msg[1:4]
+        mid = int(channel.split(':')[1])
+        decimals = lighter_monitor.price_decimals.get(mid, DEFAULT_PRICE_DECIMALS)
+        scale = price_scale(decimals)
+        bids = [(to_ticks(price, scale), size) for price, size in raw_bids]
+        asks = [(to_ticks(price, scale), size) for price, size in raw_asks]
+        with self.data_lock:
+            book = self.local_books.get(mid)
+            if book is None:
+                book = self.local_books[mid] = OrderBook(decimals)
+            book.apply_ticks(bids, asks)
+
+    def collect_rows(self):
+        rows = []
+        with self.data_lock:
+            for mid, symbol in self.id_to_symbol.items():
+                book = self.local_books.get(mid)
+                if not book: continue
+                best_bid, best_ask = book.best_bid(), book.best_ask()
+                bid_vwaps, ask_vwaps = book.vwaps()
+                if best_bid == 0: continue
+                rows.append((symbol, best_bid, best_ask, bid_vwaps, ask_vwaps))
+        return rows
+
+
+class CowMonitor:
+    """Обгортка над справжнім lighter_monitor (on_message / collect_rows без локу)."""
+
+    def __init__(self, id_to_symbol):
+        lighter_monitor.id_to_symbol = id_to_symbol
+        lighter_monitor.local_books.clear()
+        lighter_monitor.top_of_book.clear()
+        lighter_monitor.book_seq.clear()
+
+    @staticmethod
+    def on_message(message):
+        lighter_monitor.on_message(None, message)
+
+    @staticmethod
+    def collect_rows():
+        return lighter_monitor.collect_rows()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 КАДРИ
+# ═══════════════════════════════════════════════════════════════════════════
+
+def book_frame(mid, bids, asks, msg_type='update/order_book'):
+    return json.dumps({'type': msg_type, 'channel': f"order_book:{mid}",
+                       'order_book': {'bids': [{'price': f"{p:.2f}", 'size': f"{s:.3f}"} for p, s in bids],
+                                      'asks': [{'price': f"{p:.2f}", 'size': f"{s:.3f}"} for p, s in asks]}})
+
+
+def make_frames(n_symbols, n_updates, seed=3):
+    """(початкові знімки, інкрементальні оновлення) — ціни в центах навколо mid кожного символу."""
+    rng = np.random.default_rng(seed)
+    mids = rng.uniform(10, 5000, n_symbols)
+    snapshots = [book_frame(m, [(mids[m] - 0.01 * (i + 1), rng.uniform(1, 100)) for i in range(SNAPSHOT_LEVELS)],
+                            [(mids[m] + 0.01 * (i + 1), rng.uniform(1, 100)) for i in range(SNAPSHOT_LEVELS)],
+                            'subscribed/order_book')
+                 for m in range(n_symbols)]
+    updates = []
+    for _ in range(n_updates):
+        m = int(rng.integers(0, n_symbols))
+        offsets = rng.integers(1, SNAPSHOT_LEVELS, LEVELS_PER_UPDATE) * 0.01
+        sizes = np.where(rng.random(LEVELS_PER_UPDATE) < 0.2, 0, rng.uniform(1, 100, LEVELS_PER_UPDATE))
+        updates.append(book_frame(m, [(mids[m] - o, s) for o, s in zip(offsets, sizes)],
+                                  [(mids[m] + o, s) for o, s in zip(offsets[::-1], sizes)]))
+    return snapshots, updates
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚀 MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def run(monitor_cls, id_to_symbol, snapshots, updates, with_snapshots):
+    """(затримки кадрів, нс; тривалості знімків, с)."""
+    monitor = monitor_cls(id_to_symbol)
+    for frame in snapshots: monitor.on_message(frame)
+
+    stop = threading.Event()
+    snapshot_times = []
+
+    def snapshot_loop():
+        while not stop.is_set():
+            start = time.perf_counter()
+            monitor.collect_rows()
+            snapshot_times.append(time.perf_counter() - start)
+            time.sleep(SNAPSHOT_PAUSE_SEC)
+
+    thread = threading.Thread(target=snapshot_loop, daemon=True)
+    if with_snapshots: thread.start()
+
+    latencies = np.empty(len(updates), dtype=np.int64)
+    clock = time.perf_counter_ns
+    on_message = monitor.on_message
+    for i, frame in enumerate(updates):
+        start = clock()
+        on_message(frame)
+        latencies[i] = clock() - start
+
+    stop.set()
+    if with_snapshots: thread.join()
+    return latencies, snapshot_times
+
+
+def main():
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else BENCH_SYMBOLS
+    id_to_symbol = {m: f"TKN{m}" for m in range(n_symbols)}
+    for m in id_to_symbol: lighter_monitor.price_decimals[m] = 2
+    snapshots, updates = make_frames(n_symbols, UPDATE_FRAMES)
+
+    print(f"\n{C.CYAN}🏁 WSS INGEST vs SNAPSHOT CONTENTION ({n_symbols} symbols, {len(updates):,} frames, "
+          f"decoder {fast_json.decoder.name}, snapshot every {SNAPSHOT_PAUSE_SEC * 1000:.0f} ms){C.END}")
+    print(f"{'mode':>8} {'snapshots':>10} {'msg/s':>9} {'p50 us':>8} {'p99 us':>8} {'p99.9 us':>9} "
+          f"{'max ms':>8} {'snapshot ms':>12}")
+
+    for name, cls in [('locked', LockedMonitor), ('cow', CowMonitor)]:
+        for with_snapshots in (False, True):
+            latencies, snapshot_times = run(cls, id_to_symbol, snapshots, updates, with_snapshots)
+            p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9]) / 1000
+            snap = f"{np.median(snapshot_times) * 1000:.2f}" if snapshot_times else '-'
+            print(f"{name:>8} {'on' if with_snapshots else 'off':>10} {len(latencies) / (latencies.sum() / 1e9):>9,.0f} "
+                  f"{p50:>8.1f} {p99:>8.1f} {p999:>9.1f} {latencies.max() / 1e6:>8.2f} {snap:>12}")
+
+    # Обидва варіанти дають однаковий верх стакану
+    locked, cow = LockedMonitor(id_to_symbol), CowMonitor(id_to_symbol)
+    for frame in snapshots + updates:
+        locked.on_message(frame)
+        cow.on_message(frame)
+    expected = locked.collect_rows()
+    actual = [(r['token'], r['bid'], r['ask'], r['bid_vwaps'], r['ask_vwaps']) for r in cow.collect_rows()]
+    assert actual == expected
+    print(f"{C.GREEN}✅ Same top-of-book and VWAP rows in both modes ({len(actual)} symbols).{C.END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+import sqlite3
+import time
+import math
+import pandas as pd
+from datetime import datetime, timedelta
+
+from spread_stats import TS_FORMAT
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🗂️ БАГАТОРІВНЕВЕ СХОВИЩЕ ІСТОРІЇ СПРЕДІВ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+#   raw — сирі семпли (token, route, spread_pct, timestamp), коротке вікно
+#   1m  — хвилинні OHLC-підсумки (open/min/max/last/count)
+#   1h  — годинні OHLC-підсумки, найдовше зберігання
+#
+# Кожен рівень розбитий на партиції-таблиці (по днях або місяцях): <prefix>_<YYYYMMDD|YYYYMM>.
+# Ретеншн = DROP TABLE цілої партиції, без построкових DELETE по великій таблиці.
+# Для сумісності spread_history — це VIEW над сирими партиціями.
+
+TIERS = [
+    {'name': 'raw', 'prefix': 'spread_history_raw', 'bucket_sec': 0, 'partition': 'day'},
+    {'name': '1m', 'prefix': 'spread_rollup_1m', 'bucket_sec': 60, 'partition': 'day'},
+    {'name': '1h', 'prefix': 'spread_rollup_1h', 'bucket_sec': 3600, 'partition': 'month'},
+]
+TIER_BY_NAME = {tier['name']: tier for tier in TIERS}
+
+# Ретеншн рівнів — єдине місце для агрегатора (пише і видаляє партиції) і дашборду (pick_tier при читанні)
+RAW_HISTORY_RETENTION_HOURS = 48  # Сирі семпли кожного циклу
+HISTORY_RETENTION_DAYS = 8  # Хвилинні підсумки та статистика "30d"
+ROLLUP_1H_RETENTION_DAYS = 400  # Годинні підсумки
+
+LEGACY_TABLE = 'spread_history'
+UNIX_EPOCH_JD = 2440587.5  # julianday('1970-01-01'): секунди епохи без strftime('%s') — вдвічі дешевше на рядок
+RETENTION_CHECK_SEC = 300
+
+ROLLUP_UPSERT_SQL = '''
+    INSERT INTO {table} (token, route, bucket, spread_open, spread_min, spread_max, spread_last, samples)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+    ON CONFLICT(token, route, bucket) DO UPDATE SET
+        spread_min = MIN(spread_min, excluded.spread_min),
+        spread_max = MAX(spread_max, excluded.spread_max),
+        spread_last = excluded.spread_last,
+        samples = samples + 1
+'''
+
+# Перерахунок OHLC з сирих семплів одним запитом (міграція старої таблиці)
+ROLLUP_FROM_RAW_SQL = '''
+    INSERT INTO {table} (token, route, bucket, spread_open, spread_min, spread_max, spread_last, samples)
+    SELECT token, route, bucket, MIN(o), MIN(spread_pct), MAX(spread_pct), MIN(l), COUNT(*) FROM (
+        SELECT token, route, spread_pct, {bucket_expr} AS bucket,
+               FIRST_VALUE(spread_pct) OVER w AS o,
+               LAST_VALUE(spread_pct) OVER (w ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) AS l
+        FROM {source}
+        WHERE spread_pct IS NOT NULL AND timestamp >= ? AND timestamp < ?
+        WINDOW w AS (PARTITION BY token, route, {bucket_expr} ORDER BY timestamp, id)
+    ) GROUP BY token, route, bucket
+'''
+
+
+def get_bucket(tier_name, ts):
+    """Початок бакета для рядка 'YYYY-MM-DD HH:MM:SS'."""
+    if tier_name == '1m': return ts[:16] + ':00'
+    if tier_name == '1h': return ts[:13] + ':00:00'
+    return ts
+
+
+def bucket_sql(tier_name):
+    return "substr(timestamp, 1, 16) || ':00'" if tier_name == '1m' else "substr(timestamp, 1, 13) || ':00:00'"
+
+
+def partition_bounds(tier, suffix):
+    """(start, end) партиції як рядки TS_FORMAT; end — не включно."""
+    if tier['partition'] == 'day':
+        start = datetime.strptime(suffix, '%Y%m%d')
+        end = start + timedelta(days=1)
+    else:
+        start = datetime.strptime(suffix, '%Y%m')
+        end = (start + timedelta(days=32)).replace(day=1)
+    return start.strftime(TS_FORMAT), end.strftime(TS_FORMAT)
+
+
+def partition_suffix(tier, ts):
+    return ts[:10].replace('-', '') if tier['partition'] == 'day' else ts[:7].replace('-', '')
+
+
+class SpreadHistoryStore:
+    """Запис семплів у всі рівні, ретеншн партиціями та вибір рівня для читання."""
+
+    def __init__(self, raw_retention_hours, rollup_1m_retention_days, rollup_1h_retention_days,
+                 sample_interval_sec=0):
+        self.sample_interval_sec = sample_interval_sec
+        self.pending = {}  # {(token, route): останній spread з моменту попереднього flush}
+        self.last_flush = 0.0
+        self.retention = {
+            'raw': timedelta(hours=raw_retention_hours),
+            '1m': timedelta(days=rollup_1m_retention_days),
+            '1h': timedelta(days=rollup_1h_retention_days),
+        }
+        self.partitions = {tier['name']: set() for tier in TIERS}
+        self.last_retention_check = 0.0
+
+    # ─── Схема ────────────────────────────────────────────────────────────
+
+    def load_partitions(self, conn):
+        for tier in TIERS:
+            rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ?",
+                                (tier['prefix'] + '_%',)).fetchall()
+            # '_' у LIKE — будь-який символ, тому суфікс додатково перевіряємо на цифри
+            self.partitions[tier['name']] = {
+                name[len(tier['prefix']) + 1:] for (name,) in rows
+                if name[len(tier['prefix']) + 1:].isdigit()
+            }
+
+    def table_name(self, tier_name, suffix):
+        return f"{TIER_BY_NAME[tier_name]['prefix']}_{suffix}"
+
+    def ensure_partition(self, conn, tier_name, ts):
+        tier = TIER_BY_NAME[tier_name]
+        suffix = partition_suffix(tier, ts)
+        if suffix in self.partitions[tier_name]: return self.table_name(tier_name, suffix)
+
+        table = self.table_name(tier_name, suffix)
+        if tier_name == 'raw':
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    token TEXT,
+                    route TEXT,
+                    spread_pct REAL,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_route ON {table} (token, route, timestamp);')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_time ON {table} (timestamp);')
+        else:
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    token TEXT,
+                    route TEXT,
+                    bucket TIMESTAMP,
+                    spread_open REAL,
+                    spread_min REAL,
+                    spread_max REAL,
+                    spread_last REAL,
+                    samples INTEGER,
+                    PRIMARY KEY (token, route, bucket)
+                ) WITHOUT ROWID
+            ''')
+        self.partitions[tier_name].add(suffix)
+        if tier_name == 'raw': self.rebuild_view(conn)
+        return table
+
+    def rebuild_view(self, conn):
+        """spread_history як VIEW над сирими партиціями (для старих читачів)."""
+        conn.execute(f"DROP VIEW IF EXISTS {LEGACY_TABLE}")
+        parts = sorted(self.partitions['raw'])
+        if not parts: return
+        union = ' UNION ALL '.join(
+            f"SELECT id, token, route, spread_pct, timestamp FROM {self.table_name('raw', s)}" for s in parts)
+        conn.execute(f"CREATE VIEW {LEGACY_TABLE} AS {union}")
+
+    def init(self, conn):
+        """Створює структуру; одноразово мігрує стару таблицю spread_history у рівні."""
+        self.load_partitions(conn)
+        legacy = conn.execute("SELECT type FROM sqlite_master WHERE name=?", (LEGACY_TABLE,)).fetchone()
+        if legacy and legacy[0] == 'table':
+            conn.execute(f"ALTER TABLE {LEGACY_TABLE} RENAME TO {LEGACY_TABLE}_legacy")
+            migrated = self.migrate_legacy(conn, f"{LEGACY_TABLE}_legacy")
+            conn.execute(f"DROP TABLE {LEGACY_TABLE}_legacy")
+            conn.commit()
+            print(f"📦 Migrated {migrated} rows from {LEGACY_TABLE} into tiered history.")
+        self.rebuild_view(conn)
+        conn.commit()
+
+    def migrate_legacy(self, conn, source):
+        days = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT substr(timestamp, 1, 10) FROM {source} WHERE timestamp IS NOT NULL ORDER BY 1")]
+        total = 0
+        for day in days:
+            start = f"{day} 00:00:00"
+            end = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime(TS_FORMAT)
+            raw = self.ensure_partition(conn, 'raw', start)
+            cur = conn.execute(f'''
+                INSERT INTO {raw} (token, route, spread_pct, timestamp)
+                SELECT token, route, spread_pct, timestamp FROM {source}
+                WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp, id
+            ''', (start, end))
+            total += cur.rowcount
+            for tier_name in ('1m', '1h'):
+                table = self.ensure_partition(conn, tier_name, start)
+                conn.execute(ROLLUP_FROM_RAW_SQL.format(table=table, source=source, bucket_expr=bucket_sql(tier_name)),
+                             (start, end))
+            conn.commit()
+        return total
+
+    def reset(self, conn):
+        for tier in TIERS:
+            for suffix in list(self.partitions[tier['name']]):
+                conn.execute(f"DROP TABLE IF EXISTS {self.table_name(tier['name'], suffix)}")
+            self.partitions[tier['name']].clear()
+        self.rebuild_view(conn)
+        conn.commit()
+
+    # ─── Запис ────────────────────────────────────────────────────────────
+
+    def add_samples(self, conn, rows):
+        """rows: [(token, route, spread_pct, timestamp)] з одним timestamp на цикл."""
+        if not rows: return
+        ts = rows[0][3]
+        raw = self.ensure_partition(conn, 'raw', ts)
+        conn.executemany(f"INSERT INTO {raw} (token, route, spread_pct, timestamp) VALUES (?, ?, ?, ?)", rows)
+
+        valid = [(token, route, spread) for token, route, spread, _ in rows if spread is not None and spread == spread]
+        for tier_name in ('1m', '1h'):
+            table = self.ensure_partition(conn, tier_name, ts)
+            bucket = get_bucket(tier_name, ts)
+            conn.executemany(ROLLUP_UPSERT_SQL.format(table=table),
+                             [(token, route, bucket, s, s, s, s) for token, route, s in valid])
+
+    def stage(self, rows):
+        """Запам'ятовує останній spread кожного маршруту; в історію він потрапить при flush."""
+        for token, route, spread in rows:
+            self.pending[(token, route)] = spread
+
+    def flush(self, conn, force=False):
+        """
+        Пише накопичені семпли не частіше ніж раз на sample_interval_sec — агрегатор може
+        перераховувати маршрути щосекунди, а історії достатньо одного семпла на інтервал.
+        Повертає записані рядки (token, route, spread_pct, timestamp).
+        """
+        if not self.pending: return []
+        if not force and time.time() - self.last_flush < self.sample_interval_sec: return []
+        ts = datetime.now().strftime(TS_FORMAT)
+        rows = [(token, route, spread, ts) for (token, route), spread in self.pending.items()]
+        self.add_samples(conn, rows)
+        self.pending.clear()
+        self.last_flush = time.time()
+        return rows
+
+    def enforce_retention(self, conn, force=False):
+        """Видаляє партиції, які повністю старші за ретеншн свого рівня. Повертає список видалених таблиць."""
+        now = time.time()
+        if not force and now - self.last_retention_check < RETENTION_CHECK_SEC: return []
+        self.last_retention_check = now
+
+        dropped = []
+        for tier in TIERS:
+            cutoff = self.coverage_start(tier['name'])
+            for suffix in sorted(self.partitions[tier['name']]):
+                if partition_bounds(tier, suffix)[1] > cutoff: continue
+                table = self.table_name(tier['name'], suffix)
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self.partitions[tier['name']].discard(suffix)
+                dropped.append(table)
+        if any(t.startswith(TIER_BY_NAME['raw']['prefix']) for t in dropped): self.rebuild_view(conn)
+        return dropped
+
+    # ─── Читання ──────────────────────────────────────────────────────────
+
+    def coverage_start(self, tier_name):
+        """З якого моменту рівень гарантовано має дані — у локальному часі, як і мітки з flush()."""
+        return (datetime.now() - self.retention[tier_name]).strftime(TS_FORMAT)
+
+    def raw_start(self):
+        """Початок найстарішої сирої партиції: все раніше є тільки в підсумках."""
+        parts = sorted(self.partitions['raw'])
+        return partition_bounds(TIER_BY_NAME['raw'], parts[0])[0] if parts else None
+
+    def pick_tier(self, start_ts, resolution_sec=0):
+        """
+        Найгрубший рівень, що покриває start_ts і має крок не більший за resolution_sec.
+        Якщо такого немає — найдетальніший рівень, що покриває вікно (або найдовший за ретеншном).
+        """
+        covering = [t for t in TIERS if self.coverage_start(t['name']) <= start_ts]
+        fitting = [t for t in covering if t['bucket_sec'] <= resolution_sec]
+        if fitting: return fitting[-1]['name']
+        if covering: return covering[0]['name']
+        return TIERS[-1]['name']
+
+    def partitions_between(self, tier_name, start_ts, end_ts=None):
+        tier = TIER_BY_NAME[tier_name]
+        result = []
+        for suffix in sorted(self.partitions[tier_name]):
+            p_start, p_end = partition_bounds(tier, suffix)
+            if p_end <= start_ts or (end_ts and p_start >= end_ts): continue
+            result.append(self.table_name(tier_name, suffix))
+        return result
+
+    def iter_samples(self, conn, start_ts, end_ts=None):
+        """Сирі семпли у порядку часу: (token, route, spread_pct, timestamp)."""
+        for table in self.partitions_between('raw', start_ts, end_ts):
+            query = f"SELECT token, route, spread_pct, timestamp FROM {table} WHERE timestamp >= ?"
+            params = [start_ts]
+            if end_ts:
+                query += " AND timestamp < ?"
+                params.append(end_ts)
+            yield from conn.execute(query + " ORDER BY timestamp, id", params)
+
+    def iter_rollups(self, conn, tier_name, start_ts, end_ts=None):
+        """Підсумки рівня у порядку часу: (token, route, spread_min, spread_max, bucket)."""
+        for table in self.partitions_between(tier_name, start_ts, end_ts):
+            query = f"SELECT token, route, spread_min, spread_max, bucket FROM {table} WHERE bucket >= ?"
+            params = [start_ts]
+            if end_ts:
+                query += " AND bucket < ?"
+                params.append(end_ts)
+            yield from conn.execute(query + " ORDER BY bucket", params)
+
+    def load_series(self, conn, token, route, start_ts, end_ts=None, resolution_sec=0):
+        """
+        Історія одного маршруту з найгрубшого рівня, що задовольняє вікно.
+        Повертає (tier_name, DataFrame[bucket, spread_open, spread_min, spread_max, spread_last, samples]).
+        """
+        tier_name = self.pick_tier(start_ts, resolution_sec)
+        if tier_name == 'raw':
+            select = ("SELECT timestamp AS bucket, spread_pct AS spread_open, spread_pct AS spread_min, "
+                      "spread_pct AS spread_max, spread_pct AS spread_last, 1 AS samples FROM {table} "
+                      "WHERE token = ? AND route = ? AND timestamp >= ?" + (" AND timestamp < ?" if end_ts else ""))
+        else:
+            select = ("SELECT bucket, spread_open, spread_min, spread_max, spread_last, samples FROM {table} "
+                      "WHERE token = ? AND route = ? AND bucket >= ?" + (" AND bucket < ?" if end_ts else ""))
+
+        tables = self.partitions_between(tier_name, start_ts, end_ts)
+        columns = ['bucket', 'spread_open', 'spread_min', 'spread_max', 'spread_last', 'samples']
+        if not tables: return tier_name, pd.DataFrame(columns=columns)
+
+        params = [token, route, start_ts] + ([end_ts] if end_ts else [])
+        query = ' UNION ALL '.join(select.format(table=t) for t in tables) + ' ORDER BY bucket'
+        return tier_name, pd.read_sql_query(query, conn, params=params * len(tables))
+
+    def load_downsampled(self, conn, token, route, start_ts, end_ts, points):
+        """
+        Історія маршруту для графіка: не більше ~points точок на будь-яке вікно.
+        Вікно ділиться на points // 2 бакетів; з кожного — мінімум і максимум з їх власним часом
+        (сплески не згладжуються, як при усередненні). Групування виконує SQLite по індексу
+        (token, route, timestamp|bucket) партицій, у pandas приходять лише точки графіка.
+        Ширина бакета кратна кроку рівня, тож min/max збігаються з обчисленими по сирих семплах.
+        Повертає (tier_name, DataFrame[timestamp, spread_pct]).
+        """
+        columns = ['timestamp', 'spread_pct']
+        start = datetime.strptime(start_ts, TS_FORMAT)
+        span = (datetime.strptime(end_ts, TS_FORMAT) - start).total_seconds()
+        width = max(1, math.ceil(span / max(1, points // 2)))
+        tier_name = self.pick_tier(start_ts, width)
+        step = TIER_BY_NAME[tier_name]['bucket_sec']
+        if step: width = math.ceil(width / step) * step
+
+        if tier_name == 'raw':
+            select = ("SELECT timestamp AS ts, spread_pct AS lo, spread_pct AS hi FROM {table} "
+                      "WHERE token = ? AND route = ? AND timestamp >= ? AND timestamp < ? AND spread_pct IS NOT NULL")
+        else:
+            select = ("SELECT bucket AS ts, spread_min AS lo, spread_max AS hi FROM {table} "
+                      "WHERE token = ? AND route = ? AND bucket >= ? AND bucket < ?")
+        tables = self.partitions_between(tier_name, start_ts, end_ts)
+        if not tables: return tier_name, pd.DataFrame(columns=columns)
+
+        # Початок першого бакета вирівняний на крок рівня — підсумок не розрізається між бакетами.
+        # Неагреговану колонку ts SQLite бере з рядка, на якому досягнуто MIN/MAX.
+        origin = int((start - datetime(1970, 1, 1)).total_seconds()) // (step or 1) * (step or 1)
+        source = ' UNION ALL '.join(select.format(table=t) for t in tables)
+        query = f"""
+            WITH s AS ({source}),
+                 b AS (SELECT ts, lo, hi, (CAST(ROUND((julianday(ts) - {UNIX_EPOCH_JD}) * 86400) AS INTEGER) - {origin})
+                               / {width} AS n FROM s)
+            SELECT ts AS timestamp, MIN(lo) AS spread_pct FROM b GROUP BY n
+            UNION ALL
+            SELECT ts AS timestamp, MAX(hi) AS spread_pct FROM b GROUP BY n
+            ORDER BY timestamp
+        """
+        df = pd.read_sql_query(query, conn, params=[token, route, start_ts, end_ts] * len(tables))
+        # Бакет з одним семплом дає ту саму точку двічі
+        return tier_name, df.drop_duplicates(ignore_index=True)
@@ -0,0 +1,171 @@
+import json
+import queue
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+# Ті самі похідні колонки і посилання, що й у таблиці дашборду (dashboard_data.add_derived_columns)
+from route_fields import get_trade_url, funding_fields
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📡 PUSH-ОНОВЛЕННЯ ДАШБОРДУ (SSE)
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Агрегатор після кожного циклу публікує різницю live_opportunities: змінені маршрути і ключі
+# зниклих. GET /events — Server-Sent Events:
+#   event: snapshot  data: {"seq": n, "rows": [запис, ...]}        — одразу після підключення
+#   event: diff      data: {"seq": n, "upsert": [...], "remove": [ключ, ...]}
+# GET /snapshot — той самий стан одним JSON, GET /health — {"seq": n, "routes": n} (перевірка дашбордом).
+# Запис — колонки live_opportunities + key, funding_apr, f_spread_8h, buy_link, sell_link.
+# Дашборд (компонент у браузері) латає лише змінені рядки — без st.rerun() і без повної таблиці.
+
+KEEPALIVE_SEC = 15  # Коментар-пінг, щоб проксі/браузер не закривали тихе з'єднання
+SUBSCRIBER_QUEUE_SIZE = 256  # Диффів у черзі клієнта; повільного клієнта відключаємо (перепідключиться)
+
+
+def route_key(token, buy_exchange, sell_exchange):
+    return f"{token}|{buy_exchange}|{sell_exchange}"
+
+
+class LiveFeed:
+    """
+    Стан маршрутів для нових підписників + розсилка диффів (ThreadingHTTPServer у фоновому потоці).
+    columns — назви колонок рядка (як DASHBOARD_COLUMNS агрегатора); ключ — (token, buy, sell).
+    """
+
+    def __init__(self, columns, host='127.0.0.1', port=0):
+        self.columns = list(columns)
+        self.routes = {}  # {key: запис}
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.subscribers = []  # [queue.Queue] — по одній на з'єднання /events
+        self.sent_bytes = 0
+
+        feed = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/events': return feed.stream(self)
+                if url.path in ('/snapshot', '/health'):
+                    body = (feed.snapshot_json() if url.path == '/snapshot' else feed.health_json()).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.send_header('Access-Control-Allow-Origin', '*')
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                self.send_error(404)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/events"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # --- Записи ---
+
+    def record(self, row):
+        rec = dict(zip(self.columns, row))
+        token, buy, sell = rec['token'], rec['buy_exchange'], rec['sell_exchange']
+        rec['key'] = route_key(token, buy, sell)
+        try:
+            rec['funding_apr'], rec['f_spread_8h'] = funding_fields(rec['buy_funding_rate'], rec['buy_funding_freq'],
+                                                                    rec['sell_funding_rate'], rec['sell_funding_freq'])
+        except (TypeError, ZeroDivisionError):
+            rec['funding_apr'] = rec['f_spread_8h'] = None
+        rec['buy_link'] = get_trade_url(buy, token)
+        rec['sell_link'] = get_trade_url(sell, token)
+        return rec
+
+    def snapshot_json(self):
+        with self.lock:
+            return json.dumps({'seq': self.seq, 'rows': list(self.routes.values())})
+
+    def health_json(self):
+        with self.lock:
+            return json.dumps({'seq': self.seq, 'routes': len(self.routes)})
+
+    # --- Публікація (потік агрегатора) ---
+
+    def publish(self, changed_rows, removed_keys):
+        """changed_rows — рядки у порядку columns; removed_keys — (token, buy, sell). Повертає seq."""
+        upsert = [self.record(row) for row in changed_rows]
+        remove = [route_key(*key) for key in removed_keys]
+        if not upsert and not remove: return self.seq
+        with self.lock:
+            for rec in upsert: self.routes[rec['key']] = rec
+            for key in remove: self.routes.pop(key, None)
+            self.seq += 1
+            message = self._event('diff', {'seq': self.seq, 'upsert': upsert, 'remove': remove})
+            for subscriber in list(self.subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    # Клієнт не встигає — відключаємо; після перепідключення отримає snapshot
+                    self.subscribers.remove(subscriber)
+                    with subscriber.mutex: subscriber.queue.clear()
+                    subscriber.put_nowait(None)
+            return self.seq
+
+    def replace(self, rows):
+        """Повний набір маршрутів {(token, buy, sell): рядок} — публікує лише різницю з поточним станом."""
+        with self.lock:
+            current = {key: tuple(rec[c] for c in self.columns) for key, rec in self.routes.items()}
+        changed = [row for key, row in rows.items() if current.get(route_key(*key)) != tuple(row)]
+        live = {route_key(*key) for key in rows}
+        removed = [tuple(key.split('|', 2)) for key in current if key not in live]
+        return self.publish(changed, removed)
+
+    # --- SSE ---
+
+    @staticmethod
+    def _event(name, payload):
+        return f"event: {name}\ndata: {json.dumps(payload)}\n\n".encode()
+
+    def stream(self, handler):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            # Snapshot і реєстрація під одним локом — жоден дифф не загубиться і не задвоїться
+            first = self._event('snapshot', {'seq': self.seq, 'rows': list(self.routes.values())})
+            self.subscribers.append(subscriber)
+
+        try:
+            handler.send_response(200)
+            handler.send_header('Content-Type', 'text/event-stream')
+            handler.send_header('Cache-Control', 'no-cache')
+            handler.send_header('Access-Control-Allow-Origin', '*')  # Компонент дашборду — інший origin
+            handler.end_headers()
+            self._write(handler, first)
+            while True:
+                try:
+                    message = subscriber.get(timeout=KEEPALIVE_SEC)
+                except queue.Empty:
+                    message = b": ping\n\n"
+                if message is None: break
+                self._write(handler, message)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            with self.lock:
+                if subscriber in self.subscribers: self.subscribers.remove(subscriber)
+
+    def _write(self, handler, message):
+        handler.wfile.write(message)
+        handler.wfile.flush()
+        self.sent_bytes += len(message)
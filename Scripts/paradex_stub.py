@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import threading
+import numpy as np
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧪 ЛОКАЛЬНИЙ STUB PARADEX REST API (для офлайн-бенчмарків моніторів)
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Віддає /v1/markets та /v1/markets/summary?market=<SYMBOL|ALL> із записаних
+# відповідей (markets.json + summary_all.json) або синтетичних даних.
+# Рахує запити та нові TCP-з'єднання; штучна затримка імітує RTT і handshake.
+#
+#   python paradex_stub.py record <dir>   — записати живі відповіді Paradex у <dir>
+
+API_BASE = "https://api.prod.paradex.trade/v1"
+
+STUB_LATENCY_SEC = 0.03  # На кожен запит (RTT + обробка на сервері)
+STUB_CONNECT_LATENCY_SEC = 0.05  # На кожне нове з'єднання (TCP + TLS handshake)
+
+
+def make_payloads(n_markets, seed=11):
+    """Синтетичні відповіді у форматі Paradex: (markets, summary_all)."""
+    rng = np.random.default_rng(seed)
+    markets, summaries = [], []
+    for i in range(n_markets):
+        symbol = f"TKN{i}-USD-PERP"
+        price = float(rng.uniform(0.1, 5000))
+        markets.append({'symbol': symbol, 'asset_kind': 'PERP', 'funding_period_hours': 8})
+        summaries.append({
+            'symbol': symbol,
+            'bid': f"{price:.4f}",
+            'ask': f"{price * 1.0005:.4f}",
+            'mark_price': f"{price * 1.0002:.4f}",
+            'volume_24h': f"{rng.uniform(1e4, 1e8):.2f}",
+            'open_interest': f"{rng.uniform(10, 1e5):.3f}",
+            'funding_rate': f"{rng.normal(0, 1e-4):.8f}",
+        })
+    return {'results': markets}, {'results': summaries}
+
+
+def load_payloads(folder):
+    with open(os.path.join(folder, 'markets.json')) as f: markets = json.load(f)
+    with open(os.path.join(folder, 'summary_all.json')) as f: summary_all = json.load(f)
+    return markets, summary_all
+
+
+def record_payloads(folder):
+    """Зберігає живі /markets та /markets/summary?market=ALL (потрібна мережа)."""
+    import requests
+    os.makedirs(folder, exist_ok=True)
+    for name, url, params in [('markets.json', f"{API_BASE}/markets", None),
+                              ('summary_all.json', f"{API_BASE}/markets/summary", {'market': 'ALL'})]:
+        r = requests.get(url, params=params, timeout=20)
+        r.raise_for_status()
+        with open(os.path.join(folder, name), 'w') as f: f.write(r.text)
+        print(f"✅ {name}: {len(r.json().get('results', []))} items")
+
+
+class StubServer:
+    """
+    ThreadingHTTPServer у фоновому потоці. base_url — підставляється замість API_BASE монітора.
+    hide_from_bulk: символи, яких немає у відповіді market=ALL (перевірка fallback по одному символу).
+    fail_bulk: market=ALL відповідає 404, як API без bulk-запиту (fallback для всіх символів).
+    """
+
+    def __init__(self, markets, summary_all, hide_from_bulk=(), fail_bulk=False, latency=STUB_LATENCY_SEC,
+                 connect_latency=STUB_CONNECT_LATENCY_SEC):
+        self.markets = markets
+        self.by_symbol = {item['symbol']: item for item in summary_all.get('results', [])}
+        self.hidden = set(hide_from_bulk)
+        self.fail_bulk = fail_bulk
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive: сесія клієнта перевикористовує з'єднання
+
+            def setup(self):
+                super().setup()
+                with stub.lock: stub.connections += 1
+                if stub.connect_latency: time.sleep(stub.connect_latency)
+
+            def do_GET(self):
+                with stub.lock: stub.requests += 1
+                if stub.latency: time.sleep(stub.latency)
+                status, payload = stub.route(self.path)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def route(self, path):
+        url = urlparse(path)
+        if url.path == '/v1/markets':
+            return 200, self.markets
+        if url.path == '/v1/markets/summary':
+            market = parse_qs(url.query).get('market', [''])[0]
+            if market == 'ALL':
+                if self.fail_bulk: return 404, {'error': 'NOT_FOUND'}
+                return 200, {'results': [v for k, v in self.by_symbol.items() if k not in self.hidden]}
+            item = self.by_symbol.get(market)
+            return (200, {'results': [item]}) if item else (404, {'error': 'NOT_FOUND'})
+        return 404, {'error': 'NOT_FOUND'}
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.connections = 0
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == 'record':
+        record_payloads(sys.argv[2])
+    else:
+        print("Usage: python paradex_stub.py record <dir>")
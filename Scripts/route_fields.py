@@ -0,0 +1,36 @@
+# ═══════════════════════════════════════════════════════════════════════════
+# 🔗 ПОХІДНІ ПОЛЯ МАРШРУТУ (посилання на біржі + funding)
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Спільне для таблиці дашборду (dashboard_data.py, векторно по сторінці) і live feed агрегатора
+# (live_feed.py, по одному запису) — без залежностей, щоб жоден бік не тягнув код іншого.
+
+# (підрядок у назві біржі, шаблон URL) — перший збіг; {t} — токен у верхньому регістрі
+TRADE_URL_TEMPLATES = [
+    ('lighter', "https://app.Lighter.xyz/trade/{t}/?referral=118787PQ"),
+    ('paradex', "https://app.Paradex.trade/trade/{t}-USD-PERP"),
+    ('variational', "https://omni.Variational.io/perpetual/{t}"),
+    ('omni', "https://omni.Variational.io/perpetual/{t}"),
+    ('backpack', "https://Backpack.exchange/trade/{t}_USD_PERP"),
+    ('extended', "https://app.Extended.exchange/perp/{t}-USD"),
+]
+
+
+def trade_url_template(exchange):
+    ex = exchange.lower().strip()
+    for key, template in TRADE_URL_TEMPLATES:
+        if key in ex: return template
+    return f"https://www.google.com/search?q={exchange.capitalize()}+{{t}}+perp"
+
+
+def get_trade_url(exchange, token):
+    return trade_url_template(exchange).format(t=token.upper().strip())
+
+
+def funding_fields(buy_rate, buy_freq, sell_rate, sell_freq):
+    """
+    (funding_apr, f_spread_8h) у % — чиста погодинна ставка (sell − buy) у річному і 8-годинному вимірі.
+    Працює і з числами, і з pandas Series (по колонках фрейму).
+    """
+    net_hourly = sell_rate / sell_freq - buy_rate / buy_freq
+    return net_hourly * 24 * 365, net_hourly * 8
@@ -0,0 +1,127 @@
+import sqlite3
+from collections import deque
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📈 ROLLING MIN/MAX СПРЕДІВ (замість GROUP BY по всій spread_history)
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Для кожного маршруту (token, route) тримаємо монотонні деки (timestamp, spread):
+#   - для MIN значення в деці зростають, для MAX — спадають;
+#   - новий семпл виштовхує з хвоста всі значення, які він "перекриває";
+#   - старі семпли знімаються з голови, коли виходять за межі вікна.
+# Кожен семпл додається і видаляється рівно один раз -> O(1) амортизовано.
+#
+# Таймстемпи зберігаються рядками 'YYYY-MM-DD HH:MM:SS', як у spread_history,
+# і порівнюються лексикографічно — так само, як це робить SQLite у старому запиті.
+
+TS_FORMAT = '%Y-%m-%d %H:%M:%S'
+SWEEP_INTERVAL_SEC = 3600
+
+
+def sqlite_now():
+    """Аналог datetime('now') у SQLite: поточний час UTC без таймзони."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class RollingWindow:
+    """Min/Max по ковзному вікну на двох монотонних деках."""
+    __slots__ = ('mins', 'maxs')
+
+    def __init__(self):
+        self.mins = deque()
+        self.maxs = deque()
+
+    def push(self, ts, value):
+        mins, maxs = self.mins, self.maxs
+        while mins and mins[-1][1] >= value: mins.pop()
+        mins.append((ts, value))
+        while maxs and maxs[-1][1] <= value: maxs.pop()
+        maxs.append((ts, value))
+
+    def expire(self, cutoff):
+        """Прибирає семпли з timestamp < cutoff (як умова timestamp >= cutoff у SQL)."""
+        mins, maxs = self.mins, self.maxs
+        while mins and mins[0][0] < cutoff: mins.popleft()
+        while maxs and maxs[0][0] < cutoff: maxs.popleft()
+
+    def min(self):
+        return self.mins[0][1] if self.mins else None
+
+    def max(self):
+        return self.maxs[0][1] if self.maxs else None
+
+
+class SpreadStatsEngine:
+    """
+    Статистика 24h / 30d (фактично — весь період зберігання історії) для кожного маршруту.
+    Заповнюється з історії при старті, далі оновлюється по одному семплу.
+    """
+
+    def __init__(self, retention_days, short_window_hours=24):
+        self.retention = timedelta(days=retention_days)
+        self.short_window = timedelta(hours=short_window_hours)
+        self.windows = {}  # {(token, route): (RollingWindow 24h, RollingWindow retention)}
+        self.last_sweep = sqlite_now()
+
+    def add(self, token, route, spread, ts):
+        if spread is None or spread != spread: return  # NULL/NaN SQL-агрегати ігнорують
+        pair = self.windows.get((token, route))
+        if pair is None:
+            pair = self.windows[(token, route)] = (RollingWindow(), RollingWindow())
+        pair[0].push(ts, spread)
+        pair[1].push(ts, spread)
+
+    def add_summary(self, token, route, spread_min, spread_max, ts):
+        """Підсумок бакета (min/max) — тільки у довге вікно; 24h рахується з сирих семплів."""
+        if spread_min is None: return
+        pair = self.windows.get((token, route))
+        if pair is None:
+            pair = self.windows[(token, route)] = (RollingWindow(), RollingWindow())
+        pair[1].push(ts, spread_min)
+        pair[1].push(ts, spread_max)
+
+    def warm_start(self, db_path, store):
+        """
+        Заповнює вікна з багаторівневої історії (history_tiers.SpreadHistoryStore):
+        хвилинні підсумки — до початку сирих партицій, далі — сирі семпли у порядку часу.
+        """
+        cutoff = (sqlite_now() - self.retention).strftime(TS_FORMAT)
+        count = 0
+        with closing(sqlite3.connect(db_path, timeout=10)) as conn:
+            store.load_partitions(conn)
+            raw_start = store.raw_start() or sqlite_now().strftime(TS_FORMAT)
+            if cutoff < raw_start:
+                for token, route, spread_min, spread_max, ts in store.iter_rollups(conn, '1m', cutoff, raw_start):
+                    self.add_summary(token, route, spread_min, spread_max, ts)
+                    count += 1
+            for token, route, spread, ts in store.iter_samples(conn, max(cutoff, raw_start)):
+                self.add(token, route, spread, ts)
+                count += 1
+        return count
+
+    def get_cutoffs(self):
+        now = sqlite_now()
+        return (now - self.short_window).strftime(TS_FORMAT), (now - self.retention).strftime(TS_FORMAT)
+
+    def get(self, token, route, cutoffs):
+        """Повертає (min_24h, max_24h, min_30d, max_30d); None там, де семплів у вікні немає."""
+        pair = self.windows.get((token, route))
+        if pair is None: return None, None, None, None
+        short, full = pair
+        short.expire(cutoffs[0])
+        full.expire(cutoffs[1])
+        return short.min(), short.max(), full.min(), full.max()
+
+    def sweep(self):
+        """Раз на годину прибирає маршрути, у яких не залишилось семплів (пам'ять)."""
+        now = sqlite_now()
+        if (now - self.last_sweep).total_seconds() < SWEEP_INTERVAL_SEC: return
+        cutoffs = self.get_cutoffs()
+        for key in list(self.windows.keys()):
+            short, full = self.windows[key]
+            short.expire(cutoffs[0])
+            full.expire(cutoffs[1])
+            if not full.mins: del self.windows[key]
+        self.last_sweep = now
@@ -1,138 +1,188 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
-import sqlite3
-import pandas as pd
+import streamlit.components.v1 as components
+import json
 import time
 import os
+import urllib.request
+from urllib.parse import urlsplit
+
+from dashboard_data import LiveData, DB_PATH, PAGE_SIZE, HISTORY_CHART_POINTS
 
 REFRESH_SECONDS = 15
 
-st.set_page_config(page_title="Arbitrage Scanner", page_icon="🚀", layout="wide")
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Database', 'arbitrage_dashboard.db')
+# ⚡ PUSH-РЕЖИМ: браузер підключається до SSE агрегатора (live_feed.py) і латає лише змінені рядки —
+# без st.rerun() і без повторної відправки таблиці. Вимкнений тумблер або feed, що не відповідає
+# на LIVE_FEED_PROBE_URL (агрегатор на тій самій машині, що й Streamlit — main.py), — опитування.
+PUSH_MODE = True
+LIVE_FEED_PORT = 8765  # LIVE_FEED_PORT агрегатора
+LIVE_FEED_URL = None  # Адреса SSE з боку браузера; None — хост, з якого відкрито дашборд (напр. за проксі — задати явно)
+LIVE_FEED_PROBE_URL = f"http://127.0.0.1:{LIVE_FEED_PORT}/health"
+LIVE_FEED_PROBE_TTL = 10  # Секунд між перевірками feed (спільно для всіх сесій)
+PUSH_MAX_ROWS = 300  # Рядків у push-таблиці (топ за спредом після фільтрів)
+LIVE_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard_live.html')
+
+# 📈 Графік історії маршруту: вікно -> годин; точок завжди до HISTORY_CHART_POINTS (min/max по бакетах у SQLite)
+HISTORY_WINDOWS = {"6 год": 6, "24 год": 24, "7 днів": 24 * 7, "30 днів": 24 * 30, "1 рік": 24 * 365}
+HISTORY_DEFAULT_WINDOW = "7 днів"
 
+st.set_page_config(page_title="Arbitrage Scanner", page_icon="🚀", layout="wide")
 
-def load_data():
-    if not os.path.exists(DB_PATH): return pd.DataFrame()
+# (колонка, назва, формат) — спільно для st.dataframe і push-таблиці; формат None — текст/посилання
+COLUMNS = [
+    ('token', "Token", None),
+    ('buy_link', "Buy Route", None),
+    ('sell_link', "Sell Route", None),
+    ('spread_pct', "Spread", "%.2f %%"),
+    ('funding_apr', "Fund APR", "%.2f %%"),
+    ('f_spread_8h', "F_spread 8h", "%.4f %%"),
+    ('buy_funding_rate', "Buy Fund", "%.4f %%"),
+    ('buy_funding_freq', "Buy Freq (h)", "%d"),
+    ('buy_funding_24h_pct', "F buy 24h", "%.4f %%"),
+    ('sell_funding_rate', "Sell Fund", "%.4f %%"),
+    ('sell_funding_freq', "Sell Freq (h)", "%d"),
+    ('sell_funding_24h_pct', "F sell 24h", "%.4f %%"),
+    ('spread_min_24h', "Min 24h", "%.2f %%"),
+    ('spread_max_24h', "Max 24h", "%.2f %%"),
+    ('buy_price', "Buy Price", "%.4f"),
+    ('sell_price', "Sell Price", "%.4f"),
+]
+EXEC_COLUMNS_AT = 4  # Executable spread (VWAP) — після Spread, якщо агрегатор вже додав колонки
+LINK_REGEX = r"https?://(?:www\.|app\.|omni\.)?(\w+)"
+
+
+@st.cache_resource
+def get_live_data():
+    """Один на процес: усі вкладки ділять з'єднання і кеш (запит — раз на запис агрегатора)."""
+    return LiveData(DB_PATH)
+
+
+@st.cache_resource
+def get_live_table_template():
+    with open(LIVE_TABLE_PATH, encoding='utf-8') as f: return f.read()
+
+
+@st.cache_data(ttl=LIVE_FEED_PROBE_TTL, show_spinner=False)
+def live_feed_available():
     try:
-        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
-        df = pd.read_sql_query("SELECT * FROM live_opportunities", conn)
-        conn.close()
-        return df
+        with urllib.request.urlopen(LIVE_FEED_PROBE_URL, timeout=0.5) as response: return response.status == 200
     except:
-        return pd.DataFrame()
+        return False
 
 
-def get_trade_url(exchange, token):
-    ex, t = exchange.lower().strip(), token.upper().strip()
-    if 'lighter' in ex:
-        return f"https://app.Lighter.xyz/trade/{t}/?referral=118787PQ"
-    elif 'paradex' in ex:
-        return f"https://app.Paradex.trade/trade/{t}-USD-PERP"
-    elif 'variational' in ex or 'omni' in ex:
-        return f"https://omni.Variational.io/perpetual/{t}"
-    elif 'backpack' in ex:
-        return f"https://Backpack.exchange/trade/{t}_USD_PERP"
-    elif 'extended' in ex:
-        return f"https://app.Extended.exchange/perp/{t}-USD"
-    return f"https://www.google.com/search?q={exchange.capitalize()}+{t}+perp"
+def live_feed_url():
+    """SSE агрегатора на тому ж хості, з якого браузер відкрив дашборд (а не localhost браузера)."""
+    if LIVE_FEED_URL: return LIVE_FEED_URL
+    hostname = urlsplit(f"//{st.context.headers.get('Host', '')}").hostname or 'localhost'
+    if ':' in hostname: hostname = f"[{hostname}]"  # IPv6
+    return f"http://{hostname}:{LIVE_FEED_PORT}/events"
 
 
-st.title("🚀 Live Arbitrage Dashboard")
-df = load_data()
+def exec_columns(names):
+    return [(c, f"Exec {c.rsplit('_', 1)[1]}", "%.2f %%") for c in names if c.startswith('exec_spread_')]
 
-with st.container(border=True):
-    col1, col2, col3, col4 = st.columns([1, 2, 2, 1])
-    with col1: min_spread = st.number_input("📉 Мін. спред (%)", value=-100.0, step=0.1)
-    with col2: search_token = st.multiselect("Coin", sorted(df['token'].unique()) if not df.empty else [],
-                                             placeholder="Всі")
-    with col3: selected_exchanges = st.multiselect("Exchanges", sorted(
-        set(df['buy_exchange'].unique()) | set(df['sell_exchange'].unique())) if not df.empty else [],
-                                                   placeholder="Всі")
-    with col4:
-        st.markdown("<br>", unsafe_allow_html=True)
-        auto_refresh = st.toggle("🔄 Авто-оновлення", value=True)
-        timer_placeholder = st.empty()
-        if st.button("Оновити"): st.rerun()
 
-if not df.empty:
-    df_filtered = df[df['spread_pct'] >= min_spread].copy()
+def render_push_table(min_spread, tokens, exchanges):
+    """HTML-компонент з EventSource: фільтри застосовує браузер, зміна фільтра — звичайний rerun віджета."""
+    config = {'url': live_feed_url(), 'min_spread': min_spread, 'tokens': tokens, 'exchanges': exchanges,
+              'max_rows': PUSH_MAX_ROWS, 'columns': COLUMNS, 'exec_at': EXEC_COLUMNS_AT, 'link_regex': LINK_REGEX}
+    html = get_live_table_template().replace('/*CONFIG*/null', json.dumps(config))
+    components.html(html, height=900)
 
-    # Фільтр по токенам
-    if search_token:
-        df_filtered = df_filtered[df_filtered['token'].isin(search_token)]
 
-    # 🔥 ВИПРАВЛЕНИЙ: Розумний фільтр бірж
-    if selected_exchanges:
-        if len(selected_exchanges) == 1:
-            # Режим 1 біржі: Показуємо всі зв'язки з нею (АБО)
-            mask = df_filtered['buy_exchange'].isin(selected_exchanges) | df_filtered['sell_exchange'].isin(
-                selected_exchanges)
-        else:
-            # Режим 2+ бірж: Показуємо маршрути ТІЛЬКИ між ними (І)
-            mask = df_filtered['buy_exchange'].isin(selected_exchanges) & df_filtered['sell_exchange'].isin(
-                selected_exchanges)
+def render_history_chart(live_data, tokens, default_token=None):
+    """Drill-down одного маршруту: графік спреду за вибране вікно."""
+    with st.expander("📈 Історія спреду маршруту", expanded=False):
+        if not tokens: return st.info("⏳ Очікування даних...")
+        h1, h2, h3 = st.columns([1, 2, 2])
+        index = tokens.index(default_token) if default_token in tokens else 0
+        with h1: token = st.selectbox("Coin", tokens, index=index, key="history_token")
+        routes = live_data.routes(token)
+        with h2: route = st.selectbox("Route", routes, key="history_route")
+        with h3: window = st.radio("Вікно", list(HISTORY_WINDOWS), horizontal=True, key="history_window",
+                                   index=list(HISTORY_WINDOWS).index(HISTORY_DEFAULT_WINDOW))
+        if not route: return st.info("Немає маршрутів для токена.")
 
-        df_filtered = df_filtered[mask]
+        tier, df = live_data.history_chart(token, route, HISTORY_WINDOWS[window], HISTORY_CHART_POINTS)
+        if df.empty: return st.info("Історії для маршруту ще немає.")
+        st.caption(f"{token} · {route} · рівень {tier} · {len(df)} точок (min/max по бакетах) · "
+                   f"{df['spread_pct'].min():.2f}% … {df['spread_pct'].max():.2f}%")
+        st.line_chart(df, x='timestamp', y='spread_pct', height=350)
 
-    buy_hourly = df_filtered['buy_funding_rate'] / df_filtered['buy_funding_freq']
-    sell_hourly = df_filtered['sell_funding_rate'] / df_filtered['sell_funding_freq']
-    net_hourly = sell_hourly - buy_hourly
-    df_filtered['funding_apr'] = net_hourly * 24 * 365
-    df_filtered['f_spread_8h'] = net_hourly * 8
 
-    df_filtered = df_filtered.sort_values(by='spread_pct', ascending=False)
-    df_filtered['buy_link'] = df_filtered.apply(lambda r: get_trade_url(r['buy_exchange'], r['token']), axis=1)
-    df_filtered['sell_link'] = df_filtered.apply(lambda r: get_trade_url(r['sell_exchange'], r['token']), axis=1)
+st.title("🚀 Live Arbitrage Dashboard")
+live_data = get_live_data()
+tokens, exchanges = live_data.filter_options()
+feed_up = live_feed_available()
 
+with st.container(border=True):
+    col1, col2, col3, col4, col5 = st.columns([1, 2, 2, 1, 1])
+    with col1: min_spread = st.number_input("📉 Мін. спред (%)", value=-100.0, step=0.1)
+    with col2: search_token = st.multiselect("Coin", tokens, placeholder="Всі")
+    with col3: selected_exchanges = st.multiselect("Exchanges", exchanges, placeholder="Всі")
+    with col5:
+        push_mode = st.toggle("⚡ Push", value=PUSH_MODE, disabled=not feed_up,
+                              help=None if feed_up else "Live feed агрегатора недоступний — опитування") and feed_up
+        auto_refresh = not push_mode and st.toggle("🔄 Авто-оновлення", value=True)
+        timer_placeholder = st.empty()
+        if st.button("Оновити"): st.rerun()
+    with col4:
+        page = 1 if push_mode else st.number_input(f"📄 Сторінка ({PAGE_SIZE} рядків)", min_value=1, value=1,
+                                                    step=1)
+
+if push_mode:
+    # Скрипт далі не виконується і не перезапускається по таймеру — оновлення приходять у браузер по SSE
+    timer_placeholder.markdown("⚡ **Push**")
+    render_push_table(min_spread, search_token, selected_exchanges)
+    render_history_chart(live_data, tokens, search_token[0] if search_token else None)
+    st.stop()
+
+# Фільтри, сортування і сторінку виконує SQLite (індекси live_opportunities) — у pandas лише PAGE_SIZE рядків.
+# Біржі: одна — всі зв'язки з нею (АБО), дві і більше — маршрути тільки між ними (І).
+# Фрейм сторінки спільний для всіх сесій з тими самими фільтрами — не змінюємо його.
+df_page, total, top = live_data.query(min_spread, search_token, selected_exchanges, page - 1)
+
+if total:
     m1, m2, m3 = st.columns(3)
-    m1.metric("Маршрутів", len(df_filtered))
-    if not df_filtered.empty:
-        m2.metric("Топ спред", f"{df_filtered.iloc[0]['spread_pct']:.2f}%")
-        m3.metric("Топ пара", f"{df_filtered.iloc[0]['token']} ({df_filtered.iloc[0]['route']})")
-
-    display_cols = [
-        'token', 'buy_link', 'sell_link', 'spread_pct',
-        'funding_apr', 'f_spread_8h',
-        'buy_funding_rate', 'buy_funding_freq', 'buy_funding_24h_pct',
-        'sell_funding_rate', 'sell_funding_freq', 'sell_funding_24h_pct',
-        'spread_min_24h', 'spread_max_24h', 'buy_price', 'sell_price'
-    ]
-
-    clean_regex = r"https?://(?:www\.|app\.|omni\.)?(\w+)"
-    config = {
-        "token": st.column_config.TextColumn("Token", width="small"),
-        "buy_link": st.column_config.LinkColumn("Buy Route", display_text=clean_regex, width="medium"),
-        "sell_link": st.column_config.LinkColumn("Sell Route", display_text=clean_regex, width="medium"),
-        "spread_pct": st.column_config.NumberColumn("Spread", format="%.2f %%"),
-        "funding_apr": st.column_config.NumberColumn("Fund APR", format="%.2f %%"),
-        "f_spread_8h": st.column_config.NumberColumn("F_spread 8h", format="%.4f %%"),
-        "buy_funding_rate": st.column_config.NumberColumn("Buy Fund", format="%.4f %%"),
-        "buy_funding_freq": st.column_config.NumberColumn("Buy Freq (h)"),
-        "buy_funding_24h_pct": st.column_config.NumberColumn("F buy 24h", format="%.4f %%"),
-        "sell_funding_rate": st.column_config.NumberColumn("Sell Fund", format="%.4f %%"),
-        "sell_funding_freq": st.column_config.NumberColumn("Sell Freq (h)"),
-        "sell_funding_24h_pct": st.column_config.NumberColumn("F sell 24h", format="%.4f %%"),
-        "spread_min_24h": st.column_config.NumberColumn("Min 24h", format="%.2f %%"),
-        "spread_max_24h": st.column_config.NumberColumn("Max 24h", format="%.2f %%"),
-        "buy_price": st.column_config.NumberColumn("Buy Price", format="%.4f"),
-        "sell_price": st.column_config.NumberColumn("Sell Price", format="%.4f"),
-    }
+    m1.metric("Маршрутів", total)
+    m2.metric("Топ спред", f"{top['spread_pct']:.2f}%")
+    m3.metric("Топ пара", f"{top['token']} ({top['route']})")
+
+if not df_page.empty:
+    columns = list(COLUMNS)
+    columns[EXEC_COLUMNS_AT:EXEC_COLUMNS_AT] = exec_columns(df_page.columns)
+    display_cols = [c for c, _, _ in columns]
+
+    config = {}
+    for c, label, fmt in columns:
+        if c == 'token':
+            config[c] = st.column_config.TextColumn(label, width="small")
+        elif c.endswith('_link'):
+            config[c] = st.column_config.LinkColumn(label, display_text=LINK_REGEX, width="medium")
+        else:
+            config[c] = st.column_config.NumberColumn(label, format=fmt if fmt != "%d" else None)
 
 
     def hl(v):
         return 'background-color: #d4edda; color: black;' if v > 0.5 else 'background-color: #fff3cd; color: black;' if v > 0 else 'background-color: #f8d7da; color: black;'
 
 
-    st.dataframe(df_filtered[display_cols].style.map(hl, subset=['spread_pct']), width="stretch", height=800,
+    pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    st.caption(f"Сторінка {page} з {pages}: маршрути {(page - 1) * PAGE_SIZE + 1}–{(page - 1) * PAGE_SIZE + len(df_page)} з {total}")
+    st.dataframe(df_page[display_cols].style.map(hl, subset=['spread_pct']), width="stretch", height=800,
                  column_config=config, hide_index=True)
 
+elif total:
+    st.info(f"📄 Сторінки {page} немає — всього {(total + PAGE_SIZE - 1) // PAGE_SIZE}.")
 else:
     st.info("⏳ Очікування даних...")
 
+render_history_chart(live_data, tokens, top['token'] if top is not None else None)
+
 if auto_refresh:
     for i in range(REFRESH_SECONDS, 0, -1):
         timer_placeholder.markdown(f"⏳ Оновлення: **{i}** с")
         time.sleep(1)
     st.rerun()
 else:
-    timer_placeholder.markdown("⏸️ **Пауза**")
\ No newline at end of file
+    timer_placeholder.markdown("⏸️ **Пауза**")
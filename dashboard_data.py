@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Scripts/ — багаторівнева історія спредів і похідні поля маршруту (спільні з агрегатором)
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Scripts')
+if SCRIPTS_DIR not in sys.path:
+    sys.path.append(SCRIPTS_DIR)
+
+from history_tiers import SpreadHistoryStore, RAW_HISTORY_RETENTION_HOURS, HISTORY_RETENTION_DAYS, \
+    ROLLUP_1H_RETENTION_DAYS
+from spread_stats import TS_FORMAT
+from route_fields import trade_url_template, funding_fields
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⚙️ КОНФІГУРАЦІЯ
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Дані для dashboard.py. Один LiveData на процес Streamlit (st.cache_resource): усі вкладки/сесії
+# ділять одне read-only з'єднання. Фільтри дашборду (мін. спред, токени, біржі) і сортування
+# виконує SQLite по індексах (створює агрегатор), у pandas приходить лише одна сторінка таблиці.
+# Результат кешується на (версія бази, фільтри, сторінка) — той самий запит від кількох вкладок
+# виконується раз на запис агрегатора (PRAGMA data_version).
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Database', 'arbitrage_dashboard.db')
+PAGE_SIZE = 100  # Рядків на сторінку таблиці
+QUERY_CACHE_SIZE = 256  # Різних (фільтри, сторінка) на одну версію бази
+
+# 📈 Графік історії маршруту: min/max по бакетах у SQLite — кількість точок не залежить від вікна
+HISTORY_CHART_POINTS = 2000
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🔗 ПОСИЛАННЯ НА БІРЖІ
+# ═══════════════════════════════════════════════════════════════════════════
+
+def trade_links(exchanges, tokens):
+    """
+    Вектор URL для колонок бірж і токенів. Шаблон — раз на біржу, URL — раз на унікальну пару
+    (біржа, токен), далі numpy take по кодах factorize: ціна майже не росте з кількістю маршрутів.
+    """
+    ex_codes, ex_uniques = pd.factorize(exchanges)
+    tok_codes, tok_uniques = pd.factorize(tokens)
+    n_tokens = max(len(tok_uniques), 1)
+    templates = [trade_url_template(ex) for ex in ex_uniques]
+    pair_codes, pairs = pd.factorize(ex_codes * n_tokens + tok_codes)
+    urls = np.array([templates[p // n_tokens].format(t=tok_uniques[p % n_tokens].upper().strip()) for p in pairs],
+                    dtype=object)
+    return pd.Series(urls[pair_codes], index=exchanges.index)
+
+
+def add_derived_columns(df):
+    """funding_apr, f_spread_8h, посилання (рахуються лише для рядків сторінки)."""
+    if df.empty: return df
+    df['funding_apr'], df['f_spread_8h'] = funding_fields(df['buy_funding_rate'], df['buy_funding_freq'],
+                                                          df['sell_funding_rate'], df['sell_funding_freq'])
+
+    df['buy_link'] = trade_links(df['buy_exchange'], df['token'])
+    df['sell_link'] = trade_links(df['sell_exchange'], df['token'])
+    return df
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🔎 ФІЛЬТРИ -> SQL
+# ═══════════════════════════════════════════════════════════════════════════
+
+def build_filter(min_spread, tokens=(), exchanges=()):
+    """
+    (WHERE, параметри) для фільтрів дашборду. Біржі: одна — всі маршрути з нею (АБО),
+    дві і більше — маршрути лише між ними (І). Значення тільки через параметри.
+    """
+    where, params = ["spread_pct >= ?"], [float(min_spread)]
+    if tokens:
+        where.append(f"token IN ({', '.join('?' * len(tokens))})")
+        params += list(tokens)
+    if exchanges:
+        marks = ', '.join('?' * len(exchanges))
+        joiner = 'OR' if len(exchanges) == 1 else 'AND'
+        where.append(f"(buy_exchange IN ({marks}) {joiner} sell_exchange IN ({marks}))")
+        params += list(exchanges) * 2
+    return ' AND '.join(where), params
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🗄️ КЕШ НА ВЕРСІЮ БАЗИ
+# ═══════════════════════════════════════════════════════════════════════════
+
+class LiveData:
+    """
+    Спільний доступ до live_opportunities для всіх сесій дашборду.
+    query() — сторінка відфільтрованих маршрутів (за спредом); повторний запит з тими самими
+    фільтрами до наступного запису агрегатора віддається з кешу. Повернені фрейми спільні — не змінювати.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()  # Сесії Streamlit — окремі потоки, з'єднання одне
+        self.conn = None
+        self.version = None
+        self.results = {}  # {(фільтри, сторінка) | (вид, ...): результат} поточної версії
+        self.tokens = []
+        self.exchanges = []
+        self.options_version = None  # Версія бази, для якої прочитані tokens/exchanges
+        self.queries = 0  # SELECT з моменту старту (для бенчмарку)
+        self.rows_read = 0  # Рядків, прочитаних у pandas
+        # Лише читання: партиції і вибір рівня з тим самим ретеншном, що й у агрегатора
+        self.history = SpreadHistoryStore(RAW_HISTORY_RETENTION_HOURS, HISTORY_RETENTION_DAYS, ROLLUP_1H_RETENTION_DAYS)
+        self.partitions_version = None
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        return self.conn
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None: self.conn.close()
+            self.conn = None
+
+    def _refresh(self, conn):
+        """Нова версія бази (агрегатор закомітив) — скидаємо кеш результатів."""
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self.version: return
+        self.results.clear()
+        self.version = version
+
+    def filter_options(self):
+        """(токени, біржі) для фільтрів — перечитуються лише після запису агрегатора."""
+        if not os.path.exists(self.db_path): return [], []
+        with self.lock:
+            try:
+                conn = self._connect()
+                self._refresh(conn)
+                if self.options_version != self.version:
+                    self.tokens = [row[0] for row in conn.execute(
+                        "SELECT DISTINCT token FROM live_opportunities ORDER BY token")]
+                    self.exchanges = [row[0] for row in conn.execute(
+                        "SELECT buy_exchange FROM live_opportunities UNION SELECT sell_exchange FROM live_opportunities "
+                        "ORDER BY 1")]
+                    self.queries += 2
+                    self.options_version = self.version
+            except:
+                if self.conn is not None: self.conn.close()
+                self.conn, self.version = None, None
+            return self.tokens, self.exchanges
+
+    def query(self, min_spread=-100.0, tokens=(), exchanges=(), page=0, page_size=PAGE_SIZE):
+        """(рядки сторінки з похідними колонками, всього маршрутів під фільтром, топ-рядок | None)."""
+        empty = (pd.DataFrame(), 0, None)
+        if not os.path.exists(self.db_path): return empty
+        key = (float(min_spread), tuple(sorted(tokens)), tuple(sorted(exchanges)), int(page), int(page_size))
+        with self.lock:
+            try:
+                conn = self._connect()
+                self._refresh(conn)
+                if key in self.results: return self.results[key]
+
+                where, params = build_filter(min_spread, tokens, exchanges)
+                order = "ORDER BY spread_pct DESC, id"  # id — стабільний порядок рівних спредів між сторінками
+                # Кількість під фільтром — тим самим запитом (віконна функція рахує до LIMIT)
+                df = pd.read_sql_query(f"SELECT *, COUNT(*) OVER () AS total_rows FROM live_opportunities "
+                                       f"WHERE {where} {order} LIMIT ? OFFSET ?",
+                                       conn, params=params + [page_size, page * page_size])
+                self.queries += 1
+                total = int(df['total_rows'].iloc[0]) if not df.empty else 0
+                df = df.drop(columns='total_rows')
+
+                top = df.iloc[0] if page == 0 and not df.empty else None
+                if page and df.empty:
+                    # Сторінка за межами — лише кількість
+                    total = conn.execute(f"SELECT COUNT(*) FROM live_opportunities WHERE {where}", params).fetchone()[0]
+                    self.queries += 1
+                if top is None and total:
+                    top = pd.read_sql_query(f"SELECT * FROM live_opportunities WHERE {where} {order} LIMIT 1",
+                                            conn, params=params).iloc[0]
+                    self.queries += 1
+                self.rows_read += len(df)
+
+                if len(self.results) >= QUERY_CACHE_SIZE: self.results.clear()
+                result = self.results[key] = (add_derived_columns(df), total, top)
+                return result
+            except:
+                # Наступний виклик перепідключиться
+                if self.conn is not None: self.conn.close()
+                self.conn, self.version = None, None
+                self.results.clear()
+                return empty
+
+    def routes(self, token):
+        """Маршрути токена в live_opportunities (за спредом) — для вибору графіка історії."""
+        if not os.path.exists(self.db_path): return []
+        key = ('routes', token)
+        with self.lock:
+            try:
+                conn = self._connect()
+                self._refresh(conn)
+                if key not in self.results:
+                    self.results[key] = [row[0] for row in conn.execute(
+                        "SELECT route FROM live_opportunities WHERE token = ? ORDER BY spread_pct DESC, id", (token,))]
+                    self.queries += 1
+                return self.results[key]
+            except:
+                if self.conn is not None: self.conn.close()
+                self.conn, self.version = None, None
+                self.results.clear()
+                return []
+
+    def history_chart(self, token, route, window_hours, points=HISTORY_CHART_POINTS):
+        """
+        (рівень, DataFrame[timestamp, spread_pct]) за останні window_hours — до ~points точок
+        (SpreadHistoryStore.load_downsampled). Кешується до наступного запису агрегатора.
+        """
+        empty = (None, pd.DataFrame(columns=['timestamp', 'spread_pct']))
+        if not os.path.exists(self.db_path): return empty
+        key = ('history', token, route, float(window_hours), int(points))
+        with self.lock:
+            try:
+                conn = self._connect()
+                self._refresh(conn)
+                if key in self.results: return self.results[key]
+                if self.partitions_version != self.version:
+                    # Агрегатор створює/видаляє партиції — перечитуємо список з sqlite_master
+                    self.history.load_partitions(conn)
+                    self.partitions_version = self.version
+                    self.queries += 1
+
+                # Той самий годинник, що й у SpreadHistoryStore.flush — семпли мають локальний час
+                now = datetime.now()
+                start_ts = (now - timedelta(hours=window_hours)).strftime(TS_FORMAT)
+                tier, df = self.history.load_downsampled(conn, token, route, start_ts, now.strftime(TS_FORMAT), points)
+                df['timestamp'] = pd.to_datetime(df['timestamp'])
+                self.queries += 1
+                self.rows_read += len(df)
+
+                if len(self.results) >= QUERY_CACHE_SIZE: self.results.clear()
+                result = self.results[key] = (tier, df)
+                return result
+            except:
+                if self.conn is not None: self.conn.close()
+                self.conn, self.version = None, None
+                self.results.clear()
+                return empty
@@ -32,6 +32,9 @@ try:
     # Тепер Python знайде його, бо ми додали SCRIPTS_DIR у sys.path
     import agregator
 
+    # --- Shared-memory шина котирувань ---
+    import quote_bus
+
 except ImportError as e:
     print(f"❌ Error importing modules: {e}")
     print(f"🔍 Checked paths: {sys.path}")
@@ -42,6 +45,10 @@ except ImportError as e:
 # 🚀 ДОДАТКОВІ ФУНКЦІЇ ЗАПУСКУ
 # ═══════════════════════════════════════════════════════════════════════════
 
+# 🚌 Монітори публікують котирування в shared memory, агрегатор читає їх без SQLite
+USE_QUOTE_BUS = True
+
+
 class C:
     CYAN = '\033[96m'
     GREEN = '\033[92m'
@@ -51,10 +58,10 @@ class C:
     END = '\033[0m'
 
 
-def run_monitor(target_func, name):
+def run_monitor(target_func, name, *args):
     """Обгортка для запуску звичайних Python функцій (Монітори, Агрегатор)."""
     try:
-        target_func()
+        target_func(*args)
     except KeyboardInterrupt:
         pass
     except Exception as e:
@@ -97,17 +104,36 @@ if __name__ == "__main__":
 
     print(f"\n{C.BOLD}{C.CYAN}🚀 LAUNCHING RIDDLE ARBITRAGE SYSTEM...{C.END}")
 
+    # 🚌 Сегменти shared memory живуть у головному процесі й переживають рестарти дочірніх
+    buses = {}
+    if USE_QUOTE_BUS:
+        try:
+            buses = quote_bus.create_bus([db['name'] for db in agregator.SOURCE_DBS])
+            print(f"{C.GREEN}🚌 Quote bus allocated for {len(buses)} exchanges.{C.END}")
+        except Exception as e:
+            print(f"{C.YELLOW}⚠️ Quote bus disabled: {e}{C.END}")
+    bus_names = {name: bus.name for name, bus in buses.items()}
+
+    # ⚡ Сигнал "є нові котирування": монітори ставлять, агрегатор прокидається і перераховує
+    update_event = multiprocessing.Event() if buses else None
+
     # Список процесів
     processes_config = [
         # --- МОНІТОРИ (в Dex_monitor) ---
-        {"func": backpack_monitor.main, "name": "Backpack", "is_streamlit": False, "last_restart": 0},
-        {"func": paradex_monitor.main, "name": "Paradex", "is_streamlit": False, "last_restart": 0},
-        {"func": variational_monitor.main, "name": "Variational", "is_streamlit": False, "last_restart": 0},
-        {"func": extended_monitor.main, "name": "Extended", "is_streamlit": False, "last_restart": 0},
-        {"func": lighter_monitor.main, "name": "Lighter (WSS)", "is_streamlit": False, "last_restart": 0},
+        {"func": backpack_monitor.main, "name": "Backpack", "is_streamlit": False, "last_restart": 0,
+         "args": (bus_names.get("Backpack"), update_event)},
+        {"func": paradex_monitor.main, "name": "Paradex", "is_streamlit": False, "last_restart": 0,
+         "args": (bus_names.get("Paradex"), update_event)},
+        {"func": variational_monitor.main, "name": "Variational", "is_streamlit": False, "last_restart": 0,
+         "args": (bus_names.get("Variational"), update_event)},
+        {"func": extended_monitor.main, "name": "Extended", "is_streamlit": False, "last_restart": 0,
+         "args": (bus_names.get("Extended"), update_event)},
+        {"func": lighter_monitor.main, "name": "Lighter (WSS)", "is_streamlit": False, "last_restart": 0,
+         "args": (bus_names.get("Lighter"), update_event)},
 
         # --- АГРЕГАТОР (в Scripts) ---
-        {"func": agregator.main, "name": "agregator", "is_streamlit": False, "last_restart": 0},
+        {"func": agregator.main, "name": "agregator", "is_streamlit": False, "last_restart": 0,
+         "args": (bus_names, update_event)},
 
         # --- DASHBOARD (в корені) ---
         {"func": run_dashboard_process, "name": "Dashboard UI", "is_streamlit": True, "last_restart": 0}
@@ -122,7 +148,8 @@ if __name__ == "__main__":
         if cfg["is_streamlit"]:
             p = multiprocessing.Process(target=cfg["func"], name=cfg["name"])
         else:
-            p = multiprocessing.Process(target=run_monitor, args=(cfg["func"], cfg["name"]), name=cfg["name"])
+            p = multiprocessing.Process(target=run_monitor, args=(cfg["func"], cfg["name"]) + cfg.get("args", ()),
+                                        name=cfg["name"])
 
         p.start()
         active_processes[index] = p
@@ -171,4 +198,6 @@ if __name__ == "__main__":
             if p and p.is_alive():
                 p.terminate()
                 p.join()
+        for bus in buses.values():
+            bus.close()
         print(f"{C.GREEN}✅ Done.{C.END}")
\ No newline at end of file